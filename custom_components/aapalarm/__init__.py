@@ -1,32 +1,37 @@
 """AAP IP / Serial Module init file."""
 
-import asyncio
-from collections import deque
-from datetime import datetime
 import json
 import logging
 from pathlib import Path
 
-from pyaapalarmmodule import AAPAlarmPanel
 import voluptuous as vol
 
-from homeassistant.const import CONF_HOST, CONF_TIMEOUT, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.const import CONF_HOST, CONF_TIMEOUT, STATE_UNAVAILABLE, STATE_UNKNOWN, Platform
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.exceptions import ConfigEntryNotReady
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.discovery import async_load_platform
-from homeassistant.helpers.dispatcher import async_dispatcher_send
-from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType
 
 from .const import (
+    ATTR_RESTORED,
     DOMAIN,
     DATA_AAP,
     CONF_KEEPALIVE,
     CONF_CONNECTIONTYPE,
+    CONF_BACKGROUND_CONNECT,
+    CONF_CAPTURE_ENABLED,
+    CONF_CAPTURE_MAX_AGE,
+    CONF_CAPTURE_MAX_SIZE,
+    CONF_COALESCE_WINDOW,
+    CONF_COMMAND_TIMEOUT,
     CONF_MESSAGE_LOG_ENABLED,
+    CONF_MESSAGE_LOG_REFRESH,
+    CONF_MESSAGE_LOG_SIZE,
     CONF_PORT,
     CONF_AREAS,
     CONF_AREANAME,
@@ -39,17 +44,34 @@ from .const import (
     CONF_OUTPUTS,
     CONF_OUTPUTNAME,
     DEFAULT_PORT,
+    DEFAULT_BACKGROUND_CONNECT,
+    DEFAULT_CAPTURE_ENABLED,
+    DEFAULT_CAPTURE_MAX_AGE,
+    DEFAULT_CAPTURE_MAX_SIZE,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_COMMAND_TIMEOUT,
     DEFAULT_KEEPALIVE,
     DEFAULT_MESSAGE_LOG_ENABLED,
+    DEFAULT_MESSAGE_LOG_REFRESH,
+    DEFAULT_MESSAGE_LOG_SIZE,
     DEFAULT_ZONETYPE,
     DEFAULT_TIMEOUT,
-    SIGNAL_ZONE_UPDATE,
-    SIGNAL_AREA_UPDATE,
-    SIGNAL_SYSTEM_UPDATE,
-    SIGNAL_OUTPUT_UPDATE,
+    SIGNAL_ZONE_UPDATE as SIGNAL_ZONE_UPDATE,
+    SIGNAL_AREA_UPDATE as SIGNAL_AREA_UPDATE,
+    SIGNAL_SYSTEM_UPDATE as SIGNAL_SYSTEM_UPDATE,
+    SIGNAL_OUTPUT_UPDATE as SIGNAL_OUTPUT_UPDATE,
     SIGNAL_KEYPAD_UPDATE as SIGNAL_KEYPAD_UPDATE,
-    SIGNAL_MESSAGE_LOG_UPDATE,
+    SIGNAL_MESSAGE_LOG_UPDATE as SIGNAL_MESSAGE_LOG_UPDATE,
+    SIGNAL_STATS_UPDATE as SIGNAL_STATS_UPDATE,
+    SIGNAL_DEVICES_ADDED as SIGNAL_DEVICES_ADDED,
 )
+from .hub import (
+    AAPAlarmHub,
+    async_dispatch_update as async_dispatch_update,
+    format_signal,
+    normalize_key as normalize_key,
+)
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -65,6 +87,7 @@ PLATFORMS: list[Platform] = [
     Platform.SWITCH,
 ]
 
+
 OUTPUT_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_OUTPUTNAME): cv.string,
@@ -101,6 +124,31 @@ CONFIG_SCHEMA = vol.Schema(
                     vol.Coerce(int), vol.Range(min=15)
                 ),
                 vol.Optional(CONF_TIMEOUT, default=DEFAULT_TIMEOUT): vol.Coerce(int),
+                vol.Optional(CONF_COALESCE_WINDOW, default=DEFAULT_COALESCE_WINDOW): vol.All(
+                    vol.Coerce(float), vol.Range(min=0, max=1)
+                ),
+                vol.Optional(
+                    CONF_BACKGROUND_CONNECT, default=DEFAULT_BACKGROUND_CONNECT
+                ): cv.boolean,
+                vol.Optional(CONF_COMMAND_TIMEOUT, default=DEFAULT_COMMAND_TIMEOUT): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=120)
+                ),
+                vol.Optional(
+                    CONF_MESSAGE_LOG_ENABLED, default=DEFAULT_MESSAGE_LOG_ENABLED
+                ): cv.boolean,
+                vol.Optional(CONF_MESSAGE_LOG_SIZE, default=DEFAULT_MESSAGE_LOG_SIZE): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=10000)
+                ),
+                vol.Optional(
+                    CONF_MESSAGE_LOG_REFRESH, default=DEFAULT_MESSAGE_LOG_REFRESH
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=60)),
+                vol.Optional(CONF_CAPTURE_ENABLED, default=DEFAULT_CAPTURE_ENABLED): cv.boolean,
+                vol.Optional(CONF_CAPTURE_MAX_SIZE, default=DEFAULT_CAPTURE_MAX_SIZE): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=1000)
+                ),
+                vol.Optional(CONF_CAPTURE_MAX_AGE, default=DEFAULT_CAPTURE_MAX_AGE): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=365)
+                ),
             }
         )
     },
@@ -113,138 +161,26 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
     # Initialize data store
     hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
 
     conf = config.get(DOMAIN)
     if conf is None:
         # No YAML configuration found, but this is OK if using config flow
         _LOGGER.debug("No YAML configuration found for domain %s, expecting config entries", DOMAIN)
         return True
-    
-    connectiontype = conf.get(CONF_CONNECTIONTYPE)
-    host = conf.get(CONF_HOST)
-    port = conf.get(CONF_PORT)
-    keep_alive = conf.get(CONF_KEEPALIVE)
+
     zones = conf.get(CONF_ZONES)
     areas = conf.get(CONF_AREAS)
     outputs = conf.get(CONF_OUTPUTS)
-    connection_timeout = conf.get(CONF_TIMEOUT)
-    sync_connect = asyncio.Future()
-    
-    _LOGGER.info("Setting up AAP Alarm Module integration")
-    _LOGGER.debug("Connection Type: %s", connectiontype)
-    _LOGGER.debug("Host: %s", host)
-    _LOGGER.debug("Port: %s", port)
-    _LOGGER.debug("Keep Alive: %s", keep_alive)
-    _LOGGER.debug("Connection Timeout: %s", connection_timeout)  
-
-    controller = AAPAlarmPanel(
-        connectiontype,
-        host,
-        port,
-        "",
-        keep_alive,
-        asyncio.get_event_loop(),
-        connection_timeout,
-    )
-
-    hass.data[DATA_AAP] = controller
-
-    # Message log buffer for last 5 raw messages (if enabled)
-    message_log_enabled = conf.get(CONF_MESSAGE_LOG_ENABLED, DEFAULT_MESSAGE_LOG_ENABLED)
-    if message_log_enabled:
-        message_log = deque(maxlen=5)
-        hass.data[f"{DATA_AAP}_message_log"] = message_log
-
-        def _log_raw_message(raw_line):
-            """Record a raw message to the log buffer."""
-            message_log.append({
-                "timestamp": datetime.now().isoformat(),
-                "raw": raw_line,
-            })
-            async_dispatcher_send(hass, SIGNAL_MESSAGE_LOG_UPDATE, None)
-
-        def _wrap_process_line(controller_ref):
-            """Wrap the client's process_line to capture raw data."""
-            original = controller_ref._client.process_line
-
-            def wrapped_process_line(line):
-                _log_raw_message(line)
-                return original(line)
-
-            controller_ref._client.process_line = wrapped_process_line
-
-    @callback
-    def connection_fail_callback(data):
-        """Network failure callback."""
-        _LOGGER.error("Could not establish a connection with the AAP IP / Serial Module")
-        if not sync_connect.done():
-            sync_connect.set_result(False)
-
-    @callback
-    def connected_callback(data):
-        """Handle a successful connection."""
-        _LOGGER.info("Established a connection with the AAP IP / Serial Module")
-        if message_log_enabled and hasattr(controller, '_client') and controller._client:
-            _wrap_process_line(controller)
-        if not sync_connect.done():
-            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_aapalarm)
-            sync_connect.set_result(True)
-
-    @callback
-    def zones_updated_callback(data):
-        """Handle zone updates."""
-        _LOGGER.debug("AAP IP / Serial Module sent a zone update event. Updating zones")
-        async_dispatcher_send(hass, SIGNAL_ZONE_UPDATE, data)
 
-    @callback
-    def areas_updated_callback(data):
-        """Handle area changes thrown by AAP (including alarms)."""
-        _LOGGER.debug("The AAP IP / Serial Module sent an area update event. Updating areas")
-        async_dispatcher_send(hass, SIGNAL_AREA_UPDATE, data)
-
-    @callback
-    def system_updated_callback(data):
-        # Handle system updates.
-        _LOGGER.debug("AAP IP / Serial Module sent a system update event. Updating system")
-        async_dispatcher_send(hass, SIGNAL_SYSTEM_UPDATE, data)
-
-    @callback
-    def output_updated_callback(data):
-        """Handle output updates."""
-        _LOGGER.debug("AAP IP / Serial Module sent an output update event. Updating output")
-        async_dispatcher_send(hass, SIGNAL_OUTPUT_UPDATE, data)
+    _LOGGER.info("Setting up AAP Alarm Module integration")
 
-    @callback
-    def keypad_updated_callback(data):
-        """Handle keypad updates."""
-        _LOGGER.debug("AAP IP / Serial Module sent a keypad update event. Updating keypad")
-        async_dispatcher_send(hass, SIGNAL_KEYPAD_UPDATE, data)
+    # YAML setups have no config entry, so the hub is scoped by DATA_AAP
+    hub = AAPAlarmHub(hass, DATA_AAP, conf)
+    hass.data[DOMAIN][DATA_AAP] = hub
 
-    @callback
-    def stop_aapalarm(event):
-        """Shutdown AAP IP / Serial Module connection and thread on exit."""
-        _LOGGER.info("Shutting down AAP Alarm")
-        controller.stop()
-
-    controller.callback_zone_state_change = zones_updated_callback
-    controller.callback_area_state_change = areas_updated_callback
-    controller.callback_system_state_change = system_updated_callback
-    controller.callback_output_state_change = output_updated_callback
-    controller.callback_keypad_state_change = keypad_updated_callback
-
-    controller.callback_connected = connected_callback
-    controller.callback_login_timeout = connection_fail_callback
-
-    _LOGGER.info("Start AAP Alarm")
-    controller.start()
-
-    try:
-        result = await asyncio.wait_for(sync_connect, timeout=connection_timeout)
-    except asyncio.TimeoutError:
-        _LOGGER.error("Timed out connecting to AAP Alarm Module")
-        controller.stop()
-        return False
-    if not result:
+    if not await hub.async_start(wait=not conf[CONF_BACKGROUND_CONNECT]):
+        hass.data[DOMAIN].pop(DATA_AAP, None)
         return False
 
     # Load sub-components for AAP IP / Serial Module
@@ -295,139 +231,25 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up AAP Alarm from a config entry (GUI setup)."""
-    
+
     # Initialize data store
     hass.data.setdefault(DOMAIN, {})
-    
-    # Get configuration data from the config entry
-    conf = entry.data
-    
-    connectiontype = conf.get(CONF_CONNECTIONTYPE)
-    host = conf.get(CONF_HOST)
-    port = conf.get(CONF_PORT)
-    keep_alive = conf.get(CONF_KEEPALIVE)
-    connection_timeout = conf.get(CONF_TIMEOUT)
-    sync_connect = asyncio.Future()
-    
-    _LOGGER.info("Setting up AAP Alarm Module integration via config entry")
-    _LOGGER.debug("Connection Type: %s", connectiontype)
-    _LOGGER.debug("Host: %s", host)
-    _LOGGER.debug("Port: %s", port)
-    _LOGGER.debug("Keep Alive: %s", keep_alive)
-    _LOGGER.debug("Connection Timeout: %s", connection_timeout)  
-
-    controller = AAPAlarmPanel(
-        connectiontype,
-        host,
-        port,
-        "",
-        keep_alive,
-        asyncio.get_event_loop(),
-        connection_timeout,
-    )
-
-    hass.data[DOMAIN][entry.entry_id] = controller
-
-    # Message log buffer for last 5 raw messages (if enabled)
-    message_log_enabled = conf.get(CONF_MESSAGE_LOG_ENABLED, DEFAULT_MESSAGE_LOG_ENABLED)
-    if message_log_enabled:
-        message_log = deque(maxlen=5)
-        hass.data[DOMAIN][f"{entry.entry_id}_message_log"] = message_log
-
-        def _log_raw_message(raw_line):
-            """Record a raw message to the log buffer."""
-            message_log.append({
-                "timestamp": datetime.now().isoformat(),
-                "raw": raw_line,
-            })
-            async_dispatcher_send(hass, SIGNAL_MESSAGE_LOG_UPDATE, None)
-
-        def _wrap_process_line(controller_ref):
-            """Wrap the client's process_line to capture raw data."""
-            original = controller_ref._client.process_line
-
-            def wrapped_process_line(line):
-                _log_raw_message(line)
-                return original(line)
-
-            controller_ref._client.process_line = wrapped_process_line
-
-    @callback
-    def connection_fail_callback(data):
-        """Network failure callback."""
-        _LOGGER.error("Could not establish a connection with the AAP IP / Serial Module")
-        if not sync_connect.done():
-            sync_connect.set_result(False)
-
-    @callback
-    def connected_callback(data):
-        """Connected callback."""
-        _LOGGER.info("Connected to AAP IP / Serial Module")
-        if message_log_enabled and hasattr(controller, '_client') and controller._client:
-            _wrap_process_line(controller)
-        if not sync_connect.done():
-            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop_aapalarm)
-            sync_connect.set_result(True)
-
-    @callback
-    def zones_updated_callback(data):
-        """Handle zone updates."""
-        _LOGGER.debug("Zone update event received for zone: %s", data)
-        async_dispatcher_send(hass, SIGNAL_ZONE_UPDATE, data)
-
-    @callback
-    def areas_updated_callback(data):
-        """Handle area updates."""
-        _LOGGER.debug("Area update event received for area: %s", data)
-        async_dispatcher_send(hass, SIGNAL_AREA_UPDATE, data)
-
-    @callback
-    def system_updated_callback(data):
-        # Handle system updates.
-        _LOGGER.debug("System update event received: %s", data)
-        async_dispatcher_send(hass, SIGNAL_SYSTEM_UPDATE, data)
+    async_setup_services(hass)
 
-    @callback
-    def output_updated_callback(data):
-        """Handle output updates."""
-        _LOGGER.debug("Output update event received for output: %s", data)
-        async_dispatcher_send(hass, SIGNAL_OUTPUT_UPDATE, data)
+    _LOGGER.info("Setting up AAP Alarm Module integration via config entry")
 
-    @callback
-    def keypad_updated_callback(data):
-        """Handle keypad updates."""
-        _LOGGER.debug("Keypad update event received: %s", data)
-        async_dispatcher_send(hass, SIGNAL_KEYPAD_UPDATE, data)
+    # Options override the values captured by the config flow
+    conf = {**entry.data, **entry.options}
+    hub = AAPAlarmHub(hass, entry.entry_id, conf)
 
-    @callback
-    def stop_aapalarm(event):
-        """Shutdown AAP IP / Serial Module connection and thread on exit."""
-        _LOGGER.info("Shutting down AAP Alarm")
-        controller.stop()
-
-    controller.callback_zone_state_change = zones_updated_callback
-    controller.callback_area_state_change = areas_updated_callback
-    controller.callback_system_state_change = system_updated_callback
-    controller.callback_output_state_change = output_updated_callback
-    controller.callback_keypad_state_change = keypad_updated_callback
-
-    controller.callback_connected = connected_callback
-    controller.callback_login_timeout = connection_fail_callback
-
-    _LOGGER.info("Start AAP Alarm")
-    controller.start()
-
-    try:
-        result = await asyncio.wait_for(sync_connect, timeout=connection_timeout)
-    except asyncio.TimeoutError:
-        _LOGGER.error("Timed out connecting to AAP Alarm Module")
-        controller.stop()
-        raise ConfigEntryNotReady("Timed out connecting to AAP Alarm Module")
-    if not result:
+    # In the background mode the entities are set up right away and stay
+    # unavailable until the panel reports in
+    wait = not conf.get(CONF_BACKGROUND_CONNECT, DEFAULT_BACKGROUND_CONNECT)
+    if not await hub.async_start(wait=wait):
         raise ConfigEntryNotReady("Failed to connect to AAP Alarm Module")
 
-    # Store entry reference for platforms
-    hass.data[DOMAIN][f"{entry.entry_id}_entry"] = entry
+    hass.data[DOMAIN][entry.entry_id] = hub
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     # Forward setup to platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -435,28 +257,40 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Add newly configured devices in place, otherwise reload the entry."""
+    hub = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if hub is not None and hub.async_add_devices({**entry.data, **entry.options}):
+        return
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     # Unload platforms
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    
+
     if unload_ok and DOMAIN in hass.data and entry.entry_id in hass.data[DOMAIN]:
-        controller = hass.data[DOMAIN][entry.entry_id]
-        controller.stop()
-        del hass.data[DOMAIN][entry.entry_id]
-        # Clean up entry reference
-        if f"{entry.entry_id}_entry" in hass.data[DOMAIN]:
-            del hass.data[DOMAIN][f"{entry.entry_id}_entry"]
-    
+        hub = hass.data[DOMAIN].pop(entry.entry_id)
+        hub.async_stop()
+
     return unload_ok
 
 
-class AAPModuleDevice(Entity):
+class AAPModuleDevice(RestoreEntity):
     """Representation of an AAP IP / Serial Module."""
 
-    def __init__(self, entry: ConfigEntry, name, info, controller, area_number=None, area_name=None, device_type=None) -> None:
+    # Last (available, state, attributes) written to the state machine
+    _last_published = None
+    # Showing the state from before a restart until the panel reports it
+    _restored = False
+    _writes_emitted = 0
+    _writes_suppressed = 0
+
+    def __init__(self, entry: ConfigEntry, name, info, hub: AAPAlarmHub, area_number=None, area_name=None, device_type=None) -> None:
         """Initialize the device."""
-        self._controller = controller
+        self._hub = hub
+        self._controller = hub.controller
         self._info = info
         self._name = name
         self._entry = entry
@@ -497,6 +331,106 @@ class AAPModuleDevice(Entity):
             sw_version=_VERSION,
         )
 
+    @callback
+    def _async_subscribe(self, signal: str, key=None) -> None:
+        """Listen for this entry's updates addressed to key, plus refresh-all broadcasts."""
+        entry_id = self._hub.entry_id
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, format_signal(signal, entry_id), self._update_callback
+            )
+        )
+        if key is not None:
+            self.async_on_remove(
+                async_dispatcher_connect(
+                    self.hass, format_signal(signal, entry_id, key), self._update_callback
+                )
+            )
+
+    async def _async_restore_state(self, signal: str, key) -> bool:
+        """Show the last known state until the panel reports key on signal.
+
+        Quiet zones can take minutes to be reported after a restart; until
+        then the state saved at shutdown is shown, marked as restored.
+        Returns True if a state was restored.
+        """
+        if self._hub.is_confirmed(signal, key):
+            return False
+        last_state = await self.async_get_last_state()
+        if last_state is None or last_state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return False
+        info = self._info_from_restored(last_state)
+        if info is None:
+            return False
+        _LOGGER.debug("Restored %s: %s", self.entity_id, info)
+        self._info = info
+        self._restored = True
+        return True
+
+    def _info_from_restored(self, state):
+        """Return the controller style info for a restored state.
+
+        The status flags are taken from the restored attributes, falling back
+        to the controller's defaults. The info is a copy so the controller's
+        own state is never touched.
+        """
+        status = (self._info or {}).get("status", {})
+        return {"status": {flag: state.attributes.get(flag, value) for flag, value in status.items()}}
+
+    @callback
+    def _async_confirm(self, signal: str, key) -> bool:
+        """Return True once the panel has reported key, ending a restored state."""
+        if self._restored and self._hub.is_confirmed(signal, key):
+            self._restored = False
+        return not self._restored
+
+    def _has_panel_state(self) -> bool:
+        """Return True if there is panel state to show.
+
+        That is a restored state, or the controller's once the panel has
+        reported in.
+        """
+        if not (self._restored or self._hub.ready):
+            return False
+        return self._info is not None and "status" in self._info
+
+    def _status_attributes(self):
+        """Return the status flags as attributes, flagged if restored."""
+        if not self._info or "status" not in self._info:
+            return {}
+        if self._restored:
+            return {**self._info["status"], ATTR_RESTORED: True}
+        return self._info["status"]
+
+    def _state_snapshot(self):
+        """Return a compact copy of what a state write would publish."""
+        attributes = self.extra_state_attributes
+        return (self.available, self.state, dict(attributes) if attributes else None)
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state and remember what was published."""
+        self._last_published = self._state_snapshot()
+        super().async_write_ha_state()
+
+    @callback
+    def _async_write_if_changed(self) -> None:
+        """Write the state only if it differs from the last published state.
+
+        The panel re-sends identical status regularly; skipping those writes
+        keeps them out of the state machine and the recorder.
+        """
+        snapshot = self._state_snapshot()
+        if snapshot == self._last_published:
+            self._writes_suppressed += 1
+            self._hub.write_stats["suppressed"] += 1
+            return
+        self._writes_emitted += 1
+        self._hub.write_stats["emitted"] += 1
+        self._last_published = snapshot
+        super().async_write_ha_state()
+        self._hub.async_record_write()
+
     @property
     def device_info(self) -> DeviceInfo | None:
         """Return device information about this entity."""
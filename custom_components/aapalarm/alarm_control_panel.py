@@ -1,5 +1,6 @@
 """Support for AAP IP / Serial Module-based alarm control panel."""
 
+from collections.abc import Callable
 import logging
 
 import voluptuous as vol
@@ -18,24 +19,29 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import (
     AREA_SCHEMA,
     CONF_AREANAME,
+    CONF_AREAS,
     CONF_CODE,
     CONF_CODE_ARM_REQUIRED,
     CONF_CODE_PANIC_REQUIRED,
     DOMAIN as AAP_DOMAIN,
     SIGNAL_AREA_UPDATE,
+    SIGNAL_DEVICES_ADDED,
     SIGNAL_KEYPAD_UPDATE,
     AAPModuleDevice,
+    format_signal,
 )
+from .const import AREA_LETTER_TO_NUMBER, AREA_NUMBER_TO_LETTER
 
 _LOGGER = logging.getLogger(__name__)
 
 SERVICE_ALARM_KEYPRESS = "aap_alarm_keypress"
+DATA_AREA_DEVICES = "area_devices"
 ATTR_KEYPRESS = "keypress"
 
 # Valid keys on the AAP alarm keypad (excluding P/PROG for safety)
@@ -56,9 +62,56 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Perform the setup for AAP IP / Serial Module alarm panels."""
-    controller = hass.data[AAP_DOMAIN][entry.entry_id]
-    configured_areas = entry.data.get("areas", {})
+    hub = hass.data[AAP_DOMAIN][entry.entry_id]
+    devices = _area_entities(hass, entry, hub, entry.data.get(CONF_AREAS, {}))
+    async_add_entities(devices)
+
+    # Track areas per entry so the service reaches every panel, not just the last one set up
+    area_devices = hass.data[AAP_DOMAIN].setdefault(DATA_AREA_DEVICES, {})
+    area_devices[entry.entry_id] = devices
+    entry.async_on_unload(lambda: area_devices.pop(entry.entry_id, None))
+
+    @callback
+    def alarm_keypress_handler(service):
+        """Map services to methods on Alarm."""
+        entity_ids = service.data.get(ATTR_ENTITY_ID)
+        keypress = service.data.get(ATTR_KEYPRESS)
+
+        target_devices = [
+            device
+            for entry_devices in area_devices.values()
+            for device in entry_devices
+            if device.entity_id in entity_ids
+        ]
+
+        for device in target_devices:
+            device.async_alarm_keypress(keypress)
 
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ALARM_KEYPRESS,
+        alarm_keypress_handler,
+        schema=ALARM_KEYPRESS_SCHEMA,
+    )
+
+    @callback
+    def async_add_areas(section, areas):
+        """Add the entities of areas configured after setup."""
+        if section == CONF_AREAS:
+            new_devices = _area_entities(hass, entry, hub, areas)
+            devices.extend(new_devices)
+            async_add_entities(new_devices)
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, format_signal(SIGNAL_DEVICES_ADDED, entry.entry_id), async_add_areas
+        )
+    )
+
+
+def _area_entities(hass: HomeAssistant, entry: ConfigEntry, hub, configured_areas) -> list:
+    """Create the alarm panels of the given areas."""
+    controller = hub.controller
     devices = []
     for part_num in configured_areas:
         device_config_data = AREA_SCHEMA(configured_areas[part_num])
@@ -66,7 +119,7 @@ async def async_setup_entry(
         
         # Get area state, fallback to empty dict if not available
         # Try letter key first (controller uses 'A'/'B'), then integer, then string
-        area_letter = {1: 'A', 2: 'B'}.get(part_num)
+        area_letter = AREA_NUMBER_TO_LETTER.get(part_num)
         area_state = getattr(controller, 'area_state', {})
         default_info = {
             "status": {
@@ -94,33 +147,10 @@ async def async_setup_entry(
             device_config_data[CONF_CODE_ARM_REQUIRED],
             device_config_data.get(CONF_CODE_PANIC_REQUIRED, True),
             area_info,
-            controller,
+            hub,
         )
         devices.append(device)
-
-    async_add_entities(devices)
-
-    @callback
-    def alarm_keypress_handler(service):
-        """Map services to methods on Alarm."""
-        entity_ids = service.data.get(ATTR_ENTITY_ID)
-        keypress = service.data.get(ATTR_KEYPRESS)
-
-        target_devices = [
-            device for device in devices if device.entity_id in entity_ids
-        ]
-
-        for device in target_devices:
-            device.async_alarm_keypress(keypress)
-
-    hass.services.async_register(
-        DOMAIN,
-        SERVICE_ALARM_KEYPRESS,
-        alarm_keypress_handler,
-        schema=ALARM_KEYPRESS_SCHEMA,
-    )
-
-    return True
+    return devices
 
 
 class AAPModuleAlarm(AAPModuleDevice, AlarmControlPanelEntity):
@@ -136,7 +166,7 @@ class AAPModuleAlarm(AAPModuleDevice, AlarmControlPanelEntity):
         code_arm_required,
         code_panic_required,
         info,
-        controller,
+        hub,
     ) -> None:
         """Initialize the alarm panel."""
         self._area_number = area_number  # Keep original area number for comparison
@@ -145,65 +175,62 @@ class AAPModuleAlarm(AAPModuleDevice, AlarmControlPanelEntity):
         self._code_panic_required = code_panic_required
 
         _LOGGER.debug("Setting up alarm: %s for area number: %s", alarm_name, area_number)
-        super().__init__(entry, alarm_name, info, controller, area_number, alarm_name, "areas")
+        super().__init__(entry, alarm_name, info, hub, area_number, alarm_name, "areas")
 
     async def async_added_to_hass(self):
         """Register callbacks."""
-        self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_KEYPAD_UPDATE, self._update_callback)
-        )
-        self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_AREA_UPDATE, self._update_callback)
-        )
-        
-        # Force an initial state update
-        _LOGGER.debug("Alarm panel added to hass, forcing initial state update for area %s", self._area_number)
-        self.async_schedule_update_ha_state()
+        self._async_subscribe(SIGNAL_KEYPAD_UPDATE, self._area_number)
+        self._async_subscribe(SIGNAL_AREA_UPDATE, self._area_number)
+        await self._async_restore_state(SIGNAL_AREA_UPDATE, self._area_number)
+        _LOGGER.debug("Alarm panel added to hass for area %s", self._area_number)
 
     # Mapping between area letters (from controller) and area numbers (from config)
-    AREA_LETTER_TO_NUMBER = {'A': 1, 'B': 2}
-    AREA_NUMBER_TO_LETTER = {1: 'A', 2: 'B'}
+    AREA_LETTER_TO_NUMBER = AREA_LETTER_TO_NUMBER
+    AREA_NUMBER_TO_LETTER = AREA_NUMBER_TO_LETTER
 
     @callback
     def _update_callback(self, area):
-        """Update Home Assistant state, if needed."""
-        _LOGGER.debug("Area update callback called for area %s, target area: %s", area, self._area_number)
-        
-        try:
-            # Determine if this callback is for our area
-            if area is None:
-                should_update = True
-            else:
-                # Normalize the incoming area identifier to an integer for comparison
-                if isinstance(area, str) and area in self.AREA_LETTER_TO_NUMBER:
-                    incoming_area_num = self.AREA_LETTER_TO_NUMBER[area]
-                else:
-                    try:
-                        incoming_area_num = int(area)
-                    except (ValueError, TypeError):
-                        incoming_area_num = None
-                should_update = incoming_area_num == self._area_number
-            
-            if should_update:
-                # Try multiple key formats since the controller may use letters or integers
-                area_letter = self.AREA_NUMBER_TO_LETTER.get(self._area_number)
-                area_state = getattr(self._controller, 'area_state', {})
-                if area_letter and area_letter in area_state:
-                    self._info = area_state[area_letter]
-                    _LOGGER.debug("Updated area %s state (letter key)", self._area_number)
-                elif self._area_number in area_state:
-                    self._info = area_state[self._area_number]
-                    _LOGGER.debug("Updated area %s state (int key)", self._area_number)
-                elif str(self._area_number) in area_state:
-                    self._info = area_state[str(self._area_number)]
-                    _LOGGER.debug("Updated area %s state (str key)", self._area_number)
-                else:
-                    _LOGGER.warning("No area state data available for area %s (tried keys: %s, %s, %s)", self._area_number, area_letter, self._area_number, str(self._area_number))
-                
-                _LOGGER.debug("Scheduling state update for area %s", self._area_number)
-                self.async_schedule_update_ha_state()
-        except (ValueError, TypeError) as e:
-            _LOGGER.error("Error processing area update callback for area %s: %s", self._area_number, e)
+        """Update Home Assistant state.
+
+        Only called for this area, or with None when every area should refresh.
+        """
+        _LOGGER.debug("Area update callback called for area %s", self._area_number)
+        if not self._async_confirm(SIGNAL_AREA_UPDATE, self._area_number):
+            return
+
+        info = self._controller_area_info()
+        if info is not None:
+            self._info = info
+            _LOGGER.debug("Updated area %s state", self._area_number)
+        else:
+            area_letter = self.AREA_NUMBER_TO_LETTER.get(self._area_number)
+            _LOGGER.warning("No area state data available for area %s (tried keys: %s, %s, %s)", self._area_number, area_letter, self._area_number, str(self._area_number))
+
+        _LOGGER.debug("Scheduling state update for area %s", self._area_number)
+        self._async_write_if_changed()
+
+    def _controller_area_info(self):
+        """Return this area's info from the controller, or None."""
+        # Try multiple key formats since the controller may use letters or integers
+        area_letter = self.AREA_NUMBER_TO_LETTER.get(self._area_number)
+        area_state = getattr(self._controller, 'area_state', {})
+        for key in (area_letter, self._area_number, str(self._area_number)):
+            if key is not None and key in area_state:
+                return area_state[key]
+        return None
+
+    def _area_flag(self, *flags) -> Callable[[], bool]:
+        """Return a check that any of flags is set in the controller's area status."""
+        def check():
+            status = (self._controller_area_info() or {}).get("status", {})
+            return any(status.get(flag, False) for flag in flags)
+        return check
+
+    async def _async_area_command(self, name, confirmed, action, *args):
+        """Send an area command and wait until the panel reports its effect."""
+        await self._hub.async_send_confirmed(
+            name, SIGNAL_AREA_UPDATE, self._area_number, confirmed, action, *args
+        )
 
     # """Required to show up Keypad on alarm panel"""
 
@@ -252,22 +279,26 @@ class AAPModuleAlarm(AAPModuleDevice, AlarmControlPanelEntity):
     @property
     def available(self):
         """Return if entity is available."""
-        return self._info is not None and "status" in self._info
+        return self._has_panel_state()
 
     async def async_alarm_disarm(self, code=None):
         """Send disarm command."""
-        # During exit delay, allow disarm without code
-        if self.alarm_state == AlarmControlPanelState.PENDING:
-            self._controller.disarm(str(self._code))
+        # During exit delay, allow disarm without code. Only the panel's own
+        # report counts: a state restored from before a restart never does
+        disarmed = self._area_flag("disarmed")
+        if self._hub.is_confirmed(SIGNAL_AREA_UPDATE, self._area_number) and self._area_flag(
+            "exit_delay", "stay_exit_delay"
+        )():
+            await self._async_area_command("disarm", disarmed, self._controller.disarm, str(self._code))
             return
         # When armed, require valid code
         if not self._code:
-            self._controller.disarm("")
+            await self._async_area_command("disarm", disarmed, self._controller.disarm, "")
             return
         if code is None or str(code) != str(self._code):
             _LOGGER.warning("Invalid code provided for disarm on area %s", self._area_number)
             return
-        self._controller.disarm(str(self._code))
+        await self._async_area_command("disarm", disarmed, self._controller.disarm, str(self._code))
 
     async def async_alarm_arm_home(self, code=None):
         """Send arm home command."""
@@ -275,7 +306,12 @@ class AAPModuleAlarm(AAPModuleDevice, AlarmControlPanelEntity):
             if code is None or str(code) != str(self._code):
                 _LOGGER.warning("Invalid code provided for arm home on area %s", self._area_number)
                 return
-        self._controller.arm_stay()
+        # The panel confirms arming by starting the exit delay
+        await self._async_area_command(
+            "arm_stay",
+            self._area_flag("stay_armed", "stay_exit_delay"),
+            self._controller.arm_stay,
+        )
 
     async def async_alarm_arm_away(self, code=None):
         """Send arm away command."""
@@ -283,7 +319,11 @@ class AAPModuleAlarm(AAPModuleDevice, AlarmControlPanelEntity):
             if code is None or str(code) != str(self._code):
                 _LOGGER.warning("Invalid code provided for arm away on area %s", self._area_number)
                 return
-        self._controller.arm_away()
+        await self._async_area_command(
+            "arm_away",
+            self._area_flag("armed", "exit_delay"),
+            self._controller.arm_away,
+        )
 
     async def async_alarm_trigger(self, code=None):
         """Alarm trigger command. Will be used to trigger a panic alarm."""
@@ -296,9 +336,7 @@ class AAPModuleAlarm(AAPModuleDevice, AlarmControlPanelEntity):
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
-        if self._info and "status" in self._info:
-            return self._info["status"]
-        return {}
+        return self._status_attributes()
 
     @callback
     def async_alarm_keypress(self, keypress=None):
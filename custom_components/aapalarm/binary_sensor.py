@@ -4,17 +4,21 @@ import logging
 
 from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_ON
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import (
     CONF_ZONENAME,
+    CONF_ZONES,
     CONF_ZONETYPE,
     DOMAIN,
+    SIGNAL_DEVICES_ADDED,
     SIGNAL_ZONE_UPDATE,
     ZONE_SCHEMA,
     AAPModuleDevice,
+    format_signal,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -26,15 +30,31 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the AAP binary sensor devices from a config entry."""
-    controller = hass.data[DOMAIN][entry.entry_id]
-    configured_zones = entry.data.get("zones", {})
+    hub = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_zones(section, zones):
+        """Add the entities of zones configured after setup."""
+        if section == CONF_ZONES:
+            async_add_entities(_zone_entities(hass, entry, hub, zones))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, format_signal(SIGNAL_DEVICES_ADDED, entry.entry_id), async_add_zones
+        )
+    )
+    async_add_entities(_zone_entities(hass, entry, hub, entry.data.get(CONF_ZONES, {})))
 
+
+def _zone_entities(hass: HomeAssistant, entry: ConfigEntry, hub, configured_zones) -> list:
+    """Create the binary sensors of the given zones."""
+    controller = hub.controller
     devices = []
     for zone_num in configured_zones:
         device_config_data = ZONE_SCHEMA(configured_zones[zone_num])
         
         # Get zone state, fallback to empty dict if not available
-        zone_info = getattr(controller, 'zone_state', {}).get(zone_num, {"status": {"open": False}})
+        zone_info = getattr(controller, 'zone_state', {}).get(int(zone_num), {"status": {"open": False}})
         
         device = AAPModuleBinarySensor(
             hass,
@@ -43,39 +63,38 @@ async def async_setup_entry(
             device_config_data[CONF_ZONENAME],
             device_config_data[CONF_ZONETYPE],
             zone_info,
-            controller,
+            hub,
         )
         devices.append(device)
-
-    async_add_entities(devices)
+    return devices
 
 
 class AAPModuleBinarySensor(AAPModuleDevice, BinarySensorEntity):
     """Representation of an AAP IP / Serial Module binary sensor."""
 
     def __init__(
-        self, hass: HomeAssistant, entry: ConfigEntry, zone_number, zone_name, zone_type, info, controller
+        self, hass: HomeAssistant, entry: ConfigEntry, zone_number, zone_name, zone_type, info, hub
     ) -> None:
         """Initialize the binary_sensor."""
         self._zone_type = zone_type
-        self._zone_number = zone_number
+        self._zone_number = int(zone_number)  # JSON deserializes dict keys as strings
         self._entry = entry
 
         _LOGGER.debug("Setting up zone: %s", zone_name)
-        super().__init__(entry, zone_name, info, controller, None, None, "zones")
+        super().__init__(entry, zone_name, info, hub, None, None, "zones")
 
     async def async_added_to_hass(self):
         """Register callbacks."""
         _LOGGER.debug("Adding zone %s (%s) to Home Assistant", self._zone_number, self._name)
-        self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_ZONE_UPDATE, self._update_callback)
-        )
-        
-        # Force an initial state update
+        self._async_subscribe(SIGNAL_ZONE_UPDATE, self._zone_number)
+
+        if await self._async_restore_state(SIGNAL_ZONE_UPDATE, self._zone_number):
+            return
+
+        # Pick up the latest state; Home Assistant writes it once we return
         if hasattr(self._controller, 'zone_state') and self._zone_number in self._controller.zone_state:
             self._info = self._controller.zone_state[self._zone_number]
             _LOGGER.debug("Initial zone %s state: %s", self._zone_number, self._info)
-            self.async_schedule_update_ha_state()
 
     @property
     def is_on(self):
@@ -87,7 +106,7 @@ class AAPModuleBinarySensor(AAPModuleDevice, BinarySensorEntity):
     @property
     def available(self):
         """Return if entity is available."""
-        return self._info is not None and "status" in self._info
+        return self._has_panel_state()
 
     @property
     def device_class(self):
@@ -97,27 +116,27 @@ class AAPModuleBinarySensor(AAPModuleDevice, BinarySensorEntity):
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
-        if self._info and "status" in self._info:
-            return self._info["status"]
-        return {}
+        return self._status_attributes()
+
+    def _info_from_restored(self, state):
+        """Return the zone info for a restored state."""
+        info = super()._info_from_restored(state)
+        info["status"]["open"] = state.state == STATE_ON
+        return info
 
     @callback
     def _update_callback(self, zone):
-        """Update the zone's state, if needed."""
-        _LOGGER.debug("Zone update callback triggered for zone %s, target zone %s", zone, self._zone_number)
-        
-        # Handle different data types for zone comparison - zone comes as string from controller
-        try:
-            # Convert both to int for comparison, or if zone is None, update all
-            if zone is None or int(zone) == int(self._zone_number):
-                # Update the zone info from the controller using integer key
-                zone_key = int(self._zone_number)  # Ensure we use integer key
-                if hasattr(self._controller, 'zone_state') and zone_key in self._controller.zone_state:
-                    self._info = self._controller.zone_state[zone_key]
-                    _LOGGER.debug("Updated zone %s state", self._zone_number)
-                else:
-                    _LOGGER.warning("No zone state data available for zone %s", self._zone_number)
-                
-                self.async_schedule_update_ha_state()
-        except (ValueError, TypeError) as e:
-            _LOGGER.error("Error processing zone update callback for zone %s: %s", self._zone_number, e)
\ No newline at end of file
+        """Update the zone's state.
+
+        Only called for this zone, or with None when every zone should refresh.
+        """
+        _LOGGER.debug("Zone update callback triggered for zone %s", self._zone_number)
+        if not self._async_confirm(SIGNAL_ZONE_UPDATE, self._zone_number):
+            return
+        if hasattr(self._controller, 'zone_state') and self._zone_number in self._controller.zone_state:
+            self._info = self._controller.zone_state[self._zone_number]
+            _LOGGER.debug("Updated zone %s state", self._zone_number)
+        else:
+            _LOGGER.warning("No zone state data available for zone %s", self._zone_number)
+
+        self._async_write_if_changed()
@@ -0,0 +1,157 @@
+"""Persistent capture of the raw AAP IP / Serial Module stream to disk."""
+
+import logging
+import os
+import time
+from pathlib import Path
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+CAPTURE_FILE = "capture.log"
+CAPTURE_ROTATED_GLOB = "capture-*.log"
+CAPTURE_SEGMENTS = 5  # the size limit is shared by this many files
+CAPTURE_FLUSH_INTERVAL = 1.0  # seconds
+CAPTURE_FLUSH_LINES = 1000
+CAPTURE_MAX_PENDING = 100000  # lines held in memory while the disk is slow
+
+
+def format_capture_line(timestamp: float, raw_line: str) -> str:
+    """Return the on-disk form of a captured line."""
+    return f"{timestamp:.3f}\t{raw_line}\n"
+
+
+def parse_capture_line(text: str) -> tuple[float, str] | None:
+    """Parse a line written by format_capture_line, or None if it is not one."""
+    stamp, sep, raw_line = text.rstrip("\r\n").partition("\t")
+    if not sep:
+        return None
+    try:
+        return float(stamp), raw_line
+    except ValueError:
+        return None
+
+
+class StreamCapture:
+    """Append every raw line to a rotating log file without blocking the loop.
+
+    Lines are buffered in memory with their wall-clock time and written in
+    batches by a single executor job at a time, at most once per
+    CAPTURE_FLUSH_INTERVAL or sooner when CAPTURE_FLUSH_LINES are waiting.
+    The current file is rotated once it reaches its share of max_bytes and
+    rotated files are removed when they are older than max_age or the
+    capture would exceed max_bytes in total (give or take the last batch).
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, directory: Path, max_bytes: int, max_age: float
+    ) -> None:
+        """Initialize the capture writing to directory."""
+        self._hass = hass
+        self.directory = directory
+        self.path = directory / CAPTURE_FILE
+        self._max_bytes = max_bytes
+        self._segment_bytes = max(1, max_bytes // CAPTURE_SEGMENTS)
+        self._max_age = max_age
+        self._pending: list[tuple[float, str]] = []
+        self._writing = False
+        self._closed = False
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self.lines_written = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self.rotations = 0
+
+    @callback
+    def append(self, raw_line: str) -> None:
+        """Queue a raw line for writing."""
+        if self._closed:
+            return
+        if len(self._pending) >= CAPTURE_MAX_PENDING:
+            self.dropped += 1
+            return
+        self._pending.append((time.time(), raw_line))
+        if len(self._pending) >= CAPTURE_FLUSH_LINES:
+            self.async_flush()
+        elif self._unsub_flush is None and not self._writing:
+            self._unsub_flush = self._hass.loop.call_later(
+                CAPTURE_FLUSH_INTERVAL, self.async_flush
+            ).cancel
+
+    @callback
+    def async_flush(self) -> None:
+        """Hand the pending lines to the executor, unless a write is running."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if self._writing or not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._writing = True
+        future = self._hass.async_add_executor_job(self._write, batch)
+        future.add_done_callback(self._write_done)
+
+    @callback
+    def _write_done(self, future) -> None:
+        """Pick up lines that arrived while the previous batch was written."""
+        self._writing = False
+        if not future.cancelled() and (err := future.exception()) is not None:
+            _LOGGER.error("Failed to write raw stream capture to %s: %s", self.path, err)
+        if self._pending:
+            self.async_flush()
+
+    @callback
+    def async_close(self) -> None:
+        """Stop capturing; lines already queued are still written."""
+        self._closed = True
+        self.async_flush()
+
+    def _write(self, batch: list[tuple[float, str]]) -> None:
+        """Append a batch to the capture file and rotate it if needed."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = "".join(format_capture_line(stamp, raw) for stamp, raw in batch)
+        with self.path.open("a", encoding="ascii", errors="replace") as capture:
+            capture.write(data)
+            size = capture.tell()
+        self.lines_written += len(batch)
+        self.bytes_written += len(data)
+        if size >= self._segment_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        """Move the current file aside and enforce the size and age limits."""
+        rotated = self.directory / time.strftime("capture-%Y%m%dT%H%M%S.log")
+        suffix = 1
+        while rotated.exists():
+            rotated = self.directory / time.strftime(f"capture-%Y%m%dT%H%M%S-{suffix}.log")
+            suffix += 1
+        os.replace(self.path, rotated)
+        self.rotations += 1
+        self.prune()
+
+    def prune(self) -> None:
+        """Remove rotated files beyond the age and total size limits."""
+        if not self.directory.is_dir():
+            return
+        now = time.time()
+        rotated = []
+        for path in self.directory.glob(CAPTURE_ROTATED_GLOB):
+            stat = path.stat()
+            if now - stat.st_mtime > self._max_age:
+                path.unlink(missing_ok=True)
+            else:
+                rotated.append((stat.st_mtime, stat.st_size, path))
+
+        # Leave a segment for the current file; drop the oldest until the rest fits
+        total = sum(size for _, size, _ in rotated)
+        for _, size, path in sorted(rotated):
+            if total <= self._max_bytes - self._segment_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def files(self) -> list[Path]:
+        """Return the capture files, oldest first."""
+        rotated = sorted(self.directory.glob(CAPTURE_ROTATED_GLOB))
+        return [*rotated, self.path] if self.path.exists() else rotated
@@ -0,0 +1,99 @@
+"""Coalescing of AAP IP / Serial Module updates into one dispatch pass per tick."""
+
+import logging
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .stats import RollingLatency
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class UpdateCoalescer:
+    """Collect dirty keys from controller callbacks and dispatch them in batches.
+
+    The panel sends many lines in quick succession when an area arms or during
+    a walk test. Rather than dispatching (and writing state) for every line,
+    keys are collected and flushed once per event loop iteration, or after a
+    small window if one is configured. Repeated updates to the same key within
+    a batch are delivered once.
+    """
+
+    def __init__(self, hass: HomeAssistant, dispatch, window: float = 0) -> None:
+        """Initialize the coalescer.
+
+        dispatch is called as dispatch(signal, key, received) for every flushed
+        key, where received is the perf_counter time the oldest line behind the
+        update arrived (None if unknown).
+        """
+        self._hass = hass
+        self._dispatch = dispatch
+        self._window = window
+        self._dirty: dict[str, dict] = {}
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self.marked = 0
+        self.dispatched = 0
+        self.flushes = 0
+        # Time spent dispatching (and thereby writing state) per flush
+        self.flush_time = RollingLatency()
+
+    @callback
+    def async_mark(self, signal: str, key, immediate: bool = False, received: float | None = None) -> None:
+        """Mark key as dirty on signal.
+
+        With immediate=True the key is dispatched straight away, which is used
+        for alarm transitions that must never wait for the next flush.
+        """
+        self.marked += 1
+        if immediate:
+            keys = self._dirty.get(signal)
+            if keys is not None:
+                earlier = keys.pop(key, None)
+                if earlier is not None:
+                    received = earlier
+            self.dispatched += 1
+            self._dispatch(signal, key, received)
+            return
+
+        keys = self._dirty.setdefault(signal, {})
+        if keys.get(key) is None:
+            # Keep the time of the oldest line waiting on this key
+            keys[key] = received
+        if self._unsub_flush is None:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Arrange for the pending keys to be flushed."""
+        if self._window > 0:
+            handle = self._hass.loop.call_later(self._window, self.async_flush)
+        else:
+            handle = self._hass.loop.call_soon(self.async_flush)
+        self._unsub_flush = handle.cancel
+
+    @callback
+    def async_flush(self) -> None:
+        """Dispatch every pending key once."""
+        self._unsub_flush = None
+        pending, self._dirty = self._dirty, {}
+        if not pending:
+            return
+        self.flushes += 1
+        started = time.perf_counter()
+        for signal, keys in pending.items():
+            if None in keys:
+                # A refresh-all supersedes the individual keys
+                stamps = [stamp for stamp in keys.values() if stamp is not None]
+                keys = {None: min(stamps, default=None)}
+            for key, received in keys.items():
+                self.dispatched += 1
+                self._dispatch(signal, key, received)
+        self.flush_time.add(time.perf_counter() - started)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop pending keys and cancel any scheduled flush."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        self._dirty.clear()
@@ -0,0 +1,190 @@
+"""Prioritised, paced queue for commands sent to an AAP IP / Serial Module."""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from homeassistant.core import HomeAssistant, callback
+
+from .stats import RollingLatency
+
+_LOGGER = logging.getLogger(__name__)
+
+COMMAND_INTERVAL = 0.25  # minimum seconds between two commands to the module
+
+# Lower values are sent first
+PRIORITY_ALARM = 0  # disarm and panic
+PRIORITY_ARM = 1
+PRIORITY_NORMAL = 2  # outputs and keypresses
+
+# How a command combines with an identical one that is still queued
+MERGE_NONE = "none"  # both are sent (keypresses)
+MERGE_DROP = "drop"  # the new one is dropped (arm, disarm, panic)
+MERGE_TOGGLE = "toggle"  # the two cancel out (output toggles)
+
+
+@dataclass(order=True)
+class QueuedCommand:
+    """A command waiting to be sent."""
+
+    priority: int
+    sequence: int
+    name: str = field(compare=False)
+    key: tuple | None = field(compare=False)
+    action: Callable[[], None] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    queued: float = field(compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class CommandQueue:
+    """Serialise commands to the module, most urgent first, at a safe pace.
+
+    Entities and automations can issue commands concurrently; each one is
+    queued and a single worker sends them one at a time, at most one per
+    COMMAND_INTERVAL. Disarm and panic jump ahead of arming, which jumps
+    ahead of output toggles and keypresses. Identical commands that are
+    still waiting are merged as their merge mode says.
+    """
+
+    def __init__(self, hass: HomeAssistant, interval: float = COMMAND_INTERVAL) -> None:
+        """Initialize an empty queue."""
+        self._hass = hass
+        self._interval = interval
+        self._heap: list[QueuedCommand] = []
+        self._waiting: dict[tuple, QueuedCommand] = {}
+        self._sequence = itertools.count()
+        self._worker: asyncio.Task | None = None
+        self._last_sent = 0.0
+        self._stopped = False
+        self.sent = 0
+        self.merged = 0
+        self.failed = 0
+        self.max_depth = 0
+        # Time from being queued to being sent
+        self.wait_time = RollingLatency()
+
+    @property
+    def depth(self) -> int:
+        """Return the number of commands waiting."""
+        return sum(1 for command in self._heap if not command.cancelled)
+
+    @callback
+    def async_submit(
+        self,
+        priority: int,
+        name: str,
+        action: Callable,
+        *args,
+        merge: str = MERGE_NONE,
+    ) -> asyncio.Future:
+        """Queue action(*args) and return a future that resolves once it is sent.
+
+        The future's result is True if the command was written to the module,
+        False if it failed, was merged away or the queue was stopped.
+        """
+        loop = self._hass.loop
+        key = (name, *args) if merge != MERGE_NONE else None
+        if self._stopped:
+            future = loop.create_future()
+            future.set_result(False)
+            return future
+
+        earlier = self._waiting.get(key) if key is not None else None
+        if earlier is not None:
+            self.merged += 1
+            if merge == MERGE_DROP:
+                _LOGGER.debug("Dropping %s, it is already queued", name)
+                return earlier.future
+            # Two toggles of the same output cancel out
+            _LOGGER.debug("Dropping %s together with the queued one, they cancel out", name)
+            earlier.cancelled = True
+            del self._waiting[key]
+            earlier.future.set_result(False)
+            future = loop.create_future()
+            future.set_result(False)
+            return future
+
+        command = QueuedCommand(
+            priority,
+            next(self._sequence),
+            name,
+            key,
+            lambda: action(*args),
+            loop.create_future(),
+            time.perf_counter(),
+        )
+        heapq.heappush(self._heap, command)
+        if key is not None:
+            self._waiting[key] = command
+        self.max_depth = max(self.max_depth, self.depth)
+        if self._worker is None:
+            self._worker = self._hass.async_create_background_task(
+                self._async_run(), "aapalarm command queue"
+            )
+        return command.future
+
+    async def _async_run(self) -> None:
+        """Send queued commands until the queue is empty."""
+        try:
+            while self._heap:
+                if self._heap[0].cancelled:
+                    heapq.heappop(self._heap)
+                    continue
+                # Wait before picking the next command, so that anything more
+                # urgent queued in the meantime still goes first
+                delay = self._last_sent + self._interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                command = heapq.heappop(self._heap)
+                if command.key is not None:
+                    self._waiting.pop(command.key, None)
+                self._send(command)
+        finally:
+            self._worker = None
+
+    def _send(self, command: QueuedCommand) -> None:
+        """Write one command to the module."""
+        now = time.perf_counter()
+        self.wait_time.add(now - command.queued)
+        self._last_sent = now
+        try:
+            command.action()
+        except Exception:
+            self.failed += 1
+            _LOGGER.exception("Failed to send command %s", command.name)
+            result = False
+        else:
+            self.sent += 1
+            result = True
+        if not command.future.done():
+            command.future.set_result(result)
+
+    @callback
+    def async_stop(self) -> None:
+        """Drop everything still queued."""
+        self._stopped = True
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for command in self._heap:
+            if not command.future.done():
+                command.future.set_result(False)
+        self._heap.clear()
+        self._waiting.clear()
+
+    def summary(self) -> dict:
+        """Return the queue statistics."""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "merged": self.merged,
+            "failed": self.failed,
+            "wait_time": self.wait_time.summary(),
+        }
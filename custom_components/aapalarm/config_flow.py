@@ -3,13 +3,24 @@ Config flow for ArrowHead Alarm System integration (aapalarm).
 """
 
 import asyncio
+import ipaddress
 import re
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.components.network import async_get_source_ip
 from homeassistant.core import callback
 from homeassistant.const import CONF_HOST, CONF_TIMEOUT
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.exceptions import HomeAssistantError
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.selector import (
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
+    TextSelector,
+    TextSelectorConfig,
+)
 import logging
 
 from .const import (
@@ -17,18 +28,65 @@ from .const import (
     DEFAULT_PORT, 
     DEFAULT_KEEPALIVE, 
     DEFAULT_TIMEOUT,
+    DEFAULT_ZONETYPE,
+    DEFAULT_BACKGROUND_CONNECT,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_DISCOVERY_TIME,
+    DEFAULT_CAPTURE_ENABLED,
+    DEFAULT_CAPTURE_MAX_AGE,
+    DEFAULT_CAPTURE_MAX_SIZE,
     DEFAULT_MESSAGE_LOG_ENABLED,
+    DEFAULT_MESSAGE_LOG_REFRESH,
+    DEFAULT_MESSAGE_LOG_SIZE,
+    CONF_BACKGROUND_CONNECT,
+    CONF_CAPTURE_ENABLED,
+    CONF_CAPTURE_MAX_AGE,
+    CONF_CAPTURE_MAX_SIZE,
+    CONF_COMMAND_TIMEOUT,
     CONF_CONNECTIONTYPE,
     CONF_KEEPALIVE,
     CONF_MESSAGE_LOG_ENABLED,
+    CONF_MESSAGE_LOG_REFRESH,
+    CONF_MESSAGE_LOG_SIZE,
     CONF_PORT,
     CONF_ZONES,
     CONF_AREAS,
     CONF_OUTPUTS,
+    MAX_AREAS,
+    MAX_OUTPUTS,
+    MAX_ZONES,
+    ZONE_TYPES,
+)
+from .device_table import (
+    DeviceTableError,
+    format_device_table,
+    keep_area_codes,
+    parse_device_table,
+)
+from .probe import (
+    HANDSHAKE_TIMEOUT,
+    CannotConnect,
+    NotAModule,
+    ProbeResult,
+    SerialCandidate,
+    async_handshake,
+    async_scan_network,
+    list_serial_ports,
+    probe_serial,
+    serial_ports_in_use,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+SERIAL_PORT_PATTERN = r'^(/dev/(tty|serial/by-(id|path)/)[A-Za-z0-9/_.:+-]+|COM\d+)$'
+
+
+def _serial_label(candidate: SerialCandidate) -> str:
+    """Return how a serial device is shown in the port list."""
+    if candidate.is_module:
+        return f"{candidate.device} - AAP module ({candidate.round_trip * 1000:.0f} ms)"
+    return f"{candidate.device} - {candidate.description}"
+
 class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for ArrowHead Alarm System."""
 
@@ -41,6 +99,12 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._areas_data = {}
         self._outputs_data = {}
         self._reconfigure = False
+        self._scan_results: list[ProbeResult] = []
+        # Modules that have answered in this flow, by (host, port)
+        self._validated: dict[tuple[str, int], ProbeResult] = {}
+        self._round_trip: float | None = None
+        self._serial_ports: list[SerialCandidate] | None = None
+        self._serial_in_use: dict[str, str] = {}
 
     @staticmethod
     @callback
@@ -115,19 +179,18 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle IP connection configuration."""
         errors = {}
         
-        if user_input is not None:
-            # Test TCP connection before proceeding
-            host = user_input[CONF_HOST]
-            port = int(user_input[CONF_PORT])
-            try:
-                reader, writer = await asyncio.wait_for(
-                    asyncio.open_connection(host, port), timeout=5
-                )
-                writer.close()
-                await writer.wait_closed()
-            except (asyncio.TimeoutError, OSError):
-                errors["base"] = "cannot_connect"
+        if user_input is not None and user_input.pop("scan_network", False):
+            # Keep the other settings and look for the module instead
+            self._connection_data.update(user_input)
+            return await self.async_step_ip_scan()
 
+        if user_input is not None:
+            # Ask the module for its status before proceeding, so that a wrong
+            # host or a different device on the port is caught here rather
+            # than by a connect timeout when the entry is set up
+            errors = await self._async_check_ip_module(
+                user_input[CONF_HOST], int(user_input[CONF_PORT])
+            )
             if not errors:
                 # Merge IP connection data with existing data
                 self._connection_data.update(user_input)
@@ -146,6 +209,7 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Optional(CONF_KEEPALIVE, default=keepalive): vol.All(vol.Coerce(int), vol.Range(min=15)),
             vol.Optional(CONF_TIMEOUT, default=timeout): vol.Coerce(int),
             vol.Optional(CONF_MESSAGE_LOG_ENABLED, default=message_log): bool,
+            vol.Optional("scan_network", default=False): bool,
         })
         
         return self.async_show_form(
@@ -157,29 +221,174 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
 
+    async def async_step_ip_scan(self, user_input=None) -> FlowResult:
+        """Look for modules on a network."""
+        errors = {}
+        port = int(self._connection_data.get(CONF_PORT, DEFAULT_PORT))
+
+        if user_input is not None:
+            network = user_input["network"]
+            try:
+                self._scan_results = await async_scan_network(network, port)
+                for result in self._scan_results:
+                    self._validated[(result.host, result.port)] = result
+            except ValueError:
+                errors["network"] = "invalid_network"
+            else:
+                if self._scan_results:
+                    return await self.async_step_ip_scan_results()
+                errors["base"] = "no_modules_found"
+        else:
+            try:
+                source_ip = await async_get_source_ip(self.hass)
+                network = str(ipaddress.ip_network(f"{source_ip}/24", strict=False))
+            except (HomeAssistantError, ValueError):
+                network = "192.168.1.0/24"
+
+        data_schema = vol.Schema({
+            vol.Required("network", default=network): cv.string,
+        })
+
+        return self.async_show_form(
+            step_id="ip_scan",
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders={"port": str(port)},
+        )
+
+    async def async_step_ip_scan_results(self, user_input=None) -> FlowResult:
+        """Pick one of the modules found."""
+        if user_input is not None:
+            self._connection_data[CONF_HOST] = user_input[CONF_HOST]
+            # Confirm the remaining connection settings as usual
+            return await self.async_step_ip_connection()
+
+        modules = {
+            result.host: f"{result.host} ({result.round_trip * 1000:.0f} ms)"
+            for result in self._scan_results
+        }
+        data_schema = vol.Schema({
+            vol.Required(CONF_HOST, default=next(iter(modules))): vol.In(modules),
+        })
+
+        return self.async_show_form(
+            step_id="ip_scan_results",
+            data_schema=data_schema,
+            description_placeholders={"count": str(len(modules))},
+        )
+
+    async def _async_check_ip_module(self, host: str, port: int) -> dict[str, str]:
+        """Ask the module at host:port for the panel status, once per flow."""
+        if self._reconfigure:
+            entry = self._get_reconfigure_entry()
+            if (
+                entry.data.get(CONF_CONNECTIONTYPE) == "ip"
+                and host == entry.data.get(CONF_HOST)
+                and str(port) == str(entry.data.get(CONF_PORT, DEFAULT_PORT))
+            ):
+                # The running entry holds the module's only connection; it is
+                # known to work and a handshake would be refused
+                self._round_trip = None
+                return {}
+        result = self._validated.get((host, port))
+        if result is None:
+            try:
+                result = await async_handshake(host, port, HANDSHAKE_TIMEOUT)
+            except CannotConnect as err:
+                _LOGGER.debug("%s", err)
+                return {"base": "cannot_connect"}
+            except NotAModule as err:
+                _LOGGER.debug("%s", err)
+                return {"base": "not_aap_module"}
+            self._validated[(host, port)] = result
+        _LOGGER.info(
+            "AAP IP module at %s:%s answered in %.0f ms", host, port, result.round_trip * 1000
+        )
+        self._round_trip = result.round_trip
+        return {}
+
+    async def _async_check_serial_port(self, port: str) -> dict[str, str]:
+        """Ask the picked serial device for the panel status, once per flow."""
+        candidate = next((c for c in self._serial_ports if c.device == port), None)
+        if candidate is None:
+            candidate = SerialCandidate(port, port)
+            self._serial_ports.append(candidate)
+        if self._reconfigure and port == self._get_reconfigure_entry().data.get(CONF_PORT):
+            # The running entry holds this port; it is known to work
+            self._round_trip = None
+            return {}
+        if not candidate.is_module:
+            result = await self.hass.async_add_executor_job(
+                probe_serial, port, HANDSHAKE_TIMEOUT
+            )
+            if result is None:
+                return {"base": "serial_no_answer"}
+            candidate.round_trip, candidate.first_line = result
+        _LOGGER.info(
+            "AAP serial module on %s answered in %.0f ms", port, candidate.round_trip * 1000
+        )
+        self._round_trip = candidate.round_trip
+        return {}
+
     async def async_step_serial_connection(self, user_input=None) -> FlowResult:
         """Handle Serial connection configuration."""
         errors = {}
+        placeholders = {"entry": ""}
         
+        if self._serial_ports is None:
+            # List the serial devices once; nothing is opened until one is picked
+            own_port = None
+            ignore_entry_id = None
+            if self._reconfigure:
+                entry = self._get_reconfigure_entry()
+                ignore_entry_id = entry.entry_id
+                own_port = entry.data.get(CONF_PORT)
+            self._serial_in_use = serial_ports_in_use(self.hass, ignore_entry_id)
+            self._serial_ports = await self.hass.async_add_executor_job(
+                list_serial_ports, set(self._serial_in_use)
+            )
+            if own_port and own_port not in {c.device for c in self._serial_ports}:
+                self._serial_ports.insert(0, SerialCandidate(own_port, own_port))
+
         if user_input is not None:
             # Validate serial port path format
             port = user_input[CONF_PORT]
-            if not re.match(r'^(/dev/tty[A-Za-z0-9/_-]+|COM\d+)$', port):
+            if not re.match(SERIAL_PORT_PATTERN, port) and port not in {
+                candidate.device for candidate in self._serial_ports
+            }:
                 errors["base"] = "invalid_serial_port"
+            elif port in self._serial_in_use:
+                errors["base"] = "serial_port_in_use"
+                placeholders["entry"] = self._serial_in_use[port]
+            else:
+                errors = await self._async_check_serial_port(port)
 
             if not errors:
                 # Merge serial connection data with existing data
                 self._connection_data.update(user_input)
                 return await self.async_step_areas()
 
-        # Default values for serial connection
-        port = self._connection_data.get(CONF_PORT, "/dev/ttyUSB0")
+        # Default values for serial connection; stable by-id names come first
+        default_port = self._serial_ports[0].device if self._serial_ports else "/dev/ttyUSB0"
+        port = self._connection_data.get(CONF_PORT, default_port)
         keepalive = self._connection_data.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE)
         timeout = self._connection_data.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
         message_log = self._connection_data.get(CONF_MESSAGE_LOG_ENABLED, DEFAULT_MESSAGE_LOG_ENABLED)
 
+        # Any other path can still be typed in
+        port_selector = SelectSelector(
+            SelectSelectorConfig(
+                options=[
+                    SelectOptionDict(value=candidate.device, label=_serial_label(candidate))
+                    for candidate in self._serial_ports
+                ],
+                custom_value=True,
+                mode=SelectSelectorMode.DROPDOWN,
+            )
+        )
+
         data_schema = vol.Schema({
-            vol.Required(CONF_PORT, default=port): cv.string,
+            vol.Required(CONF_PORT, default=port): port_selector,
             vol.Optional(CONF_KEEPALIVE, default=keepalive): vol.All(vol.Coerce(int), vol.Range(min=15)),
             vol.Optional(CONF_TIMEOUT, default=timeout): vol.Coerce(int),
             vol.Optional(CONF_MESSAGE_LOG_ENABLED, default=message_log): bool,
@@ -190,7 +399,8 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=data_schema, 
             errors=errors,
             description_placeholders={
-                "info": "Configure the serial connection to your alarm panel. Use format like /dev/ttyUSB0"
+                "info": "Configure the serial connection to your alarm panel. Use format like /dev/ttyUSB0",
+                **placeholders,
             }
         )
 
@@ -199,6 +409,8 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
         
         if user_input is not None:
+            if user_input.get("bulk_import", False):
+                return await self.async_step_bulk_import()
             if user_input.get("configure_areas", False):
                 if self._reconfigure:
                     self._areas_data = {}
@@ -210,6 +422,7 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         data_schema = vol.Schema({
             vol.Optional("configure_areas", default=False): bool,
+            vol.Optional("bulk_import", default=False): bool,
         })
         
         return self.async_show_form(
@@ -217,7 +430,12 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=data_schema, 
             errors=errors,
             description_placeholders={
-                "info": "Areas represent different alarm zones/partitions in your system"
+                "info": "Areas represent different alarm zones/partitions in your system",
+                "connection": (
+                    f"The module answered in {self._round_trip * 1000:.0f} ms. "
+                    if self._round_trip is not None
+                    else ""
+                ),
             }
         )
 
@@ -254,7 +472,7 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             suggested_area += 1
 
         data_schema = vol.Schema({
-            vol.Required("area_number", default=suggested_area): vol.All(vol.Coerce(int), vol.Range(min=1, max=2)),
+            vol.Required("area_number", default=suggested_area): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_AREAS)),
             vol.Required("area_name"): cv.string,
             vol.Optional("area_code", default=""): cv.string,
             vol.Optional("code_arm_required", default=True): bool,
@@ -268,6 +486,41 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors
         )
 
+    async def async_step_bulk_import(self, user_input=None) -> FlowResult:
+        """Configure all areas, zones and outputs from one pasted table."""
+        errors = {}
+        placeholders = {"error": ""}
+
+        if user_input is not None:
+            try:
+                devices = parse_device_table(user_input["devices"])
+            except DeviceTableError as err:
+                errors["devices"] = "invalid_devices"
+                placeholders["error"] = str(err)
+            else:
+                self._areas_data = keep_area_codes(devices[CONF_AREAS], self._areas_data)
+                self._zones_data = devices[CONF_ZONES]
+                self._outputs_data = devices[CONF_OUTPUTS]
+                return await self._create_entry()
+
+        # Start from the current devices, which doubles as their export
+        table = format_device_table(self._areas_data, self._zones_data, self._outputs_data)
+        if user_input is not None:
+            table = user_input["devices"]
+
+        data_schema = vol.Schema({
+            vol.Required("devices", default=table): TextSelector(
+                TextSelectorConfig(multiline=True)
+            ),
+        })
+
+        return self.async_show_form(
+            step_id="bulk_import",
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
     async def async_step_zones(self, user_input=None) -> FlowResult:
         """Configure zones."""
         errors = {}
@@ -322,9 +575,9 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             suggested_zone += 1
 
         data_schema = vol.Schema({
-            vol.Required("zone_number", default=suggested_zone): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+            vol.Required("zone_number", default=suggested_zone): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_ZONES)),
             vol.Required("zone_name"): cv.string,
-            vol.Optional("zone_type", default="motion"): vol.In(["motion", "opening", "smoke", "glass", "shock"]),
+            vol.Optional("zone_type", default=DEFAULT_ZONETYPE): vol.In(ZONE_TYPES),
             vol.Optional("add_another_zone", default=False): bool,
         })
         
@@ -386,7 +639,7 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             suggested_output += 1
 
         data_schema = vol.Schema({
-            vol.Required("output_number", default=suggested_output): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+            vol.Required("output_number", default=suggested_output): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_OUTPUTS)),
             vol.Required("output_name"): cv.string,
             vol.Optional("add_another_output", default=False): bool,
         })
@@ -431,23 +684,160 @@ class AAPAlarmConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 class AAPAlarmOptionsFlowHandler(config_entries.OptionsFlow):
     """Handle options flow for AAP Alarm."""
 
+    def __init__(self):
+        """Initialize the options flow."""
+        self._discovery_time = DEFAULT_DISCOVERY_TIME
+        self._discovery_task: asyncio.Task | None = None
+        self._discovered: dict[str, list[int]] = {}
+
     async def async_step_init(self, user_input=None):
+        """Choose between the settings and discovering devices."""
+        return self.async_show_menu(step_id="init", menu_options=["settings", "discover"])
+
+    async def async_step_discover(self, user_input=None):
+        """Ask how long to listen to the panel for devices."""
+        hub = self.hass.data.get(DOMAIN, {}).get(self.config_entry.entry_id)
+        if hub is None or not hub.ready:
+            return self.async_abort(reason="not_connected")
+
+        if user_input is not None:
+            self._discovery_time = user_input["discovery_time"]
+            return await self.async_step_listen()
+
+        data_schema = vol.Schema({
+            vol.Required("discovery_time", default=self._discovery_time): vol.All(
+                vol.Coerce(int), vol.Range(min=5, max=600)
+            ),
+        })
+        return self.async_show_form(step_id="discover", data_schema=data_schema)
+
+    async def async_step_listen(self, user_input=None):
+        """Listen to the panel while the user sets off zones and outputs."""
+        if self._discovery_task is None:
+            hub = self.hass.data[DOMAIN][self.config_entry.entry_id]
+            self._discovery_task = self.hass.async_create_task(
+                hub.async_discover(self._discovery_time)
+            )
+        if not self._discovery_task.done():
+            return self.async_show_progress(
+                step_id="listen",
+                progress_action="listening",
+                progress_task=self._discovery_task,
+                description_placeholders={"seconds": str(self._discovery_time)},
+            )
+        try:
+            self._discovered = self._discovery_task.result()
+        except HomeAssistantError:
+            return self.async_show_progress_done(next_step_id="not_connected")
+        return self.async_show_progress_done(next_step_id="discovered")
+
+    async def async_step_not_connected(self, user_input=None):
+        """Report that the panel went away while listening."""
+        return self.async_abort(reason="not_connected")
+
+    async def async_step_discovered(self, user_input=None):
+        """Offer the devices the panel reported that are not configured yet."""
+        errors = {}
+        data = self.config_entry.data
+        placeholders = {"error": ""}
+
+        if user_input is not None:
+            try:
+                devices = parse_device_table(user_input["devices"])
+            except DeviceTableError as err:
+                errors["devices"] = "invalid_devices"
+                placeholders["error"] = str(err)
+            else:
+                new_data = dict(data)
+                devices[CONF_AREAS] = keep_area_codes(devices[CONF_AREAS], data.get(CONF_AREAS, {}))
+                for section, section_devices in devices.items():
+                    if section_devices:
+                        new_data[section] = {
+                            **{int(number): device for number, device in data.get(section, {}).items()},
+                            **section_devices,
+                        }
+                # New devices are added without reloading the entry
+                self.hass.config_entries.async_update_entry(self.config_entry, data=new_data)
+                return self.async_create_entry(title="", data=dict(self.config_entry.options))
+
+        new = {
+            section: [
+                number
+                for number in numbers
+                if str(number) not in {str(key) for key in data.get(section, {})}
+            ]
+            for section, numbers in self._discovered.items()
+        }
+        table = format_device_table(
+            {number: {"name": f"Area {number}"} for number in new[CONF_AREAS]},
+            {number: {"name": f"Zone {number}"} for number in new[CONF_ZONES]},
+            {number: {"name": f"Output {number}"} for number in new[CONF_OUTPUTS]},
+        )
+        if user_input is not None:
+            table = user_input["devices"]
+        placeholders.update({
+            section: ", ".join(map(str, numbers)) or "none"
+            for section, numbers in new.items()
+        })
+
+        data_schema = vol.Schema({
+            vol.Required("devices", default=table): TextSelector(
+                TextSelectorConfig(multiline=True)
+            ),
+        })
+        return self.async_show_form(
+            step_id="discovered",
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
+    async def async_step_settings(self, user_input=None):
         """Manage the options."""
         if user_input is not None:
             return self.async_create_entry(title="", data=user_input)
 
+        current = {**self.config_entry.data, **self.config_entry.options}
         data_schema = vol.Schema({
             vol.Optional(
                 CONF_KEEPALIVE, 
-                default=self.config_entry.data.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE)
+                default=current.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE)
             ): vol.All(vol.Coerce(int), vol.Range(min=15)),
             vol.Optional(
                 CONF_TIMEOUT, 
-                default=self.config_entry.data.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
+                default=current.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
             ): vol.Coerce(int),
+            vol.Optional(
+                CONF_BACKGROUND_CONNECT,
+                default=current.get(CONF_BACKGROUND_CONNECT, DEFAULT_BACKGROUND_CONNECT)
+            ): bool,
+            vol.Optional(
+                CONF_COMMAND_TIMEOUT,
+                default=current.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+            vol.Optional(
+                CONF_MESSAGE_LOG_SIZE,
+                default=current.get(CONF_MESSAGE_LOG_SIZE, DEFAULT_MESSAGE_LOG_SIZE)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10000)),
+            vol.Optional(
+                CONF_MESSAGE_LOG_REFRESH,
+                default=current.get(CONF_MESSAGE_LOG_REFRESH, DEFAULT_MESSAGE_LOG_REFRESH)
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.1, max=60)),
+            vol.Optional(
+                CONF_CAPTURE_ENABLED,
+                default=current.get(CONF_CAPTURE_ENABLED, DEFAULT_CAPTURE_ENABLED)
+            ): bool,
+            vol.Optional(
+                CONF_CAPTURE_MAX_SIZE,
+                default=current.get(CONF_CAPTURE_MAX_SIZE, DEFAULT_CAPTURE_MAX_SIZE)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+            vol.Optional(
+                CONF_CAPTURE_MAX_AGE,
+                default=current.get(CONF_CAPTURE_MAX_AGE, DEFAULT_CAPTURE_MAX_AGE)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=365)),
         })
 
         return self.async_show_form(
-            step_id="init", 
+            step_id="settings", 
             data_schema=data_schema
         )
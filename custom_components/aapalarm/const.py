@@ -20,6 +20,14 @@ CONF_ZONETYPE = "type"
 CONF_OUTPUTS = "outputs"
 CONF_OUTPUTNAME = "name"
 CONF_MESSAGE_LOG_ENABLED = "message_log_enabled"
+CONF_MESSAGE_LOG_SIZE = "message_log_size"
+CONF_MESSAGE_LOG_REFRESH = "message_log_refresh"
+CONF_CAPTURE_ENABLED = "capture_enabled"
+CONF_CAPTURE_MAX_SIZE = "capture_max_size"
+CONF_CAPTURE_MAX_AGE = "capture_max_age"
+CONF_COALESCE_WINDOW = "coalesce_window"
+CONF_BACKGROUND_CONNECT = "background_connect"
+CONF_COMMAND_TIMEOUT = "command_timeout"
 
 # Default values
 DEFAULT_PORT = "5002"
@@ -27,6 +35,21 @@ DEFAULT_KEEPALIVE = 60
 DEFAULT_TIMEOUT = 10
 DEFAULT_ZONETYPE = "motion"
 DEFAULT_MESSAGE_LOG_ENABLED = False
+DEFAULT_MESSAGE_LOG_SIZE = 100
+DEFAULT_MESSAGE_LOG_REFRESH = 1.0  # seconds between message log sensor updates
+DEFAULT_CAPTURE_ENABLED = False
+DEFAULT_CAPTURE_MAX_SIZE = 10  # MB across all capture files of a panel
+DEFAULT_CAPTURE_MAX_AGE = 7  # days
+DEFAULT_COALESCE_WINDOW = 0  # seconds, 0 = flush on the next loop iteration
+DEFAULT_BACKGROUND_CONNECT = False
+DEFAULT_COMMAND_TIMEOUT = 10  # seconds for the panel to confirm a command
+DEFAULT_DISCOVERY_TIME = 60  # seconds to listen for devices when discovering
+
+# Panel limits
+MAX_AREAS = 2
+MAX_ZONES = 32
+MAX_OUTPUTS = 32
+ZONE_TYPES = ["motion", "opening", "smoke", "glass", "shock"]
 
 # Signals
 SIGNAL_ZONE_UPDATE = "aapalarm.zones_updated"
@@ -35,6 +58,25 @@ SIGNAL_SYSTEM_UPDATE = "aapalarm.system_updated"
 SIGNAL_OUTPUT_UPDATE = "aapalarm.output_updated"
 SIGNAL_KEYPAD_UPDATE = "aapalarm.keypad_updated"
 SIGNAL_MESSAGE_LOG_UPDATE = "aapalarm.message_log_updated"
+SIGNAL_STATS_UPDATE = "aapalarm.stats_updated"
+SIGNAL_DEVICES_ADDED = "aapalarm.devices_added"
+
+# Seconds between refreshes of the statistics sensors
+STATS_UPDATE_INTERVAL = 30
+
+# The controller reports areas as letters, the config uses numbers
+AREA_LETTER_TO_NUMBER = {"A": 1, "B": 2}
+AREA_NUMBER_TO_LETTER = {1: "A", 2: "B"}
+
+# Number of most recent messages shown on the message log sensor
+MESSAGE_LOG_ATTRIBUTE_LINES = 10
+
+# Attribute set on entities showing a state restored from before a restart
+# until the panel reports it again
+ATTR_RESTORED = "restored"
+
+# Raw stream captures live in <config>/aapalarm_capture/<entry_id>/
+CAPTURE_DIR = "aapalarm_capture"
 
 # Data key
 DATA_AAP = "aapalarm"
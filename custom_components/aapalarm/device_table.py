@@ -0,0 +1,239 @@
+"""Import and export of the configured areas, zones and outputs as text.
+
+A panel's devices can be written as a CSV table, one device per row::
+
+    area,1,House,1234,true,true
+    zone,1,Front Door,opening
+    output,1,Siren
+
+Area rows hold the name, code, code_arm_required and code_panic_required,
+zone rows the name and type and output rows the name; trailing columns may
+be left out. Blank lines and lines starting with # are ignored. Exported
+tables show area codes as CODE_MASK; a masked or blank code keeps the code
+the area already has (see keep_area_codes). The same
+devices can also be given as YAML in the layout of the config entry data::
+
+    zones:
+      1: {name: Front Door, type: opening}
+"""
+
+import csv
+import io
+
+import yaml
+
+from .const import (
+    CONF_AREANAME,
+    CONF_AREAS,
+    CONF_CODE,
+    CONF_CODE_ARM_REQUIRED,
+    CONF_CODE_PANIC_REQUIRED,
+    CONF_OUTPUTNAME,
+    CONF_OUTPUTS,
+    CONF_ZONENAME,
+    CONF_ZONES,
+    CONF_ZONETYPE,
+    DEFAULT_ZONETYPE,
+    MAX_AREAS,
+    MAX_OUTPUTS,
+    MAX_ZONES,
+    ZONE_TYPES,
+)
+
+TABLE_HEADER = (
+    "# area,number,name,code,code_arm_required,code_panic_required\n"
+    "# zone,number,name,type\n"
+    "# output,number,name\n"
+)
+
+# Device kind -> (config key, highest number)
+KINDS = {
+    "area": (CONF_AREAS, MAX_AREAS),
+    "zone": (CONF_ZONES, MAX_ZONES),
+    "output": (CONF_OUTPUTS, MAX_OUTPUTS),
+}
+
+CODE_MASK = "****"  # stands in for an area code in exported tables
+
+TRUE_VALUES = {"true", "yes", "on", "1"}
+FALSE_VALUES = {"false", "no", "off", "0"}
+
+
+class DeviceTableError(ValueError):
+    """Raised for a device table that cannot be imported."""
+
+    def __init__(self, line: int | None, message: str) -> None:
+        """Initialize the error for a 1-based line number, if known."""
+        super().__init__(message if line is None else f"line {line}: {message}")
+        self.line = line
+
+
+def _to_bool(value, line: int | None, field: str) -> bool:
+    """Return value as a bool; a missing value means True."""
+    if value is None or value == "":
+        return True
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise DeviceTableError(line, f"{field} must be true or false, not {value!r}")
+
+
+def _device(kind: str, fields: list, line: int | None) -> dict:
+    """Return the config entry data of one device from its columns."""
+    name = str(fields[0]).strip() if fields else ""
+    if not name:
+        raise DeviceTableError(line, f"{kind} needs a name")
+    if kind == "area":
+        code, arm, panic = [*fields[1:4], None, None, None][:3]
+        code = "" if code is None else str(code).strip()
+        return {
+            CONF_AREANAME: name,
+            CONF_CODE: "" if code == CODE_MASK else code,
+            CONF_CODE_ARM_REQUIRED: _to_bool(arm, line, CONF_CODE_ARM_REQUIRED),
+            CONF_CODE_PANIC_REQUIRED: _to_bool(panic, line, CONF_CODE_PANIC_REQUIRED),
+        }
+    if kind == "zone":
+        zone_type = DEFAULT_ZONETYPE
+        if len(fields) > 1 and fields[1]:
+            zone_type = str(fields[1]).strip().lower()
+        if zone_type not in ZONE_TYPES:
+            raise DeviceTableError(
+                line, f"zone type must be one of {', '.join(ZONE_TYPES)}, not {zone_type!r}"
+            )
+        return {CONF_ZONENAME: name, CONF_ZONETYPE: zone_type}
+    return {CONF_OUTPUTNAME: name}
+
+
+def _rows_from_yaml(data: dict):
+    """Yield (line, kind, number, columns) for devices given as YAML."""
+    unknown = set(data) - {key for key, _ in KINDS.values()}
+    if unknown:
+        raise DeviceTableError(None, f"unknown section {min(map(str, unknown))!r}")
+    for kind, (key, _) in KINDS.items():
+        devices = data.get(key) or {}
+        if not isinstance(devices, dict):
+            raise DeviceTableError(None, f"{key} must map numbers to devices")
+        for number, device in devices.items():
+            if isinstance(device, str):
+                device = {"name": device}
+            if not isinstance(device, dict):
+                raise DeviceTableError(None, f"{kind} {number} must be a mapping")
+            if kind == "area":
+                columns = [
+                    device.get(CONF_AREANAME),
+                    device.get(CONF_CODE),
+                    device.get(CONF_CODE_ARM_REQUIRED),
+                    device.get(CONF_CODE_PANIC_REQUIRED),
+                ]
+            elif kind == "zone":
+                columns = [device.get(CONF_ZONENAME), device.get(CONF_ZONETYPE)]
+            else:
+                columns = [device.get(CONF_OUTPUTNAME)]
+            yield None, kind, number, columns
+
+
+def _rows_from_csv(text: str):
+    """Yield (line, kind, number, columns) for devices given as CSV."""
+    for line, row in enumerate(csv.reader(text.splitlines()), start=1):
+        if not row or not "".join(row).strip() or row[0].lstrip().startswith("#"):
+            continue
+        kind = row[0].strip().lower()
+        if kind not in KINDS:
+            raise DeviceTableError(line, f"unknown device kind {row[0].strip()!r}")
+        if len(row) < 2:
+            raise DeviceTableError(line, f"{kind} needs a number")
+        yield line, kind, row[1], row[2:]
+
+
+def _looks_like_table(text: str) -> bool:
+    """Return True if the first device line starts with a device kind."""
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            return line.split(",", 1)[0].strip().lower() in KINDS
+    return True
+
+
+def parse_device_table(text: str) -> dict[str, dict[int, dict]]:
+    """Parse and validate a device table in one pass.
+
+    Returns the areas, zones and outputs keyed by their config entry key;
+    raises DeviceTableError for the first problem found.
+    """
+    rows = None
+    if not _looks_like_table(text):
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError:
+            data = None
+        if isinstance(data, dict):
+            rows = _rows_from_yaml(data)
+    if rows is None:
+        rows = _rows_from_csv(text)
+
+    result: dict[str, dict[int, dict]] = {key: {} for key, _ in KINDS.values()}
+    for line, kind, number, columns in rows:
+        key, highest = KINDS[kind]
+        try:
+            number = int(str(number).strip())
+        except ValueError:
+            raise DeviceTableError(
+                line, f"{kind} number must be a whole number, not {number!r}"
+            ) from None
+        if not 1 <= number <= highest:
+            raise DeviceTableError(
+                line, f"{kind} number must be between 1 and {highest}, not {number}"
+            )
+        if number in result[key]:
+            raise DeviceTableError(line, f"{kind} {number} is listed twice")
+        result[key][number] = _device(kind, columns, line)
+    return result
+
+
+def keep_area_codes(areas: dict[int, dict], current: dict) -> dict[int, dict]:
+    """Return parsed areas with blank codes taken from the current areas.
+
+    current may be config entry data, whose area numbers are strings.
+    """
+    current = {int(number): area for number, area in current.items()}
+    return {
+        number: {**area, CONF_CODE: current[number].get(CONF_CODE, "")}
+        if not area[CONF_CODE] and number in current
+        else area
+        for number, area in areas.items()
+    }
+
+
+def format_device_table(areas: dict, zones: dict, outputs: dict) -> str:
+    """Return the devices as a CSV table that parse_device_table reads back.
+
+    Area codes are masked, so the table can be shown and copied safely.
+    """
+    rows = []
+    for number, area in sorted(areas.items(), key=lambda item: int(item[0])):
+        rows.append([
+            "area",
+            int(number),
+            area.get(CONF_AREANAME, ""),
+            CODE_MASK if area.get(CONF_CODE) else "",
+            str(area.get(CONF_CODE_ARM_REQUIRED, True)).lower(),
+            str(area.get(CONF_CODE_PANIC_REQUIRED, True)).lower(),
+        ])
+    for number, zone in sorted(zones.items(), key=lambda item: int(item[0])):
+        rows.append([
+            "zone",
+            int(number),
+            zone.get(CONF_ZONENAME, ""),
+            zone.get(CONF_ZONETYPE, DEFAULT_ZONETYPE),
+        ])
+    for number, output in sorted(outputs.items(), key=lambda item: int(item[0])):
+        rows.append(["output", int(number), output.get(CONF_OUTPUTNAME, "")])
+
+    buffer = io.StringIO()
+    # csv quotes names that contain commas or quotes
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return TABLE_HEADER + buffer.getvalue()
@@ -0,0 +1,99 @@
+"""Diagnostics support for the AAP Alarm integration."""
+
+import copy
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_CODE, DOMAIN
+
+TO_REDACT = {CONF_CODE}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry.
+
+    Everything comes from in-memory state kept by the hub; the panel is not
+    queried.
+    """
+    hub = hass.data[DOMAIN][entry.entry_id]
+    controller = hub.controller
+    client = getattr(controller, "_client", None)
+    coalescer = hub.coalescer
+    traffic = hub.traffic
+    capture = hub.capture
+
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": async_redact_data(dict(entry.options), TO_REDACT),
+        },
+        "connection": {
+            "type": hub.connection_type,
+            "connected": bool(client is not None and client._connected),
+            "keepalive": hub.keepalive,
+            "timeout": hub.timeout,
+            "history": list(hub.connection_history),
+            "supervisor": hub.supervisor.summary(),
+        },
+        "commands": {
+            **hub.commands.summary(),
+            "timeouts": dict(hub.command_timeouts),
+            "output_corrections": hub.output_corrections,
+        },
+        "controller": {
+            "zone_state": copy.deepcopy(controller.zone_state),
+            "area_state": copy.deepcopy(controller.area_state),
+            "output_state": copy.deepcopy(controller.output_state),
+            "system_state": copy.deepcopy(controller.system_state),
+        },
+        "counters": {
+            "events": dict(hub.event_counts),
+            "state_writes": dict(hub.write_stats),
+            "coalescer": {
+                "marked": coalescer.marked,
+                "dispatched": coalescer.dispatched,
+                "flushes": coalescer.flushes,
+            },
+            "traffic": {
+                "lines": traffic.lines,
+                "bytes": traffic.bytes,
+                "parse_errors": traffic.parse_errors,
+                "reconnects": traffic.reconnects,
+                "last_line_age": (
+                    round(time.perf_counter() - traffic.last_line, 1)
+                    if traffic.last_line is not None
+                    else None
+                ),
+                "keepalive_rtt_ms": (
+                    round(traffic.keepalive_rtt * 1000, 1)
+                    if traffic.keepalive_rtt is not None
+                    else None
+                ),
+                "last_sample": hub.traffic_summary,
+            },
+        },
+        "timings": {
+            "latency": hub.latency_summary(),
+            "flush": coalescer.flush_time.summary(),
+            "command_confirmation": hub.command_latency_summary(),
+        },
+        "message_log": hub.message_log.entries() if hub.message_log is not None else None,
+        "capture": (
+            {
+                "path": str(capture.path),
+                "lines_written": capture.lines_written,
+                "bytes_written": capture.bytes_written,
+                "dropped": capture.dropped,
+                "rotations": capture.rotations,
+            }
+            if capture is not None
+            else None
+        ),
+    }
@@ -0,0 +1,824 @@
+"""Hub that owns the connection to one AAP IP / Serial Module."""
+
+import asyncio
+import logging
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import Callable
+from datetime import timedelta
+from pathlib import Path
+
+from homeassistant.const import CONF_HOST, CONF_TIMEOUT, EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+from pyaapalarmmodule import AAPAlarmPanel, AAPModuleClient
+
+from .capture import StreamCapture
+from .coalesce import UpdateCoalescer
+from .commands import (
+    MERGE_DROP,
+    MERGE_NONE,
+    MERGE_TOGGLE,
+    PRIORITY_ALARM,
+    PRIORITY_ARM,
+    PRIORITY_NORMAL,
+    CommandQueue,
+)
+from .const import (
+    AREA_LETTER_TO_NUMBER,
+    CAPTURE_DIR,
+    CONF_AREAS,
+    CONF_CAPTURE_ENABLED,
+    CONF_CAPTURE_MAX_AGE,
+    CONF_CAPTURE_MAX_SIZE,
+    CONF_COALESCE_WINDOW,
+    CONF_COMMAND_TIMEOUT,
+    CONF_CONNECTIONTYPE,
+    CONF_KEEPALIVE,
+    CONF_MESSAGE_LOG_ENABLED,
+    CONF_MESSAGE_LOG_REFRESH,
+    CONF_MESSAGE_LOG_SIZE,
+    CONF_OUTPUTS,
+    CONF_PORT,
+    CONF_ZONES,
+    DEFAULT_CAPTURE_ENABLED,
+    DEFAULT_CAPTURE_MAX_AGE,
+    DEFAULT_CAPTURE_MAX_SIZE,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_COMMAND_TIMEOUT,
+    DEFAULT_KEEPALIVE,
+    DEFAULT_MESSAGE_LOG_ENABLED,
+    DEFAULT_MESSAGE_LOG_REFRESH,
+    DEFAULT_MESSAGE_LOG_SIZE,
+    DEFAULT_PORT,
+    DEFAULT_TIMEOUT,
+    MAX_AREAS,
+    MAX_OUTPUTS,
+    MAX_ZONES,
+    SIGNAL_AREA_UPDATE,
+    SIGNAL_DEVICES_ADDED,
+    SIGNAL_KEYPAD_UPDATE,
+    SIGNAL_MESSAGE_LOG_UPDATE,
+    SIGNAL_OUTPUT_UPDATE,
+    SIGNAL_STATS_UPDATE,
+    SIGNAL_SYSTEM_UPDATE,
+    SIGNAL_ZONE_UPDATE,
+    STATS_UPDATE_INTERVAL,
+)
+from .message_log import MessageLog
+from .replay import StreamReplay
+from .stats import RollingLatency, TrafficStats
+from .supervisor import ConnectionSupervisor
+
+_LOGGER = logging.getLogger(__name__)
+
+CONNECTION_HISTORY_SIZE = 20
+# Device section of the configuration -> (signal its keys are reported on, highest number)
+DEVICE_SECTIONS = {
+    CONF_AREAS: (SIGNAL_AREA_UPDATE, MAX_AREAS),
+    CONF_ZONES: (SIGNAL_ZONE_UPDATE, MAX_ZONES),
+    CONF_OUTPUTS: (SIGNAL_OUTPUT_UPDATE, MAX_OUTPUTS),
+}
+OUTPUT_MAX_ATTEMPTS = 3  # toggles sent towards one output target before giving up
+
+
+def format_signal(signal: str, *scope) -> str:
+    """Return a dispatcher signal narrowed to the given scope.
+
+    Signals are always scoped to the config entry first, then optionally to a
+    zone, area, output or system flag, e.g. ``aapalarm.zones_updated_<entry>_5``.
+    """
+    return "_".join((signal, *(str(part) for part in scope)))
+
+
+def normalize_key(key):
+    """Normalize a controller key to the form entities subscribe with.
+
+    Zones and outputs are reported as numeric strings and areas as letters;
+    system updates carry the name of the flag that changed.
+    """
+    if key is None or isinstance(key, int):
+        return key
+    key = str(key).strip()
+    if key in AREA_LETTER_TO_NUMBER:
+        return AREA_LETTER_TO_NUMBER[key]
+    if key.isdigit():
+        return int(key)
+    return key
+
+
+def is_area_alarmed(controller, key) -> bool:
+    """Return True if the area identified by key is currently in alarm."""
+    area = getattr(controller, "area_state", {}).get(normalize_key(key))
+    return bool(area and area.get("status", {}).get("alarm", False))
+
+
+@callback
+def async_dispatch_update(hass: HomeAssistant, signal: str, entry_id: str, key) -> None:
+    """Deliver an update only to the entity of this entry that owns key.
+
+    A key of None is a refresh-all and goes to every entity of the entry
+    listening on signal.
+    """
+    key = normalize_key(key)
+    if key is None:
+        async_dispatcher_send(hass, format_signal(signal, entry_id), None)
+    else:
+        async_dispatcher_send(hass, format_signal(signal, entry_id, key), key)
+
+
+class AAPAlarmHub:
+    """Owns the controller, its callbacks, update routing and statistics.
+
+    One hub exists per configured panel. Both the YAML and the config entry
+    setup paths create a hub, and every platform reaches the controller
+    through it.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, conf) -> None:
+        """Initialize the hub from a configuration mapping."""
+        self.hass = hass
+        self.entry_id = entry_id
+        self._conf = dict(conf)
+        self.connection_type = conf.get(CONF_CONNECTIONTYPE)
+        self.host = conf.get(CONF_HOST)
+        self.port = conf.get(CONF_PORT, DEFAULT_PORT)
+        self.keepalive = conf.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE)
+        self.timeout = conf.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
+        self.command_timeout = conf.get(CONF_COMMAND_TIMEOUT, DEFAULT_COMMAND_TIMEOUT)
+        coalesce_window = conf.get(CONF_COALESCE_WINDOW, DEFAULT_COALESCE_WINDOW)
+
+        _LOGGER.debug("Connection Type: %s", self.connection_type)
+        _LOGGER.debug("Host: %s", self.host)
+        _LOGGER.debug("Port: %s", self.port)
+        _LOGGER.debug("Keep Alive: %s", self.keepalive)
+        _LOGGER.debug("Connection Timeout: %s", self.timeout)
+        _LOGGER.debug("Coalesce Window: %s", coalesce_window)
+
+        self.controller = AAPAlarmPanel(
+            self.connection_type,
+            self.host,
+            self.port,
+            "",
+            self.keepalive,
+            asyncio.get_event_loop(),
+            self.timeout,
+        )
+
+        # Bursts of panel lines are collected and dispatched once per loop iteration
+        self.coalescer = UpdateCoalescer(hass, self._dispatch, coalesce_window)
+
+        # Statistics
+        self.event_counts: Counter = Counter()
+        # Keys the panel has reported since startup, per signal
+        self.confirmed: defaultdict[str, set] = defaultdict(set)
+        self.write_stats: Counter = Counter(emitted=0, suppressed=0)
+        # Line received -> state written, per signal
+        self.latency: defaultdict[str, RollingLatency] = defaultdict(RollingLatency)
+        self._line_received: float | None = None
+        # Connection traffic, sampled by the stats timer
+        self.traffic = TrafficStats()
+        self.traffic_summary: dict = {}
+        self.connection_history: deque[dict] = deque(maxlen=CONNECTION_HISTORY_SIZE)
+        self._dispatching: tuple[str, float] | None = None
+
+        # Raw message log (if enabled); the sensor refresh is throttled
+        # independently of how fast lines are captured
+        self.message_log: MessageLog | None = None
+        self._message_log_refresh: UpdateCoalescer | None = None
+        if conf.get(CONF_MESSAGE_LOG_ENABLED, DEFAULT_MESSAGE_LOG_ENABLED):
+            self.message_log = MessageLog(
+                conf.get(CONF_MESSAGE_LOG_SIZE, DEFAULT_MESSAGE_LOG_SIZE)
+            )
+            self._message_log_refresh = UpdateCoalescer(
+                hass,
+                self._dispatch,
+                conf.get(CONF_MESSAGE_LOG_REFRESH, DEFAULT_MESSAGE_LOG_REFRESH),
+            )
+
+        # Persistent capture of the raw stream (if enabled)
+        self.capture: StreamCapture | None = None
+        if conf.get(CONF_CAPTURE_ENABLED, DEFAULT_CAPTURE_ENABLED):
+            self.capture = StreamCapture(
+                hass,
+                Path(hass.config.path(CAPTURE_DIR, entry_id)),
+                int(conf.get(CONF_CAPTURE_MAX_SIZE, DEFAULT_CAPTURE_MAX_SIZE) * 1024 * 1024),
+                conf.get(CONF_CAPTURE_MAX_AGE, DEFAULT_CAPTURE_MAX_AGE) * 86400,
+            )
+
+        self.replay: StreamReplay | None = None
+        # True while a replayed line is processed, so that it is not taken
+        # for a report from the panel
+        self._replaying = False
+
+        # Set once the panel has reported in; entities are unavailable until then
+        # and again while the connection is down
+        self.ready = False
+        self.supervisor = ConnectionSupervisor(
+            hass, self.keepalive, lambda: self.traffic.last_line, self._async_connection_down
+        )
+
+        self._sync_connect: asyncio.Future | None = None
+        self._wrapped_client = None
+        self._unsub_stop: CALLBACK_TYPE | None = None
+        self._unsub_stats: CALLBACK_TYPE | None = None
+
+        controller = self.controller
+        controller.callback_zone_state_change = self._zones_updated_callback
+        controller.callback_area_state_change = self._areas_updated_callback
+        controller.callback_system_state_change = self._system_updated_callback
+        controller.callback_output_state_change = self._output_updated_callback
+        controller.callback_keypad_state_change = self._keypad_updated_callback
+        controller.callback_connected = self._connected_callback
+        controller.callback_login_timeout = self._connection_fail_callback
+
+        # Commands from entities and services go through one paced queue
+        self.commands = CommandQueue(hass)
+        self._queue_controller_commands()
+        # Commands waiting for the panel to report their effect:
+        # (signal, key, confirmed, future)
+        self._confirmations: list[tuple[str, object, Callable[[], bool], asyncio.Future]] = []
+        # Command issued -> state change reported, per command
+        self.command_latency: defaultdict[str, RollingLatency] = defaultdict(RollingLatency)
+        self.command_timeouts: Counter = Counter()
+        # Requested output states not yet reported by the panel, who is waiting
+        # for them, the outputs with a toggle on its way and the toggles sent
+        # towards each target
+        self._output_targets: dict[int, bool] = {}
+        self._output_waiters: defaultdict[int, list[asyncio.Future]] = defaultdict(list)
+        self._outputs_in_flight: set[int] = set()
+        self._output_attempts: Counter = Counter()
+        self.output_corrections = 0
+
+    async def async_start(self, wait: bool = True) -> bool:
+        """Start the controller, by default waiting for the first connection.
+
+        With wait False this returns straight away and the connection is made
+        in the background, the supervisor retrying until the panel answers.
+        """
+        self._sync_connect = asyncio.Future()
+
+        _LOGGER.info("Start AAP Alarm")
+        if self.capture is not None:
+            # Apply the age limit to captures left over from a previous run
+            self.hass.async_add_executor_job(self.capture.prune)
+        self._start_client()
+
+        if wait:
+            try:
+                result = await asyncio.wait_for(self._sync_connect, timeout=self.timeout)
+            except TimeoutError:
+                _LOGGER.error("Timed out connecting to AAP Alarm Module")
+                self.async_stop()
+                return False
+            if not result:
+                self.async_stop()
+                return False
+            self.ready = True
+
+        self.supervisor.async_start()
+
+        self._unsub_stop = self.hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_STOP, self._async_handle_ha_stop
+        )
+        self._unsub_stats = async_track_time_interval(
+            self.hass, self._async_stats_tick, timedelta(seconds=STATS_UPDATE_INTERVAL)
+        )
+        return True
+
+    @callback
+    def async_stop(self) -> None:
+        """Shutdown the AAP IP / Serial Module connection."""
+        _LOGGER.info("Shutting down AAP Alarm")
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+        if self._unsub_stats is not None:
+            self._unsub_stats()
+            self._unsub_stats = None
+        self.supervisor.async_stop()
+        self.commands.async_stop()
+        self.coalescer.async_cancel()
+        if self._message_log_refresh is not None:
+            self._message_log_refresh.async_cancel()
+        if self.capture is not None:
+            self.capture.async_close()
+        self.controller.stop()
+
+    @callback
+    def _async_handle_ha_stop(self, event) -> None:
+        """Stop the connection when Home Assistant stops."""
+        self._unsub_stop = None
+        self.async_stop()
+
+    async def async_replay(self, path: Path, speed: float = 0) -> dict:
+        """Feed a captured stream through the client and report the timings.
+
+        Replayed lines take the same path as live ones, including the message
+        log; the on-disk capture is paused so the replay is not recorded.
+        They update the entities but do not count as the panel reporting: they
+        do not make the hub ready, add to the traffic statistics, confirm
+        commands or switch outputs towards their targets.
+        """
+        client = getattr(self.controller, "_client", None)
+        if client is None:
+            raise HomeAssistantError("AAP Alarm Module is not connected")
+        if self.replay is not None:
+            raise HomeAssistantError("A replay is already running for this panel")
+
+        _LOGGER.info("Replaying %s at speed %s", path, speed or "max")
+        def replay_line(line):
+            self._replaying = True
+            try:
+                client.process_line(line)
+            finally:
+                self._replaying = False
+
+        self.replay = StreamReplay(self.hass, replay_line, path, speed)
+        try:
+            return await self.replay.async_run()
+        finally:
+            self.replay = None
+
+    async def async_discover(self, seconds: float) -> dict[str, list[int]]:
+        """Listen to the panel for seconds and return the devices it reported.
+
+        A status request is sent first so the panel reports its current
+        state; anything else that changes during the window (a door opened,
+        an output switched) is picked up as well. Returns the area, zone and
+        output numbers reported since startup, keyed by configuration section.
+        """
+        client = getattr(self.controller, "_client", None)
+        if not self.ready or client is None:
+            raise HomeAssistantError("AAP Alarm Module is not connected")
+        client.send_command("status", "")
+        await asyncio.sleep(seconds)
+        return {
+            section: sorted(
+                key
+                for key in self.confirmed.get(signal, ())
+                if isinstance(key, int) and 1 <= key <= highest
+            )
+            for section, (signal, highest) in DEVICE_SECTIONS.items()
+        }
+
+    @callback
+    def async_add_devices(self, conf) -> bool:
+        """Take on a changed configuration that only adds devices.
+
+        The new devices are announced on SIGNAL_DEVICES_ADDED so the platforms
+        add their entities without reloading the entry. Returns False, leaving
+        everything as it was, if anything else changed.
+        """
+        sections = DEVICE_SECTIONS.keys()
+
+        def settings(conf):
+            return {key: value for key, value in conf.items() if key not in sections}
+
+        def devices(conf, section):
+            return {int(number): device for number, device in (conf.get(section) or {}).items()}
+
+        if settings(conf) != settings(self._conf):
+            return False
+        added = {}
+        for section in sections:
+            old = devices(self._conf, section)
+            new = devices(conf, section)
+            if any(new.get(number) != device for number, device in old.items()):
+                # A device was changed or removed
+                return False
+            if new.keys() - old.keys():
+                added[section] = {number: new[number] for number in sorted(new.keys() - old.keys())}
+
+        self._conf = dict(conf)
+        for section, new_devices in added.items():
+            _LOGGER.info("Adding %s %s", section, ", ".join(map(str, new_devices)))
+            async_dispatcher_send(
+                self.hass, format_signal(SIGNAL_DEVICES_ADDED, self.entry_id), section, new_devices
+            )
+        return True
+
+    @callback
+    def _dispatch(self, signal: str, key, received: float | None = None) -> None:
+        """Send a flushed update to this hub's entities.
+
+        Entity callbacks run synchronously during the dispatch, so a state
+        written while it is in progress belongs to the line received at
+        received.
+        """
+        self._dispatching = (signal, received) if received is not None else None
+        try:
+            async_dispatch_update(self.hass, signal, self.entry_id, key)
+        finally:
+            self._dispatching = None
+
+    @callback
+    def async_record_write(self) -> None:
+        """Record the latency of a state write made during a dispatch."""
+        if self._dispatching is not None:
+            signal, received = self._dispatching
+            self.latency[signal].add(time.perf_counter() - received)
+
+    @callback
+    def is_confirmed(self, signal: str, key) -> bool:
+        """Return True if the panel has reported key on signal since startup."""
+        return normalize_key(key) in self.confirmed.get(signal, ())
+
+    @callback
+    def latency_summary(self) -> dict:
+        """Return the rolling latency statistics per signal."""
+        return {signal: stats.summary() for signal, stats in self.latency.items()}
+
+    @callback
+    def _async_stats_tick(self, now=None) -> None:
+        """Sample the traffic counters and refresh the statistics sensors."""
+        self.traffic_summary = {
+            **self.traffic.sample(time.perf_counter()),
+            "last_outage": self.supervisor.summary()["last_outage"],
+            "command_queue_depth": self.commands.depth,
+            "command_wait": self.commands.wait_time.summary()["p99_ms"],
+        }
+        async_dispatch_update(self.hass, SIGNAL_STATS_UPDATE, self.entry_id, None)
+
+    @callback
+    def _log_raw_message(self, raw_line) -> None:
+        """Record a raw message to the log buffer and the capture file."""
+        if self.capture is not None and self.replay is None:
+            self.capture.append(raw_line)
+        if self.message_log is not None:
+            self.message_log.append(raw_line)
+            self._message_log_refresh.async_mark(SIGNAL_MESSAGE_LOG_UPDATE, None)
+
+    async def async_send_confirmed(
+        self, name: str, signal: str, key, confirmed: Callable[[], bool], action, *args
+    ) -> None:
+        """Send a command and wait for the panel to report its effect.
+
+        action is one of the queued controller methods. The command counts as
+        done once an update for key arrives on signal and confirmed() returns
+        True. Raises HomeAssistantError if the panel is not connected, the
+        command could not be written or it was not confirmed within the
+        command timeout.
+        """
+        if not self.ready:
+            raise HomeAssistantError("AAP Alarm Module is not connected")
+        started = time.perf_counter()
+        waiter = (signal, normalize_key(key), confirmed, self.hass.loop.create_future())
+        self._confirmations.append(waiter)
+        try:
+            if not await action(*args):
+                raise HomeAssistantError(f"Could not send {name} to the AAP Alarm Module")
+            try:
+                async with asyncio.timeout(self.command_timeout):
+                    await waiter[3]
+            except TimeoutError as err:
+                self.command_timeouts[name] += 1
+                raise HomeAssistantError(
+                    f"AAP Alarm Module did not confirm {name} within {self.command_timeout} seconds"
+                ) from err
+        finally:
+            self._confirmations.remove(waiter)
+        self.command_latency[name].add(time.perf_counter() - started)
+
+    async def async_set_outputs(self, targets: dict[int, bool]) -> dict:
+        """Bring several outputs to the given on/off states as one batch.
+
+        Only outputs that are not already in their target state are toggled.
+        The toggles are queued together, so the command queue paces them, and
+        this returns once the panel has reported every output in its target
+        state, or a later request has replaced the target. Raises
+        HomeAssistantError naming the outputs that were not confirmed within
+        the command timeout, or outputs the panel does not have.
+        """
+        if not self.ready:
+            raise HomeAssistantError("AAP Alarm Module is not connected")
+        output_state = self.controller.output_state
+        if unknown := sorted(set(targets) - set(output_state)):
+            raise HomeAssistantError(
+                f"The panel does not have outputs {', '.join(map(str, unknown))}"
+            )
+        changes = {
+            number: on
+            for number, on in targets.items()
+            if output_state[number]["status"]["open"] != on or number in self._output_targets
+        }
+        waiters: dict[int, asyncio.Future] = {}
+        for number, on in changes.items():
+            self._output_targets[number] = on
+            self._output_attempts[number] = 0
+            waiters[number] = self.hass.loop.create_future()
+            self._output_waiters[number].append(waiters[number])
+
+        started = time.perf_counter()
+        for number in changes:
+            self._async_reconcile_output(number)
+        if waiters:
+            await asyncio.wait(waiters.values(), timeout=self.command_timeout)
+
+        failed = []
+        for number, future in waiters.items():
+            if future.done():
+                if not future.result():
+                    failed.append(number)
+                continue
+            failed.append(number)
+            self.command_timeouts["set_outputs"] += 1
+            future.cancel()
+            self._output_waiters[number].remove(future)
+            if not self._output_waiters[number]:
+                # Nobody else is waiting for this output; forget the toggle
+                # that was never answered so that the next request sends again
+                del self._output_waiters[number]
+                self._output_targets.pop(number, None)
+                self._outputs_in_flight.discard(number)
+                self._output_attempts.pop(number, None)
+        if failed:
+            raise HomeAssistantError(
+                f"AAP Alarm Module did not confirm outputs {', '.join(map(str, failed))}"
+            )
+        if waiters:
+            self.command_latency["set_outputs"].add(time.perf_counter() - started)
+        return {
+            "changed": sorted(changes),
+            "unchanged": sorted(set(targets) - set(changes)),
+            "duration": round(time.perf_counter() - started, 3),
+        }
+
+    @callback
+    def _async_reconcile_output(self, number: int) -> None:
+        """Toggle an output that is not in its target state.
+
+        The module can only toggle outputs, so at most one toggle per output is
+        in flight and the next is decided once the panel reports the result.
+        """
+        target = self._output_targets.get(number)
+        if (
+            target is None
+            or number in self._outputs_in_flight
+            or number not in self.controller.output_state
+        ):
+            return
+        if self.controller.output_state[number]["status"]["open"] == target:
+            self._async_finish_output(number, True)
+            return
+        if self._output_attempts[number] >= OUTPUT_MAX_ATTEMPTS:
+            _LOGGER.warning(
+                "Output %s did not turn %s after %s attempts, giving up",
+                number,
+                "on" if target else "off",
+                OUTPUT_MAX_ATTEMPTS,
+            )
+            self._async_finish_output(number, False)
+            return
+        if self._output_attempts[number]:
+            # The panel reported something other than what was asked for
+            self.output_corrections += 1
+        self._output_attempts[number] += 1
+        self._outputs_in_flight.add(number)
+
+        def sent(future):
+            if not future.result():
+                self._outputs_in_flight.discard(number)
+                self._async_finish_output(number, False)
+
+        self.controller.command_output(str(number)).add_done_callback(sent)
+
+    @callback
+    def _async_finish_output(self, number: int, reached: bool) -> None:
+        """Drop the target of an output and release everyone waiting for it."""
+        self._output_targets.pop(number, None)
+        for future in self._output_waiters.pop(number, ()):
+            if not future.done():
+                future.set_result(reached)
+
+    @callback
+    def _check_confirmations(self, signal: str, key) -> None:
+        """Complete the commands waiting for an update of key on signal."""
+        for waiter_signal, waiter_key, confirmed, future in self._confirmations:
+            if (
+                waiter_signal == signal
+                and waiter_key == key
+                and not future.done()
+                and confirmed()
+            ):
+                future.set_result(None)
+
+    @callback
+    def command_latency_summary(self) -> dict:
+        """Return the rolling command confirmation latency per command."""
+        return {name: stats.summary() for name, stats in self.command_latency.items()}
+
+    def _queue_controller_commands(self) -> None:
+        """Route the controller's command methods through the command queue.
+
+        Callers keep calling the controller as before; each call now returns
+        a future that resolves once the command has been written.
+        """
+        controller = self.controller
+        commands = self.commands
+        for name, priority, merge in (
+            ("disarm", PRIORITY_ALARM, MERGE_DROP),
+            ("panic_alarm", PRIORITY_ALARM, MERGE_DROP),
+            ("arm_away", PRIORITY_ARM, MERGE_DROP),
+            ("arm_stay", PRIORITY_ARM, MERGE_DROP),
+            ("command_output", PRIORITY_NORMAL, MERGE_TOGGLE),
+            ("send_keypress", PRIORITY_NORMAL, MERGE_NONE),
+        ):
+            method = getattr(controller, name)
+
+            def queued(*args, name=name, priority=priority, merge=merge, method=method):
+                return commands.async_submit(priority, name, method, *args, merge=merge)
+
+            setattr(controller, name, queued)
+
+    def _start_client(self) -> None:
+        """Create the controller's client and start connecting.
+
+        This is what AAPAlarmPanel.start does, except that the client is
+        instrumented and supervised before its first connection attempt.
+        """
+        controller = self.controller
+        controller._client = AAPModuleClient(controller, controller._eventLoop)
+        self._instrument_client()
+        controller._client.start()
+
+    def _instrument_client(self) -> None:
+        """Wrap the client's I/O methods to count, timestamp and capture traffic.
+
+        The client object survives reconnects, so it is only wrapped once.
+        """
+        client = getattr(self.controller, "_client", None)
+        if client is None or client is self._wrapped_client:
+            return
+        traffic = self.traffic
+        log_raw = self.message_log is not None or self.capture is not None
+        process_line = client.process_line
+        data_received = client.data_received
+        parse_handler = client.parseHandler
+        send_command = client.send_command
+        connection_lost = client.connection_lost
+
+        def wrapped_process_line(line):
+            # Controller callbacks run inside process_line and pick this up
+            self._line_received = now = time.perf_counter()
+            if line and not self._replaying:
+                traffic.line_received(now)
+                if not self.ready:
+                    self._async_set_ready()
+            if log_raw:
+                self._log_raw_message(line)
+            try:
+                return process_line(line)
+            finally:
+                self._line_received = None
+
+        def wrapped_data_received(data):
+            traffic.bytes += len(data)
+            return data_received(data)
+
+        def wrapped_parse_handler(raw_input):
+            result = parse_handler(raw_input)
+            if not result and raw_input:
+                traffic.parse_errors += 1
+            return result
+
+        def wrapped_send_command(code, data):
+            if code == "status":
+                traffic.status_sent(time.perf_counter())
+            return send_command(code, data)
+
+        def wrapped_connection_lost(exc):
+            self._record_connection_event("connection_lost", exc)
+            return connection_lost(exc)
+
+        client.process_line = wrapped_process_line
+        client.data_received = wrapped_data_received
+        client.parseHandler = wrapped_parse_handler
+        client.send_command = wrapped_send_command
+        client.connection_lost = wrapped_connection_lost
+        self.supervisor.attach(client)
+        self._wrapped_client = client
+
+    @callback
+    def _async_set_ready(self) -> None:
+        """Make the entities available once the panel first reports in."""
+        _LOGGER.info("AAP IP / Serial Module is reporting, entities are now available")
+        self.ready = True
+        self.supervisor.async_reporting()
+        # The client requested the full status when it connected; refresh
+        # every entity so nothing keeps a state from before an outage
+        self._async_refresh_all()
+
+    @callback
+    def _async_connection_down(self) -> None:
+        """Make every entity unavailable while the connection is down."""
+        _LOGGER.warning("Lost the connection to the AAP IP / Serial Module")
+        self._record_connection_event("down")
+        self.ready = False
+        # Toggles in flight may have been lost with the connection
+        self._outputs_in_flight.clear()
+        self._async_refresh_all()
+
+    @callback
+    def _async_refresh_all(self) -> None:
+        """Refresh every panel entity in a single coalesced pass."""
+        for signal in (
+            SIGNAL_ZONE_UPDATE,
+            SIGNAL_AREA_UPDATE,
+            SIGNAL_OUTPUT_UPDATE,
+            SIGNAL_SYSTEM_UPDATE,
+        ):
+            self.coalescer.async_mark(signal, None)
+
+    def _record_connection_event(self, event: str, detail=None) -> None:
+        """Add an entry to the connection history."""
+        self.connection_history.append({
+            "time": dt_util.utcnow().isoformat(),
+            "event": event,
+            "detail": str(detail) if detail is not None else None,
+        })
+
+    @callback
+    def _connection_fail_callback(self, data) -> None:
+        """Network failure callback."""
+        _LOGGER.error("Could not establish a connection with the AAP IP / Serial Module")
+        self._record_connection_event("connect_failed")
+        if self._sync_connect is not None and not self._sync_connect.done():
+            self._sync_connect.set_result(False)
+
+    @callback
+    def _connected_callback(self, data) -> None:
+        """Handle a successful connection."""
+        _LOGGER.info("Established a connection with the AAP IP / Serial Module")
+        self.traffic.connects += 1
+        self._record_connection_event("connected")
+        self._instrument_client()
+        self.supervisor.async_connected()
+        if self._sync_connect is not None and not self._sync_connect.done():
+            self._sync_connect.set_result(True)
+
+    @callback
+    def _zones_updated_callback(self, data) -> None:
+        """Handle zone updates."""
+        _LOGGER.debug("Zone update event received for zone: %s", data)
+        self.event_counts[SIGNAL_ZONE_UPDATE] += 1
+        key = normalize_key(data)
+        if not self._replaying:
+            self.confirmed[SIGNAL_ZONE_UPDATE].add(key)
+        self.coalescer.async_mark(SIGNAL_ZONE_UPDATE, key, received=self._line_received)
+
+    @callback
+    def _areas_updated_callback(self, data) -> None:
+        """Handle area changes thrown by AAP (including alarms)."""
+        _LOGGER.debug("Area update event received for area: %s", data)
+        self.event_counts[SIGNAL_AREA_UPDATE] += 1
+        key = normalize_key(data)
+        if not self._replaying:
+            self.confirmed[SIGNAL_AREA_UPDATE].add(key)
+        # Alarm transitions are never held back for the next flush
+        self.coalescer.async_mark(
+            SIGNAL_AREA_UPDATE,
+            key,
+            immediate=is_area_alarmed(self.controller, data),
+            received=self._line_received,
+        )
+        if self._confirmations and not self._replaying:
+            self._check_confirmations(SIGNAL_AREA_UPDATE, key)
+
+    @callback
+    def _system_updated_callback(self, data) -> None:
+        """Handle system updates."""
+        _LOGGER.debug("System update event received: %s", data)
+        self.event_counts[SIGNAL_SYSTEM_UPDATE] += 1
+        self.coalescer.async_mark(
+            SIGNAL_SYSTEM_UPDATE, normalize_key(data), received=self._line_received
+        )
+
+    @callback
+    def _output_updated_callback(self, data) -> None:
+        """Handle output updates."""
+        _LOGGER.debug("Output update event received for output: %s", data)
+        self.event_counts[SIGNAL_OUTPUT_UPDATE] += 1
+        key = normalize_key(data)
+        if not self._replaying:
+            self.confirmed[SIGNAL_OUTPUT_UPDATE].add(key)
+        self.coalescer.async_mark(SIGNAL_OUTPUT_UPDATE, key, received=self._line_received)
+        if self._replaying:
+            return
+        if self._output_targets or self._outputs_in_flight:
+            self._outputs_in_flight.discard(key)
+            self._async_reconcile_output(key)
+        if self._confirmations:
+            self._check_confirmations(SIGNAL_OUTPUT_UPDATE, key)
+
+    @callback
+    def _keypad_updated_callback(self, data) -> None:
+        """Handle keypad updates."""
+        _LOGGER.debug("Keypad update event received: %s", data)
+        self.event_counts[SIGNAL_KEYPAD_UPDATE] += 1
+        self.coalescer.async_mark(
+            SIGNAL_KEYPAD_UPDATE, normalize_key(data), received=self._line_received
+        )
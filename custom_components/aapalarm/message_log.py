@@ -0,0 +1,62 @@
+"""Ring buffer of raw lines received from the AAP IP / Serial Module."""
+
+import time
+from collections import deque
+from datetime import datetime
+
+
+class MessageLog:
+    """Bounded log of raw panel lines that is cheap to append to.
+
+    Every line is stored as a (monotonic timestamp, raw line) tuple; nothing
+    is formatted until the log is read, so a large buffer costs no more per
+    line than a small one.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Initialize an empty log holding at most size lines."""
+        self._lines: deque[tuple[float, str]] = deque(maxlen=size)
+        # Anchor the monotonic clock to wall time once, for formatting
+        self._wall_anchor = time.time()
+        self._monotonic_anchor = time.monotonic()
+        self.total = 0
+
+    @property
+    def size(self) -> int:
+        """Return the maximum number of lines retained."""
+        return self._lines.maxlen
+
+    def append(self, raw_line: str) -> None:
+        """Record a raw line."""
+        self._lines.append((time.monotonic(), raw_line))
+        self.total += 1
+
+    def __len__(self) -> int:
+        """Return the number of lines retained."""
+        return len(self._lines)
+
+    def __bool__(self) -> bool:
+        """Return True if any line is retained."""
+        return bool(self._lines)
+
+    @property
+    def latest(self) -> str | None:
+        """Return the most recent raw line."""
+        return self._lines[-1][1] if self._lines else None
+
+    def wall_time(self, monotonic: float) -> datetime:
+        """Convert a stored monotonic timestamp to local wall time."""
+        return datetime.fromtimestamp(self._wall_anchor + monotonic - self._monotonic_anchor)
+
+    def entries(self, limit: int | None = None) -> list[dict]:
+        """Return the retained lines, oldest first, formatted for display.
+
+        With limit, only the most recent limit lines are formatted.
+        """
+        lines = self._lines
+        if limit is not None and limit < len(lines):
+            lines = list(lines)[-limit:] if limit > 0 else []
+        return [
+            {"timestamp": self.wall_time(stamp).isoformat(), "raw": raw}
+            for stamp, raw in lines
+        ]
@@ -0,0 +1,246 @@
+"""Finding and probing AAP IP / Serial Modules before they are configured."""
+
+import asyncio
+import ipaddress
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import serial
+from homeassistant.core import HomeAssistant, callback
+from pyaapalarmmodule.crow_defs import IP_COMMANDS, RESPONSE_FORMATS, SERIAL_COMMANDS
+from serial.tools.list_ports import comports
+
+_LOGGER = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 1.0  # seconds a host has to connect and answer a status request
+HANDSHAKE_TIMEOUT = 5.0  # seconds the module has to answer when set up by hand
+SCAN_CONCURRENCY = 64  # hosts probed at the same time
+SCAN_MAX_HOSTS = 1024  # largest network that may be scanned (a /22)
+SERIAL_BAUDRATE = 9600  # what the module and the client use
+SERIAL_BY_ID = Path("/dev/serial/by-id")
+
+_RESPONSES = [re.compile(pattern) for pattern in RESPONSE_FORMATS]
+
+
+def is_module_line(line: str) -> bool:
+    """Return True if line is something an AAP module reports."""
+    return any(response.match(line) for response in _RESPONSES)
+
+
+@dataclass
+class ProbeResult:
+    """A module that answered a probe."""
+
+    host: str
+    port: int
+    round_trip: float  # seconds from sending the status request to the first reply
+    first_line: str
+
+
+@dataclass
+class SerialCandidate:
+    """A serial device that might have a module attached."""
+
+    device: str  # stable /dev/serial/by-id name where there is one
+    description: str
+    round_trip: float | None = None  # set once a module has answered
+    first_line: str | None = None
+
+    @property
+    def is_module(self) -> bool:
+        """Return True if a module answered on this device."""
+        return self.round_trip is not None
+
+
+class ProbeError(Exception):
+    """Raised when a probe finds no module."""
+
+
+class CannotConnect(ProbeError):
+    """Raised when nothing accepts the connection."""
+
+
+class NotAModule(ProbeError):
+    """Raised when something answers, but not like an AAP module."""
+
+
+async def async_handshake(host: str, port: int, timeout: float = PROBE_TIMEOUT) -> ProbeResult:
+    """Ask host:port for its status and wait for a module's reply.
+
+    Raises CannotConnect if the connection is refused, unreachable or not
+    made within timeout, and NotAModule if whatever accepted it stays silent
+    or answers with something other than panel status lines.
+    """
+    deadline = time.perf_counter() + timeout
+    try:
+        async with asyncio.timeout(timeout):
+            reader, writer = await asyncio.open_connection(host, port)
+    except (TimeoutError, OSError) as err:
+        raise CannotConnect(f"Cannot connect to {host}:{port}: {err or 'timed out'}") from err
+
+    try:
+        async with asyncio.timeout(max(deadline - time.perf_counter(), 0)):
+            started = time.perf_counter()
+            writer.write(f"{IP_COMMANDS['status']}\r\n".encode("ascii"))
+            await writer.drain()
+            buffer = b""
+            while data := await reader.read(1024):
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                for raw in lines:
+                    line = raw.decode("ascii", "replace").strip()
+                    if not line:
+                        continue
+                    if not is_module_line(line):
+                        raise NotAModule(f"{host}:{port} answered {line!r}, not an AAP module")
+                    return ProbeResult(host, port, time.perf_counter() - started, line)
+    except (TimeoutError, OSError) as err:
+        raise NotAModule(f"{host}:{port} did not answer a status request") from err
+    finally:
+        writer.close()
+    raise NotAModule(f"{host}:{port} closed the connection without answering")
+
+
+async def async_probe_ip(host: str, port: int, timeout: float = PROBE_TIMEOUT) -> ProbeResult | None:
+    """Return the handshake result for host:port, or None if no module answers."""
+    try:
+        return await async_handshake(host, port, timeout)
+    except ProbeError as err:
+        _LOGGER.debug("No AAP module at %s:%s: %s", host, port, err)
+        return None
+
+
+async def async_scan_network(
+    network: str,
+    port: int,
+    timeout: float = PROBE_TIMEOUT,
+    concurrency: int = SCAN_CONCURRENCY,
+) -> list[ProbeResult]:
+    """Probe every host of network on port and return the modules found.
+
+    At most concurrency hosts are probed at a time, so a /24 takes roughly
+    256 / concurrency probe timeouts. Raises ValueError for an invalid
+    network or one with more than SCAN_MAX_HOSTS hosts.
+    """
+    subnet = ipaddress.ip_network(network, strict=False)
+    if subnet.num_addresses > SCAN_MAX_HOSTS:
+        raise ValueError(f"{network} has more than {SCAN_MAX_HOSTS} addresses")
+    hosts = list(subnet.hosts()) or [subnet.network_address]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def probe(address):
+        async with semaphore:
+            return await async_probe_ip(str(address), port, timeout)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(probe(address) for address in hosts))
+    found = [result for result in results if result is not None]
+    _LOGGER.debug(
+        "Scanned %s hosts of %s in %.1f seconds, found %s",
+        len(hosts),
+        network,
+        time.perf_counter() - started,
+        [result.host for result in found],
+    )
+    return found
+
+
+def _device_paths(data) -> set[str]:
+    """Return the strings in a config entry's data that name a serial device."""
+    if isinstance(data, dict):
+        return set().union(*(_device_paths(value) for value in data.values()))
+    if isinstance(data, (list, tuple)):
+        return set().union(*(_device_paths(value) for value in data))
+    if isinstance(data, str) and re.match(r"^(/dev/\S+|COM\d+)$", data):
+        return {data}
+    return set()
+
+
+@callback
+def serial_ports_in_use(hass: HomeAssistant, ignore_entry_id: str | None = None) -> dict[str, str]:
+    """Return the serial devices other config entries use, with the entry's title.
+
+    Integrations store their device in different keys (ZHA under device/path,
+    Z-Wave JS under usb_path), so any device path in an entry's data counts.
+    """
+    return {
+        path: entry.title
+        for entry in hass.config_entries.async_entries()
+        if entry.entry_id != ignore_entry_id
+        for path in _device_paths(dict(entry.data))
+    }
+
+
+def list_serial_ports(exclude: set[str] = frozenset()) -> list[SerialCandidate]:
+    """Return the serial devices of this machine that are not in exclude.
+
+    Devices with a /dev/serial/by-id link are listed under that name, which
+    survives reboots and replugging, unlike /dev/ttyUSB0, and come first.
+    Nothing is opened. This does blocking I/O, so run it in the executor.
+    """
+    by_id = {}
+    if SERIAL_BY_ID.is_dir():
+        for link in SERIAL_BY_ID.iterdir():
+            by_id[os.path.realpath(link)] = str(link)
+    excluded = {os.path.realpath(path) for path in exclude}
+    candidates = [
+        SerialCandidate(
+            by_id.get(os.path.realpath(port.device), port.device),
+            port.description if port.description and port.description != "n/a" else port.device,
+        )
+        for port in comports()
+        if os.path.realpath(port.device) not in excluded
+    ]
+    candidates.sort(
+        key=lambda candidate: (
+            not candidate.device.startswith(str(SERIAL_BY_ID)),
+            candidate.device,
+        )
+    )
+    return candidates
+
+
+def probe_serial(device: str, timeout: float = PROBE_TIMEOUT) -> tuple[float, str] | None:
+    """Ask the device at 9600 baud for the panel status.
+
+    Returns the round trip and first line if a module answers within timeout,
+    None otherwise. The device is opened exclusively and with DTR and RTS
+    low, so a device another process holds is left alone (it counts as not
+    a module) and boards that reset on DTR are not reset. This does blocking
+    I/O, so run it in the executor.
+    """
+    port = serial.Serial(
+        None, SERIAL_BAUDRATE, timeout=timeout, write_timeout=timeout, exclusive=True
+    )
+    port.port = device
+    port.dtr = False
+    port.rts = False
+    try:
+        port.open()
+    except (serial.SerialException, OSError, ValueError) as err:
+        _LOGGER.debug("Not probing %s: %s", device, err)
+        return None
+    try:
+        with port:
+            started = time.perf_counter()
+            port.write(f"{SERIAL_COMMANDS['status']}E\r\n".encode("ascii"))
+            deadline = started + timeout
+            while (remaining := deadline - time.perf_counter()) > 0:
+                port.timeout = remaining
+                raw = port.read_until(b"\n")
+                if not raw.endswith(b"\n"):
+                    break
+                line = raw.decode("ascii", "replace").strip()
+                if not line:
+                    continue
+                if not is_module_line(line):
+                    _LOGGER.debug("%s answered %r, not an AAP module", device, line)
+                    return None
+                return time.perf_counter() - started, line
+    except (serial.SerialException, OSError, ValueError) as err:
+        _LOGGER.debug("No AAP module on %s: %s", device, err)
+    return None
@@ -0,0 +1,133 @@
+"""Replay of a captured raw AAP IP / Serial Module stream."""
+
+import asyncio
+import logging
+import mmap
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+
+from .capture import parse_capture_line
+from .stats import RollingLatency
+
+_LOGGER = logging.getLogger(__name__)
+
+REPLAY_CHUNK_LINES = 5000  # lines read per executor job
+REPLAY_YIELD_LINES = 100  # lines injected between yields to the event loop
+REPLAY_LATENCY_WINDOW = 10000  # most recent per-line timings kept for percentiles
+
+
+def iter_capture(path: Path, use_mmap: bool = True) -> Iterator[tuple[float | None, str]]:
+    """Yield (timestamp, raw line) pairs from a capture file.
+
+    Files written by the stream capture carry a timestamp per line; plain
+    dumps of raw panel lines are accepted too and yield a timestamp of None.
+    Large captures are memory-mapped rather than read into memory.
+    """
+    with path.open("rb") as capture:
+        if use_mmap and path.stat().st_size > 0:
+            with mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from _parse_lines(iter(mapped.readline, b""))
+        else:
+            yield from _parse_lines(capture)
+
+
+def _parse_lines(lines) -> Iterator[tuple[float | None, str]]:
+    """Parse raw capture lines, skipping blank ones."""
+    for data in lines:
+        text = data.decode("ascii", errors="replace")
+        parsed = parse_capture_line(text)
+        if parsed is None:
+            text = text.strip()
+            if not text:
+                continue
+            parsed = (None, text)
+        yield parsed
+
+
+class StreamReplay:
+    """Feed a captured stream back into a hub's client, line by line.
+
+    With a speed of 0 lines are injected as fast as the pipeline takes them
+    (yielding to the event loop every REPLAY_YIELD_LINES so updates are
+    flushed); otherwise the captured timing is reproduced, divided by speed.
+    """
+
+    def __init__(self, hass: HomeAssistant, process_line, path: Path, speed: float = 0) -> None:
+        """Initialize the replay of path into process_line."""
+        self._hass = hass
+        self._process_line = process_line
+        self.path = path
+        self.speed = speed
+        self.lines = 0
+        self.process_time = RollingLatency(REPLAY_LATENCY_WINDOW)
+        self._process_total = 0.0
+        self._process_max = 0.0
+
+    async def async_run(self) -> dict:
+        """Replay the whole capture and return a report."""
+        lines = iter_capture(self.path)
+        first_stamp: float | None = None
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+
+        while chunk := await self._hass.async_add_executor_job(
+            _read_chunk, lines, REPLAY_CHUNK_LINES
+        ):
+            for stamp, raw_line in chunk:
+                if self.speed > 0 and stamp is not None:
+                    if first_stamp is None:
+                        first_stamp = stamp
+                    delay = (stamp - first_stamp) / self.speed - (time.perf_counter() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif self.lines % REPLAY_YIELD_LINES == 0:
+                    await asyncio.sleep(0)
+                self._inject(raw_line)
+
+        # Let the last coalesced updates reach the entities
+        await asyncio.sleep(0)
+        return self._report(time.perf_counter() - started, time.process_time() - cpu_started)
+
+    def _inject(self, raw_line: str) -> None:
+        """Process one line and record how long it took."""
+        begin = time.perf_counter()
+        self._process_line(raw_line)
+        took = time.perf_counter() - begin
+        self.process_time.add(took)
+        self._process_total += took
+        self._process_max = max(self._process_max, took)
+        self.lines += 1
+
+    def _report(self, elapsed: float, cpu: float) -> dict:
+        """Summarize the replay.
+
+        Percentiles cover the last REPLAY_LATENCY_WINDOW lines; the mean and
+        the maximum cover the whole replay.
+        """
+        latency = self.process_time
+        return {
+            "file": str(self.path),
+            "speed": self.speed,
+            "lines": self.lines,
+            "elapsed_seconds": round(elapsed, 3),
+            "lines_per_second": round(self.lines / elapsed, 1) if elapsed else 0.0,
+            "cpu_seconds": round(cpu, 3),
+            "process_line_us": {
+                name: round(value * 1e6, 1)
+                for name, value in (
+                    ("mean", self._process_total / self.lines if self.lines else 0.0),
+                    ("p50", latency.percentile(50)),
+                    ("p95", latency.percentile(95)),
+                    ("p99", latency.percentile(99)),
+                    ("max", self._process_max),
+                )
+            },
+        }
+
+
+def _read_chunk(lines: Iterator, count: int) -> list:
+    """Read up to count items from lines (runs in the executor)."""
+    return [item for _, item in zip(range(count), lines, strict=False)]
@@ -2,14 +2,27 @@
 
 import logging
 
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfDataRate, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import Entity
 
 from . import DOMAIN, SIGNAL_SYSTEM_UPDATE, AAPModuleDevice
-from .const import CONF_MESSAGE_LOG_ENABLED, DEFAULT_MESSAGE_LOG_ENABLED, SIGNAL_MESSAGE_LOG_UPDATE
+from .const import (
+    MESSAGE_LOG_ATTRIBUTE_LINES,
+    SIGNAL_AREA_UPDATE,
+    SIGNAL_KEYPAD_UPDATE,
+    SIGNAL_MESSAGE_LOG_UPDATE,
+    SIGNAL_OUTPUT_UPDATE,
+    SIGNAL_STATS_UPDATE,
+    SIGNAL_ZONE_UPDATE,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,7 +33,8 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Perform the setup for AAP IP / Serial Module Sensor devices."""
-    controller = hass.data[DOMAIN][entry.entry_id]
+    hub = hass.data[DOMAIN][entry.entry_id]
+    controller = hub.controller
     
     devices = []
     
@@ -47,45 +61,79 @@ async def async_setup_entry(
             icon,
             device_class,
             controller.system_state,
-            controller,
+            hub,
         )
         devices.append(device)
     
     # Message log sensor (only if enabled)
-    message_log_enabled = entry.data.get(CONF_MESSAGE_LOG_ENABLED, DEFAULT_MESSAGE_LOG_ENABLED)
-    if message_log_enabled:
-        message_log = hass.data[DOMAIN].get(f"{entry.entry_id}_message_log")
-        if message_log is not None:
-            devices.append(
-                AAPModuleMessageLogSensor(hass, entry, message_log, controller)
-            )
+    if hub.message_log is not None:
+        devices.append(
+            AAPModuleMessageLogSensor(hass, entry, hub.message_log, hub)
+        )
     
+    # Line-received to state-written latency per signal (disabled by default)
+    latency_sensors = [
+        (SIGNAL_ZONE_UPDATE, "Zone Update Latency"),
+        (SIGNAL_AREA_UPDATE, "Area Update Latency"),
+        (SIGNAL_OUTPUT_UPDATE, "Output Update Latency"),
+        (SIGNAL_SYSTEM_UPDATE, "System Update Latency"),
+        (SIGNAL_KEYPAD_UPDATE, "Keypad Update Latency"),
+    ]
+    for signal, sensor_name in latency_sensors:
+        devices.append(AAPModuleLatencySensor(hass, entry, signal, sensor_name, hub))
+
+    # Connection and traffic statistics
+    traffic_sensors = [
+        # key, name, unit, device class, state class, icon
+        ("lines_per_second", "Lines per Second", "lines/s", None,
+         SensorStateClass.MEASUREMENT, "mdi:format-list-numbered"),
+        ("bytes_per_second", "Bytes per Second", UnitOfDataRate.BYTES_PER_SECOND,
+         SensorDeviceClass.DATA_RATE, SensorStateClass.MEASUREMENT, None),
+        ("parse_errors", "Parse Errors", None, None,
+         SensorStateClass.TOTAL_INCREASING, "mdi:alert-circle-outline"),
+        ("reconnects", "Reconnects", None, None,
+         SensorStateClass.TOTAL_INCREASING, "mdi:lan-disconnect"),
+        ("last_line_age", "Time Since Last Line", UnitOfTime.SECONDS,
+         SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT, None),
+        ("keepalive_rtt", "Keepalive Round Trip", UnitOfTime.MILLISECONDS,
+         SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT, None),
+        ("last_outage", "Last Outage Duration", UnitOfTime.SECONDS,
+         SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT, None),
+        ("command_queue_depth", "Command Queue Depth", None, None,
+         SensorStateClass.MEASUREMENT, "mdi:tray-full"),
+        ("command_wait", "Command Wait Time", UnitOfTime.MILLISECONDS,
+         SensorDeviceClass.DURATION, SensorStateClass.MEASUREMENT, None),
+    ]
+    for sensor_key, sensor_name, unit, device_class, state_class, icon in traffic_sensors:
+        devices.append(
+            AAPModuleTrafficSensor(
+                hass, entry, sensor_key, sensor_name, unit, device_class, state_class, icon, hub
+            )
+        )
+
     async_add_entities(devices)
 
 
 class AAPModuleSystemSensor(AAPModuleDevice, Entity):
     """Representation of an individual AAP IP / Serial Module system sensor."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, sensor_key: str, sensor_name: str, icon: str, device_class: str | None, info, controller) -> None:
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, sensor_key: str, sensor_name: str, icon: str, device_class: str | None, info, hub) -> None:
         """Initialize the sensor."""
         self._sensor_key = sensor_key
         self._icon = icon
         self._device_class = device_class
         _LOGGER.debug("Setting up system sensor: %s", sensor_name)
-        super().__init__(entry, sensor_name, info, controller, None, None, "system")
+        super().__init__(entry, sensor_name, info, hub, None, None, "system")
 
     async def async_added_to_hass(self):
         """Register callbacks."""
         _LOGGER.debug("Adding system sensor %s (%s) to Home Assistant", self._sensor_key, self._name)
-        self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_SYSTEM_UPDATE, self._update_callback)
-        )
+        self._async_subscribe(SIGNAL_SYSTEM_UPDATE, self._sensor_key)
         
-        # Force an initial state update
+        # Pick up the latest state; Home Assistant writes it once we return
         if hasattr(self._controller, 'system_state'):
             self._info = self._controller.system_state
             _LOGGER.debug("Initial system sensor %s state: %s", self._sensor_key, self._info)
-            self.async_schedule_update_ha_state()
 
     @property
     def icon(self):
@@ -107,7 +155,7 @@ class AAPModuleSystemSensor(AAPModuleDevice, Entity):
     @property
     def available(self):
         """Return if entity is available."""
-        return self._info is not None and "status" in self._info
+        return self._has_panel_state()
 
     @callback
     def _update_callback(self, system):
@@ -119,22 +167,23 @@ class AAPModuleSystemSensor(AAPModuleDevice, Entity):
         else:
             _LOGGER.warning("No system state data available for sensor %s", self._sensor_key)
         
-        self.async_schedule_update_ha_state()
+        self._async_write_if_changed()
 
 
 class AAPModuleMessageLogSensor(AAPModuleDevice, Entity):
-    """Sensor that tracks the last 5 raw messages received from the alarm panel."""
+    """Sensor that shows the most recent raw messages received from the alarm panel."""
+
+    # The message list changes with every refresh; keep it out of the recorder
+    _unrecorded_attributes = frozenset({"messages"})
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, message_log, controller) -> None:
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, message_log, hub) -> None:
         """Initialize the message log sensor."""
         self._message_log = message_log
-        super().__init__(entry, "Message Log", {}, controller, None, None, "system")
+        super().__init__(entry, "Message Log", {}, hub, None, None, "system")
 
     async def async_added_to_hass(self):
         """Register callbacks."""
-        self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_MESSAGE_LOG_UPDATE, self._update_callback)
-        )
+        self._async_subscribe(SIGNAL_MESSAGE_LOG_UPDATE)
 
     @property
     def icon(self):
@@ -145,8 +194,7 @@ class AAPModuleMessageLogSensor(AAPModuleDevice, Entity):
     def state(self):
         """Return the most recent raw message."""
         if self._message_log:
-            latest = self._message_log[-1]
-            return latest["raw"]
+            return self._message_log.latest
         return "No messages"
 
     @property
@@ -156,17 +204,87 @@ class AAPModuleMessageLogSensor(AAPModuleDevice, Entity):
 
     @property
     def extra_state_attributes(self):
-        """Return the last 5 raw messages as attributes."""
-        messages = list(self._message_log)
+        """Return the most recent raw messages as attributes."""
         return {
-            "message_count": len(messages),
-            "messages": [
-                {"timestamp": m["timestamp"], "raw": m["raw"]}
-                for m in messages
-            ],
+            "message_count": len(self._message_log),
+            "total_messages": self._message_log.total,
+            "buffer_size": self._message_log.size,
+            "messages": self._message_log.entries(MESSAGE_LOG_ATTRIBUTE_LINES),
         }
 
     @callback
     def _update_callback(self, data):
-        """Update when a new message is logged."""
-        self.async_schedule_update_ha_state()
\ No newline at end of file
+        """Update when new messages have been logged."""
+        self._async_write_if_changed()
+
+
+class AAPModuleLatencySensor(AAPModuleDevice, SensorEntity):
+    """Diagnostic sensor with the p99 latency from line received to state written."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-outline"
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, signal: str, sensor_name: str, hub) -> None:
+        """Initialize the latency sensor."""
+        self._signal = signal
+        super().__init__(entry, sensor_name, {}, hub, None, None, "system")
+
+    async def async_added_to_hass(self):
+        """Register callbacks."""
+        self._async_subscribe(SIGNAL_STATS_UPDATE)
+        self._info = self._summary()
+
+    def _summary(self):
+        """Return the hub's rolling latency summary for this signal."""
+        latency = self._hub.latency.get(self._signal)
+        return latency.summary() if latency is not None else {}
+
+    @property
+    def native_value(self):
+        """Return the p99 latency in milliseconds."""
+        return self._info.get("p99_ms")
+
+    @property
+    def extra_state_attributes(self):
+        """Return the full latency summary."""
+        return self._info
+
+    @callback
+    def _update_callback(self, data):
+        """Refresh from the hub's statistics on the stats timer."""
+        self._info = self._summary()
+        self._async_write_if_changed()
+
+
+class AAPModuleTrafficSensor(AAPModuleDevice, SensorEntity):
+    """Diagnostic sensor with one connection or traffic statistic."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, sensor_key: str, sensor_name: str, unit, device_class, state_class, icon, hub) -> None:
+        """Initialize the traffic sensor."""
+        self._sensor_key = sensor_key
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        self._attr_state_class = state_class
+        self._attr_icon = icon
+        super().__init__(entry, sensor_name, {}, hub, None, None, "system")
+
+    async def async_added_to_hass(self):
+        """Register callbacks."""
+        self._async_subscribe(SIGNAL_STATS_UPDATE)
+        self._info = self._hub.traffic_summary
+
+    @property
+    def native_value(self):
+        """Return the statistic from the last sample."""
+        return self._info.get(self._sensor_key)
+
+    @callback
+    def _update_callback(self, data):
+        """Refresh from the hub's latest traffic sample."""
+        self._info = self._hub.traffic_summary
+        self._async_write_if_changed()
@@ -0,0 +1,137 @@
+"""Integration-wide services for the AAP Alarm integration."""
+
+import logging
+from pathlib import Path
+
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError, Unauthorized, UnknownUser
+
+from .const import CAPTURE_DIR, DOMAIN
+from .hub import AAPAlarmHub
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_REPLAY_CAPTURE = "replay_capture"
+SERVICE_SET_OUTPUTS = "set_outputs"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_FILE = "file"
+ATTR_SPEED = "speed"
+ATTR_TURN_ON = "turn_on"
+ATTR_TURN_OFF = "turn_off"
+
+OUTPUT_NUMBERS = vol.All(
+    cv.ensure_list_csv, [vol.All(vol.Coerce(int), vol.Range(min=1, max=32))]
+)
+
+REPLAY_CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_FILE): cv.string,
+        vol.Optional(ATTR_SPEED, default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=1000)
+        ),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
+
+SET_OUTPUTS_SCHEMA = vol.All(
+    cv.has_at_least_one_key(ATTR_TURN_ON, ATTR_TURN_OFF),
+    vol.Schema(
+        {
+            vol.Optional(ATTR_TURN_ON, default=[]): OUTPUT_NUMBERS,
+            vol.Optional(ATTR_TURN_OFF, default=[]): OUTPUT_NUMBERS,
+            vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        }
+    ),
+)
+
+
+def async_get_hub(hass: HomeAssistant, entry_id: str | None) -> AAPAlarmHub:
+    """Return the hub for entry_id, or the only hub if none is given."""
+    hubs = {
+        key: hub
+        for key, hub in hass.data.get(DOMAIN, {}).items()
+        if isinstance(hub, AAPAlarmHub)
+    }
+    if entry_id is not None:
+        if entry_id not in hubs:
+            raise ServiceValidationError(f"No AAP Alarm panel with entry id {entry_id}")
+        return hubs[entry_id]
+    if len(hubs) != 1:
+        raise ServiceValidationError(
+            f"{len(hubs)} AAP Alarm panels are loaded, specify {ATTR_CONFIG_ENTRY_ID}"
+        )
+    return next(iter(hubs.values()))
+
+
+async def _async_check_admin(call: ServiceCall) -> None:
+    """Refuse a call made by a user who is not an administrator.
+
+    This is the check async_register_admin_service makes, which cannot
+    register services that return a response.
+    """
+    if call.context.user_id:
+        user = await call.hass.auth.async_get_user(call.context.user_id)
+        if user is None:
+            raise UnknownUser(context=call.context)
+        if not user.is_admin:
+            raise Unauthorized(context=call.context)
+
+
+async def _async_replay_capture(call: ServiceCall) -> dict:
+    """Replay a captured raw stream into a panel (administrators only)."""
+    await _async_check_admin(call)
+    hass = call.hass
+    hub = async_get_hub(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+
+    # Relative paths are taken from the config directory
+    path = Path(hass.config.path(call.data[ATTR_FILE])).resolve()
+    capture_root = Path(hass.config.path(CAPTURE_DIR)).resolve()
+    if not (path.is_relative_to(capture_root) or hass.config.is_allowed_path(str(path))):
+        raise ServiceValidationError(f"Access to {path} is not allowed")
+    if not await hass.async_add_executor_job(path.is_file):
+        raise ServiceValidationError(f"Capture file {path} does not exist")
+
+    report = await hub.async_replay(path, call.data[ATTR_SPEED])
+    _LOGGER.info("Replay of %s finished: %s", path, report)
+    return report
+
+
+async def _async_set_outputs(call: ServiceCall) -> dict:
+    """Switch several outputs of a panel in one batch."""
+    hub = async_get_hub(call.hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+    turn_on = set(call.data[ATTR_TURN_ON])
+    turn_off = set(call.data[ATTR_TURN_OFF])
+    if both := turn_on & turn_off:
+        raise ServiceValidationError(
+            f"Outputs {', '.join(map(str, sorted(both)))} are in both {ATTR_TURN_ON} and {ATTR_TURN_OFF}"
+        )
+    targets = {number: True for number in turn_on} | {number: False for number in turn_off}
+    if unknown := sorted(set(targets) - set(hub.controller.output_state)):
+        raise ServiceValidationError(
+            f"The panel does not have outputs {', '.join(map(str, unknown))}"
+        )
+
+    report = await hub.async_set_outputs(targets)
+    _LOGGER.debug("Outputs set: %s", report)
+    return report
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REPLAY_CAPTURE,
+        _async_replay_capture,
+        schema=REPLAY_CAPTURE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_OUTPUTS,
+        _async_set_outputs,
+        schema=SET_OUTPUTS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,111 @@
+"""Rolling performance statistics for the AAP Alarm integration."""
+
+import math
+from collections import deque
+
+LATENCY_WINDOW = 1000  # most recent samples kept per signal
+
+
+def percentile(samples, pct: float) -> float:
+    """Return the pct percentile of samples using nearest-rank."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered)))) - 1
+    return ordered[rank]
+
+
+class RollingLatency:
+    """Latencies of the most recent events of one kind, in seconds.
+
+    Recording a sample is an append; percentiles are only computed when a
+    summary is requested.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        """Initialize an empty window."""
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        """Record a sample."""
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, pct: float) -> float:
+        """Return the pct percentile of the window, in seconds."""
+        return percentile(self._samples, pct)
+
+    def summary(self) -> dict:
+        """Return the count and the window's p50/p95/p99/max in milliseconds."""
+        samples = self._samples
+        return {
+            "count": self.count,
+            "window": len(samples),
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "max_ms": round(max(samples, default=0.0) * 1000, 3),
+        }
+
+
+class TrafficStats:
+    """Cheap counters of the traffic on one panel connection.
+
+    The connection path only increments counters and stores timestamps;
+    rates and ages are worked out when sample() is called from the stats
+    timer.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.lines = 0
+        self.bytes = 0
+        self.parse_errors = 0
+        self.connects = 0
+        self.last_line: float | None = None  # monotonic
+        self.keepalive_rtt: float | None = None  # seconds
+        self._status_sent: float | None = None  # monotonic
+        self._sampled_at: float | None = None
+        self._sampled_lines = 0
+        self._sampled_bytes = 0
+
+    @property
+    def reconnects(self) -> int:
+        """Return how often the connection was re-established."""
+        return max(0, self.connects - 1)
+
+    def line_received(self, now: float) -> None:
+        """Count a line; the first line after a status request ends the round trip."""
+        self.lines += 1
+        self.last_line = now
+        if self._status_sent is not None:
+            self.keepalive_rtt = now - self._status_sent
+            self._status_sent = None
+
+    def status_sent(self, now: float) -> None:
+        """Remember when a status request went out, unless one is outstanding."""
+        if self._status_sent is None:
+            self._status_sent = now
+
+    def sample(self, now: float) -> dict:
+        """Return the current statistics, with rates since the previous sample."""
+        elapsed = now - self._sampled_at if self._sampled_at is not None else 0
+        if elapsed > 0:
+            lines_per_second = (self.lines - self._sampled_lines) / elapsed
+            bytes_per_second = (self.bytes - self._sampled_bytes) / elapsed
+        else:
+            lines_per_second = bytes_per_second = None
+        self._sampled_at = now
+        self._sampled_lines = self.lines
+        self._sampled_bytes = self.bytes
+        return {
+            "lines_per_second": round(lines_per_second, 2) if lines_per_second is not None else None,
+            "bytes_per_second": round(bytes_per_second, 1) if bytes_per_second is not None else None,
+            "lines": self.lines,
+            "bytes": self.bytes,
+            "parse_errors": self.parse_errors,
+            "reconnects": self.reconnects,
+            "last_line_age": round(now - self.last_line, 1) if self.last_line is not None else None,
+            "keepalive_rtt": round(self.keepalive_rtt * 1000, 1) if self.keepalive_rtt is not None else None,
+        }
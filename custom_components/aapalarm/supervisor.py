@@ -0,0 +1,208 @@
+"""Supervision of the connection to an AAP IP / Serial Module."""
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Callable
+from datetime import timedelta
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .stats import RollingLatency
+
+_LOGGER = logging.getLogger(__name__)
+
+RECONNECT_MIN_DELAY = 1.0  # seconds before the first reconnect attempt
+RECONNECT_MAX_DELAY = 300.0  # upper bound of the backoff
+RECONNECT_JITTER = 0.2  # delays vary randomly by up to this fraction
+DEAD_LINK_KEEPALIVES = 3  # keepalive intervals without a line before the link is dead
+
+
+def reconnect_delay(failures: int) -> float:
+    """Return the delay before reconnect attempt number failures + 1.
+
+    The delay doubles with every failed attempt up to RECONNECT_MAX_DELAY and
+    is jittered so that several panels behind one network outage do not
+    reconnect in lockstep.
+    """
+    delay = min(RECONNECT_MAX_DELAY, RECONNECT_MIN_DELAY * 2 ** min(failures, 16))
+    return delay * random.uniform(1 - RECONNECT_JITTER, 1 + RECONNECT_JITTER)
+
+
+class ConnectionSupervisor:
+    """Detect dead links and reconnect with exponential backoff.
+
+    The client's own reconnect (a fixed delay, and none at all when the
+    connection is refused) is replaced: every path that would reconnect ends
+    up in async_connection_down, which reports the outage once and schedules
+    a single attempt at a time. Until the panel has reported once, failures
+    are retried the same way but are not outages. A link that is open but silent for
+    DEAD_LINK_KEEPALIVES keepalive intervals is torn down and reconnected too.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        keepalive: float,
+        last_line: Callable[[], float | None],
+        on_down: Callable[[], None],
+    ) -> None:
+        """Initialize the supervisor.
+
+        last_line returns the perf_counter time of the most recent line and
+        on_down is called once when an outage starts.
+        """
+        self._hass = hass
+        self._keepalive = keepalive
+        self._last_line = last_line
+        self._on_down = on_down
+        self._client = None
+        self._unsub_check: CALLBACK_TYPE | None = None
+        self._unsub_retry: CALLBACK_TYPE | None = None
+        self._connect_task: asyncio.Task | None = None
+        self._connected_at: float | None = None
+        self._down_since: float | None = None
+        self._reporting = False  # the panel has reported since the start
+        self._reconnecting = False
+        self._stopped = False
+        self.failures = 0
+        self.outages = 0
+        self.dead_links = 0
+        # Outage start -> connection re-established
+        self.reconnect_time = RollingLatency()
+        # Outage start -> the panel reporting again
+        self.outage_time = RollingLatency()
+        self.last_outage: float | None = None
+
+    @property
+    def down(self) -> bool:
+        """Return True while an outage is in progress."""
+        return self._down_since is not None
+
+    def attach(self, client) -> None:
+        """Route the client's reconnects and connect errors through the supervisor."""
+        self._client = client
+        connect = client.connect
+
+        async def supervised_reconnect(delay):
+            # Called by the client on connection loss, connect timeouts and
+            # send errors; the delay it asks for is replaced by the backoff
+            self.async_connection_down()
+
+        async def supervised_connect():
+            try:
+                await connect()
+            except OSError as err:
+                # Refused or unreachable; the client itself would give up here
+                _LOGGER.debug("Connecting to the AAP IP / Serial Module failed: %s", err)
+                client.handle_connect_failure()
+
+        client.reconnect = supervised_reconnect
+        client.connect = supervised_connect
+
+    @callback
+    def async_start(self) -> None:
+        """Start watching for dead links."""
+        self._stopped = False
+        self._unsub_check = async_track_time_interval(
+            self._hass, self._async_check_link, timedelta(seconds=self._keepalive)
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop watching and cancel any pending reconnect."""
+        self._stopped = True
+        if self._unsub_check is not None:
+            self._unsub_check()
+            self._unsub_check = None
+        if self._unsub_retry is not None:
+            self._unsub_retry()
+            self._unsub_retry = None
+        if self._connect_task is not None:
+            self._connect_task.cancel()
+            self._connect_task = None
+
+    @callback
+    def async_connected(self) -> None:
+        """Handle an established connection."""
+        now = time.perf_counter()
+        self._connected_at = now
+        self._reconnecting = False
+        self.failures = 0
+        if self._down_since is not None:
+            self.reconnect_time.add(now - self._down_since)
+
+    @callback
+    def async_reporting(self) -> None:
+        """Handle the first line after a connection; this ends an outage."""
+        self._reporting = True
+        if self._down_since is None:
+            return
+        self.last_outage = time.perf_counter() - self._down_since
+        self.outage_time.add(self.last_outage)
+        self._down_since = None
+        _LOGGER.info("AAP IP / Serial Module is back after %.1f seconds", self.last_outage)
+
+    @callback
+    def async_connection_down(self) -> None:
+        """Report the outage (once) and schedule the next connection attempt."""
+        if self._stopped:
+            return
+        if self._reconnecting:
+            # An attempt failed
+            self.failures += 1
+        elif not self._reporting:
+            # Nothing was lost; the first connection never got going
+            _LOGGER.warning("The initial connection to the AAP IP / Serial Module failed")
+        elif self._down_since is None:
+            self._down_since = time.perf_counter()
+            self.outages += 1
+            self._on_down()
+        if self._unsub_retry is not None:
+            return
+        delay = reconnect_delay(self.failures)
+        _LOGGER.info("Reconnecting to the AAP IP / Serial Module in %.1f seconds", delay)
+        self._reconnecting = True
+        self._unsub_retry = self._hass.loop.call_later(delay, self._async_reconnect).cancel
+
+    @callback
+    def _async_reconnect(self) -> None:
+        """Drop what is left of the old connection and connect again."""
+        self._unsub_retry = None
+        if self._stopped or self._client is None:
+            return
+        self._client.disconnect()
+        self._connect_task = self._hass.async_create_background_task(
+            self._client.connect(), "aapalarm reconnect"
+        )
+
+    @callback
+    def _async_check_link(self, now=None) -> None:
+        """Tear down a connection that has gone quiet."""
+        client = self._client
+        if client is None or not client._connected or self._connected_at is None:
+            return
+        last = max(self._connected_at, self._last_line() or 0)
+        silent = time.perf_counter() - last
+        if silent > self._keepalive * DEAD_LINK_KEEPALIVES:
+            _LOGGER.warning(
+                "No data from the AAP IP / Serial Module for %.0f seconds, reconnecting",
+                silent,
+            )
+            self.dead_links += 1
+            self._connected_at = None
+            # Closing the transport ends in connection_lost and a reconnect
+            client.disconnect()
+
+    def summary(self) -> dict:
+        """Return the reconnect statistics."""
+        return {
+            "outages": self.outages,
+            "dead_links": self.dead_links,
+            "failed_attempts": self.failures,
+            "last_outage": round(self.last_outage, 1) if self.last_outage is not None else None,
+            "reconnect_time": self.reconnect_time.summary(),
+            "outage_time": self.outage_time.summary(),
+        }
@@ -4,17 +4,21 @@ import logging
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.const import STATE_ON
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import (
+    ATTR_RESTORED,
     CONF_OUTPUTNAME,
+    CONF_OUTPUTS,
     DOMAIN,
     OUTPUT_SCHEMA,
+    SIGNAL_DEVICES_ADDED,
     SIGNAL_OUTPUT_UPDATE,
     AAPModuleDevice,
+    format_signal,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -26,18 +30,35 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Perform the setup for AAP IP / Serial Module Switch devices."""
-    controller = hass.data[DOMAIN][entry.entry_id]
+    hub = hass.data[DOMAIN][entry.entry_id]
     configured_outputs = entry.data.get("outputs", {})
 
     _LOGGER.debug(str(configured_outputs))
 
+    @callback
+    def async_add_outputs(section, outputs):
+        """Add the entities of outputs configured after setup."""
+        if section == CONF_OUTPUTS:
+            async_add_entities(_output_entities(hass, entry, hub, outputs))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, format_signal(SIGNAL_DEVICES_ADDED, entry.entry_id), async_add_outputs
+        )
+    )
+    async_add_entities(_output_entities(hass, entry, hub, configured_outputs))
+
+
+def _output_entities(hass: HomeAssistant, entry: ConfigEntry, hub, configured_outputs) -> list:
+    """Create the switches of the given outputs."""
+    controller = hub.controller
     devices = []
     if configured_outputs is not None:
         for output_num in configured_outputs:
             device_config_data = OUTPUT_SCHEMA(configured_outputs[output_num])
             
             # Get output state, fallback to empty dict if not available  
-            output_info = getattr(controller, 'output_state', {}).get(output_num, {"status": {"open": False}})
+            output_info = getattr(controller, 'output_state', {}).get(int(output_num), {"status": {"open": False}})
             
             device = AAPModuleOutput(
                 hass,
@@ -45,38 +66,36 @@ async def async_setup_entry(
                 output_num,
                 device_config_data[CONF_OUTPUTNAME],
                 output_info,
-                controller,
+                hub,
             )
             devices.append(device)
-
-    async_add_entities(devices)
+    return devices
 
 
 class AAPModuleOutput(AAPModuleDevice, SwitchEntity):
     """Representation of an AAP IP / Serial Module Output Switch."""
 
     def __init__(
-        self, hass: HomeAssistant, entry: ConfigEntry, output_number, output_name, info, controller
+        self, hass: HomeAssistant, entry: ConfigEntry, output_number, output_name, info, hub
     ) -> None:
         """Initialize the switch."""
-        self._output_number = output_number
+        self._output_number = int(output_number)  # JSON deserializes dict keys as strings
         _LOGGER.debug("Setting up output switch for system")
-        super().__init__(entry, output_name, info, controller, None, None, "outputs")
+        super().__init__(entry, output_name, info, hub, None, None, "outputs")
         self._name = output_name
-        self._state = STATE_OFF
 
     async def async_added_to_hass(self):
         """Register callbacks."""
         _LOGGER.debug("Adding output %s (%s) to Home Assistant", self._output_number, self._name)
-        self.async_on_remove(
-            async_dispatcher_connect(self.hass, SIGNAL_OUTPUT_UPDATE, self._update_callback)
-        )
-        
-        # Force an initial state update
+        self._async_subscribe(SIGNAL_OUTPUT_UPDATE, self._output_number)
+
+        if await self._async_restore_state(SIGNAL_OUTPUT_UPDATE, self._output_number):
+            return
+
+        # Pick up the latest state; Home Assistant writes it once we return
         if hasattr(self._controller, 'output_state') and self._output_number in self._controller.output_state:
             self._info = self._controller.output_state[self._output_number]
             _LOGGER.debug("Initial output %s state: %s", self._output_number, self._info)
-            self.async_schedule_update_ha_state()
 
     @property
     def name(self):
@@ -93,35 +112,40 @@ class AAPModuleOutput(AAPModuleDevice, SwitchEntity):
     @property
     def available(self):
         """Return if entity is available."""
-        return self._info is not None and "status" in self._info
+        return self._has_panel_state()
+
+    @property
+    def extra_state_attributes(self):
+        """Return the state attributes."""
+        if self._restored:
+            return {ATTR_RESTORED: True}
+        return None
+
+    def _info_from_restored(self, state):
+        """Return the output info for a restored state."""
+        return {"status": {"open": state.state == STATE_ON}}
 
     async def async_turn_on(self, **kwargs):
         """Turn on the output."""
-        self._controller.command_output(str(self._output_number))
-        self._state = STATE_ON
-        self.async_schedule_update_ha_state()
+        await self._hub.async_set_outputs({self._output_number: True})
 
     async def async_turn_off(self, **kwargs):
         """Turn off the output."""
-        self._controller.command_output(str(self._output_number))
-        self._state = STATE_OFF
-        self.async_schedule_update_ha_state()
+        await self._hub.async_set_outputs({self._output_number: False})
 
     @callback
     def _update_callback(self, output):
-        """Update the output state in HA, if needed."""
-        _LOGGER.debug("Output update callback triggered for output %s, target output %s", output, self._output_number)
-        
-        try:
-            if output is None or int(output) == int(self._output_number):
-                # Update the output info from the controller using integer key
-                output_key = int(self._output_number)  # Ensure we use integer key
-                if hasattr(self._controller, 'output_state') and output_key in self._controller.output_state:
-                    self._info = self._controller.output_state[output_key]
-                    _LOGGER.debug("Updated output %s state", self._output_number)
-                else:
-                    _LOGGER.warning("No output state data available for output %s", self._output_number)
-                
-                self.async_schedule_update_ha_state()
-        except (ValueError, TypeError) as e:
-            _LOGGER.error("Error processing output update callback for output %s: %s", self._output_number, e)
\ No newline at end of file
+        """Update the output state in HA.
+
+        Only called for this output, or with None when every output should refresh.
+        """
+        _LOGGER.debug("Output update callback triggered for output %s", self._output_number)
+        if not self._async_confirm(SIGNAL_OUTPUT_UPDATE, self._output_number):
+            return
+        if hasattr(self._controller, 'output_state') and self._output_number in self._controller.output_state:
+            self._info = self._controller.output_state[self._output_number]
+            _LOGGER.debug("Updated output %s state", self._output_number)
+        else:
+            _LOGGER.warning("No output state data available for output %s", self._output_number)
+
+        self._async_write_if_changed()
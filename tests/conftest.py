@@ -0,0 +1,81 @@
+"""Shared fixtures for the unit tests."""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pyaapalarmmodule import AAPModuleClient
+
+from custom_components.aapalarm.hub import AAPAlarmHub
+
+
+@pytest.fixture
+def loop():
+    """Return a private event loop, closed after the test.
+
+    Tasks still pending at the end of the test are cancelled first, so a
+    failing test does not leave the loop (or its sockets) open.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop
+    pending = asyncio.all_tasks(loop)
+    for task in pending:
+        task.cancel()
+    if pending:
+        loop.run_until_complete(asyncio.wait(pending))
+    loop.run_until_complete(loop.shutdown_default_executor())
+    loop.close()
+
+
+@pytest.fixture
+def run(loop):
+    """Return a function that runs a coroutine on the test's loop."""
+    return loop.run_until_complete
+
+
+@pytest.fixture
+def hass(loop):
+    """Return a fake hass bound to the test's loop.
+
+    Background tasks become tasks on the loop and executor jobs run in the
+    loop's default executor.
+    """
+    hass = MagicMock()
+    hass.loop = loop
+    hass.data = {}
+    hass.async_create_background_task = lambda coro, name: loop.create_task(coro)
+    hass.async_add_executor_job = lambda target, *args: loop.run_in_executor(None, target, *args)
+    return hass
+
+
+@pytest.fixture
+def make_hub(hass):
+    """Return a function that creates a hub for entry1 on the fake hass.
+
+    Keyword arguments are added to an IP configuration for 127.0.0.1.
+    """
+
+    def make_hub(**conf) -> AAPAlarmHub:
+        conf = {"connectiontype": "ip", "host": "127.0.0.1", **conf}
+        with patch("custom_components.aapalarm.hub.asyncio.get_event_loop", return_value=hass.loop):
+            return AAPAlarmHub(hass, "entry1", conf)
+
+    return make_hub
+
+
+@pytest.fixture
+def attach_client(loop):
+    """Return a function that gives a hub a real client whose send_data is a mock.
+
+    The hub is marked ready, as if the panel had reported, and the client is
+    returned so that tests can feed it panel lines with process_line.
+    """
+
+    def attach_client(hub: AAPAlarmHub) -> AAPModuleClient:
+        client = AAPModuleClient(hub.controller, loop)
+        client.send_data = MagicMock()
+        hub.controller._client = client
+        hub.ready = True
+        return client
+
+    return attach_client
@@ -0,0 +1,31 @@
+"""Smoke tests for the end-to-end pipeline benchmark."""
+
+from tools.benchmark import async_run_case, percentile
+
+
+class TestPercentile:
+    """Tests for the nearest-rank percentile."""
+
+    def test_empty(self):
+        assert percentile([], 99) == 0.0
+
+    def test_nearest_rank(self):
+        samples = list(range(1, 101))
+        assert percentile(samples, 50) == 50
+        assert percentile(samples, 99) == 99
+        assert percentile(samples, 100) == 100
+
+
+class TestBenchmarkCase:
+    """Tests that a small case runs through the real entities."""
+
+    def test_every_line_reaches_a_state_write(self, run):
+        result = run(async_run_case(2, 2, lines=100, warmup=2))
+        assert result["lines"] >= 100
+        assert result["unresolved"] == 0
+        assert result["state_writes"] >= result["lines"]
+        assert 0 < result["latency_ms"]["p50"] <= result["latency_ms"]["p99"]
+
+    def test_more_zones_than_the_protocol_allows(self, run):
+        result = run(async_run_case(20, 1, lines=50, warmup=1))
+        assert result["unresolved"] == 0
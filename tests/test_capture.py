@@ -0,0 +1,101 @@
+"""Unit tests for the on-disk raw stream capture."""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from custom_components.aapalarm.capture import (
+    CAPTURE_FLUSH_LINES,
+    StreamCapture,
+    format_capture_line,
+    parse_capture_line,
+)
+
+
+@pytest.fixture
+def make_capture(hass, tmp_path):
+    """Return a function creating a capture under tmp_path."""
+
+    def make_capture(max_bytes=1024 * 1024, max_age=86400):
+        return StreamCapture(hass, tmp_path / "capture", max_bytes, max_age)
+
+    return make_capture
+
+
+async def _drain(capture):
+    """Wait until every queued line has been written."""
+    capture.async_flush()
+    while capture._writing or capture._pending:
+        await asyncio.sleep(0.01)
+
+
+class TestCaptureFormat:
+    """Tests for the on-disk line format."""
+
+    def test_round_trip(self):
+        assert parse_capture_line(format_capture_line(1700000000.25, "ZO12")) == (
+            1700000000.25,
+            "ZO12",
+        )
+
+    def test_rejects_other_lines(self):
+        assert parse_capture_line("ZO12\n") is None
+        assert parse_capture_line("abc\tZO12\n") is None
+
+
+class TestStreamCapture:
+    """Tests for batching, rotation and pruning."""
+
+    def test_lines_written_in_order(self, make_capture, run):
+        capture = make_capture()
+        for number in range(1, 6):
+            capture.append(f"ZO{number}")
+        assert not capture.path.exists()  # nothing written on the loop
+        run(_drain(capture))
+        lines = capture.path.read_text().splitlines()
+        assert [parse_capture_line(line)[1] for line in lines] == [
+            "ZO1", "ZO2", "ZO3", "ZO4", "ZO5"
+        ]
+        assert capture.lines_written == 5
+
+    def test_large_burst_flushes_without_waiting(self, make_capture, run):
+        capture = make_capture()
+        for _ in range(CAPTURE_FLUSH_LINES):
+            capture.append("ZO1")
+        assert capture._writing
+        run(_drain(capture))
+        assert capture.lines_written == CAPTURE_FLUSH_LINES
+
+    def test_rotation_bounds_total_size(self, make_capture, run):
+        capture = make_capture(max_bytes=2000)
+        for batch in range(20):
+            for number in range(10):
+                capture.append(f"ZO{number}")
+            run(_drain(capture))
+        assert capture.rotations > 0
+        total = sum(path.stat().st_size for path in capture.files())
+        batch_bytes = len(format_capture_line(time.time(), "ZO0")) * 10
+        assert total <= 2000 + batch_bytes
+
+    def test_prune_removes_old_files(self, make_capture):
+        capture = make_capture(max_age=3600)
+        capture.directory.mkdir(parents=True)
+        old = capture.directory / "capture-20200101T000000.log"
+        old.write_text("1.000\tZO1\n")
+        stamp = time.time() - 7200
+        os.utime(old, (stamp, stamp))
+        recent = capture.directory / "capture-20990101T000000.log"
+        recent.write_text("1.000\tZO1\n")
+        capture.prune()
+        assert not old.exists()
+        assert recent.exists()
+
+    def test_closed_capture_ignores_lines(self, make_capture, run):
+        capture = make_capture()
+        capture.append("ZO1")
+        capture.async_close()
+        capture.append("ZO2")
+        run(_drain(capture))
+        assert capture.lines_written == 1
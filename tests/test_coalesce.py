@@ -0,0 +1,114 @@
+"""Unit tests for coalescing bursts of panel updates."""
+
+import asyncio
+
+import pytest
+
+from custom_components.aapalarm.coalesce import UpdateCoalescer
+
+
+@pytest.fixture
+def make_coalescer(hass):
+    """Return a function creating a coalescer with a recording dispatch."""
+
+    def make_coalescer(window=0):
+        dispatched = []
+        coalescer = UpdateCoalescer(
+            hass, lambda signal, key, received: dispatched.append((signal, key)), window
+        )
+        return coalescer, dispatched
+
+    return make_coalescer
+
+
+def _run_once(run):
+    """Let the loop run the callbacks that are currently scheduled."""
+    run(asyncio.sleep(0))
+
+
+class TestCoalescing:
+    """Tests that bursts are flushed once per loop iteration."""
+
+    def test_nothing_dispatched_before_flush(self, make_coalescer):
+        coalescer, dispatched = make_coalescer()
+        coalescer.async_mark("zones", 1)
+        assert dispatched == []
+
+    def test_repeated_key_dispatched_once(self, make_coalescer, run):
+        coalescer, dispatched = make_coalescer()
+        for _ in range(10):
+            coalescer.async_mark("zones", 1)
+        _run_once(run)
+        assert dispatched == [("zones", 1)]
+        assert coalescer.flushes == 1
+
+    def test_distinct_keys_all_dispatched(self, make_coalescer, run):
+        coalescer, dispatched = make_coalescer()
+        coalescer.async_mark("zones", 1)
+        coalescer.async_mark("zones", 2)
+        coalescer.async_mark("outputs", 1)
+        _run_once(run)
+        assert sorted(dispatched) == [("outputs", 1), ("zones", 1), ("zones", 2)]
+
+    def test_refresh_all_supersedes_keys(self, make_coalescer, run):
+        coalescer, dispatched = make_coalescer()
+        coalescer.async_mark("zones", 1)
+        coalescer.async_mark("zones", None)
+        _run_once(run)
+        assert dispatched == [("zones", None)]
+
+    def test_immediate_dispatches_now(self, make_coalescer, run):
+        """Alarm transitions bypass the batch and are not repeated at flush."""
+        coalescer, dispatched = make_coalescer()
+        coalescer.async_mark("areas", 1)
+        coalescer.async_mark("areas", 1, immediate=True)
+        assert dispatched == [("areas", 1)]
+        _run_once(run)
+        assert dispatched == [("areas", 1)]
+
+    def test_window_delays_flush(self, make_coalescer, run):
+        coalescer, dispatched = make_coalescer(window=0.05)
+        coalescer.async_mark("zones", 1)
+        _run_once(run)
+        assert dispatched == []
+        run(asyncio.sleep(0.1))
+        assert dispatched == [("zones", 1)]
+
+    def test_cancel_drops_pending(self, make_coalescer, run):
+        coalescer, dispatched = make_coalescer()
+        coalescer.async_mark("zones", 1)
+        coalescer.async_cancel()
+        _run_once(run)
+        assert dispatched == []
+
+
+class TestReceivedTimes:
+    """Tests that the oldest line time is carried to the dispatch."""
+
+    def _make(self, hass):
+        dispatched = []
+        coalescer = UpdateCoalescer(
+            hass, lambda signal, key, received: dispatched.append((signal, key, received))
+        )
+        return coalescer, dispatched
+
+    def test_oldest_time_kept(self, hass, run):
+        coalescer, dispatched = self._make(hass)
+        coalescer.async_mark("zones", 1, received=1.0)
+        coalescer.async_mark("zones", 1, received=2.0)
+        _run_once(run)
+        assert dispatched == [("zones", 1, 1.0)]
+
+    def test_refresh_all_takes_oldest_of_keys(self, hass, run):
+        coalescer, dispatched = self._make(hass)
+        coalescer.async_mark("zones", 1, received=3.0)
+        coalescer.async_mark("zones", 2, received=2.0)
+        coalescer.async_mark("zones", None)
+        _run_once(run)
+        assert dispatched == [("zones", None, 2.0)]
+
+    def test_immediate_uses_pending_time(self, hass):
+        coalescer, dispatched = self._make(hass)
+        coalescer.async_mark("areas", 1, received=1.0)
+        coalescer.async_mark("areas", 1, immediate=True, received=5.0)
+        assert dispatched == [("areas", 1, 1.0)]
@@ -0,0 +1,315 @@
+"""Unit tests for the command queue."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import voluptuous as vol
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.aapalarm.commands import (
+    MERGE_DROP,
+    MERGE_TOGGLE,
+    PRIORITY_ALARM,
+    PRIORITY_ARM,
+    PRIORITY_NORMAL,
+    CommandQueue,
+)
+from custom_components.aapalarm.const import SIGNAL_AREA_UPDATE
+from custom_components.aapalarm.hub import OUTPUT_MAX_ATTEMPTS
+from custom_components.aapalarm.services import SET_OUTPUTS_SCHEMA
+from custom_components.aapalarm.switch import AAPModuleOutput
+
+
+class TestCommandQueue:
+    """Tests for ordering, pacing and merging."""
+
+    def test_urgent_commands_first(self, hass, run):
+        queue = CommandQueue(hass, 0)
+        sent = []
+
+        async def scenario():
+            queue.async_submit(PRIORITY_NORMAL, "send_keypress", sent.append, "1")
+            queue.async_submit(PRIORITY_NORMAL, "command_output", sent.append, "3")
+            queue.async_submit(PRIORITY_ARM, "arm_away", sent.append, "arm")
+            disarm = queue.async_submit(PRIORITY_ALARM, "disarm", sent.append, "disarm")
+            await asyncio.sleep(0.05)
+            return await disarm
+
+        assert run(scenario()) is True
+        assert sent == ["disarm", "arm", "1", "3"]
+
+    def test_paced(self, hass, run):
+        queue = CommandQueue(hass, 0.05)
+
+        async def scenario():
+            started = time.perf_counter()
+            futures = [
+                queue.async_submit(PRIORITY_NORMAL, "send_keypress", lambda: None)
+                for _ in range(3)
+            ]
+            await asyncio.gather(*futures)
+            return time.perf_counter() - started
+
+        assert run(scenario()) >= 0.1
+        assert queue.sent == 3
+        assert queue.wait_time.count == 3
+
+    def test_duplicate_dropped(self, hass, run):
+        queue = CommandQueue(hass, 0)
+        action = MagicMock()
+
+        async def scenario():
+            first = queue.async_submit(PRIORITY_ARM, "arm_away", action, merge=MERGE_DROP)
+            second = queue.async_submit(PRIORITY_ARM, "arm_away", action, merge=MERGE_DROP)
+            assert first is second
+            return await first
+
+        assert run(scenario()) is True
+        action.assert_called_once()
+
+    def test_toggles_cancel_out(self, hass, run):
+        queue = CommandQueue(hass, 0.01)
+        action = MagicMock()
+
+        async def scenario():
+            # Occupy the worker so the toggles stay queued
+            queue.async_submit(PRIORITY_NORMAL, "send_keypress", lambda: None)
+            first = queue.async_submit(PRIORITY_NORMAL, "command_output", action, "3", merge=MERGE_TOGGLE)
+            second = queue.async_submit(PRIORITY_NORMAL, "command_output", action, "3", merge=MERGE_TOGGLE)
+            third = queue.async_submit(PRIORITY_NORMAL, "command_output", action, "3", merge=MERGE_TOGGLE)
+            return await asyncio.gather(first, second, third)
+
+        assert run(scenario()) == [False, False, True]
+        action.assert_called_once_with("3")
+        assert queue.merged == 1
+
+    def test_failure_reported(self, hass, run):
+        queue = CommandQueue(hass, 0)
+        result = run(queue.async_submit(PRIORITY_NORMAL, "send_keypress", MagicMock(side_effect=RuntimeError)))
+        assert result is False
+        assert queue.failed == 1
+
+    def test_stop_drops_pending(self, hass, run):
+        queue = CommandQueue(hass, 0)
+        action = MagicMock()
+        future = queue.async_submit(PRIORITY_NORMAL, "send_keypress", action)
+        queue.async_stop()
+        assert run(future) is False
+        action.assert_not_called()
+
+
+class TestHubCommands:
+    """Tests that controller commands go through the hub's queue."""
+
+    def test_controller_methods_queued(self, make_hub, run):
+        with patch("pyaapalarmmodule.AAPAlarmPanel.disarm") as disarm:
+            hub = make_hub()
+            future = hub.controller.disarm("1234")
+            disarm.assert_not_called()
+            assert run(future) is True
+        disarm.assert_called_once_with("1234")
+        assert hub.commands.sent == 1
+
+
+@pytest.fixture
+def hub(make_hub, attach_client):
+    """Return a ready hub whose client records what it sends."""
+    hub = make_hub(command_timeout=1)
+    attach_client(hub)
+    return hub
+
+
+def _armed(hub):
+    return lambda: hub.controller.area_state[1]["status"]["exit_delay"]
+
+
+class TestConfirmedCommands:
+    """Tests for commands that wait for the panel to report their effect."""
+
+    def test_completes_when_panel_reports(self, hub, loop, run):
+        client = hub.controller._client
+
+        async def scenario():
+            command = loop.create_task(
+                hub.async_send_confirmed(
+                    "arm_away", SIGNAL_AREA_UPDATE, 1, _armed(hub), hub.controller.arm_away
+                )
+            )
+            await asyncio.sleep(0.01)
+            assert not command.done()
+            client.process_line("EAA")
+            await command
+
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send"):
+            run(scenario())
+        client.send_data.assert_called_once()
+        assert hub.command_latency_summary()["arm_away"]["count"] == 1
+
+    def test_other_area_does_not_confirm(self, hub, loop, run):
+        hub.command_timeout = 0.05
+
+        async def scenario():
+            command = loop.create_task(
+                hub.async_send_confirmed(
+                    "arm_away", SIGNAL_AREA_UPDATE, 1, _armed(hub), hub.controller.arm_away
+                )
+            )
+            await asyncio.sleep(0.01)
+            hub.controller._client.process_line("EAB")
+            await command
+
+        with (
+            patch("custom_components.aapalarm.hub.async_dispatcher_send"),
+            pytest.raises(HomeAssistantError, match="did not confirm arm_away"),
+        ):
+            run(scenario())
+        assert hub.command_timeouts["arm_away"] == 1
+        assert hub._confirmations == []
+
+    def test_not_connected(self, hub, run):
+        hub.ready = False
+        with pytest.raises(HomeAssistantError, match="not connected"):
+            run(
+                hub.async_send_confirmed(
+                    "arm_away", SIGNAL_AREA_UPDATE, 1, _armed(hub), hub.controller.arm_away
+                )
+            )
+
+
+class TestSetOutputs:
+    """Tests for switching several outputs in one batch."""
+
+    def test_only_needed_outputs_toggled(self, hub, loop, run):
+        client = hub.controller._client
+        hub.commands._interval = 0.01
+        hub.controller.output_state[2]["status"]["open"] = True
+        toggled = []
+
+        def send_data(data):
+            # The panel answers each toggle with the output's new state
+            number = data.removeprefix("OO")
+            toggled.append(number)
+            state = "OC" if hub.controller.output_state[int(number)]["status"]["open"] else "OO"
+            loop.call_soon(client.process_line, f"{state}{number}")
+
+        client.send_data = send_data
+
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send"):
+            report = run(hub.async_set_outputs({1: True, 2: True, 3: True, 4: False}))
+        assert toggled == ["1", "3"]
+        assert report["changed"] == [1, 3]
+        assert report["unchanged"] == [2, 4]
+        assert all(hub.controller.output_state[n]["status"]["open"] for n in (1, 2, 3))
+
+    def test_unconfirmed_outputs_reported(self, hub, run):
+        hub.command_timeout = 0.05
+        with pytest.raises(HomeAssistantError, match="did not confirm outputs 1"):
+            run(hub.async_set_outputs({1: True}))
+        hub.controller._client.send_data.assert_called_once()
+
+    def test_output_outside_table_rejected(self, hub, run):
+        number = max(hub.controller.output_state) + 1
+        output = AAPModuleOutput(
+            None, MagicMock(entry_id="entry1"), number, "Garage", {}, hub
+        )
+        with pytest.raises(HomeAssistantError, match=f"does not have outputs {number}"):
+            run(output.async_turn_on())
+        hub.controller._client.send_data.assert_not_called()
+        # A stray panel report for it does not reconcile anything either
+        hub._output_targets[number] = True
+        hub._async_reconcile_output(number)
+        hub.controller._client.send_data.assert_not_called()
+
+    def test_schema(self):
+        assert SET_OUTPUTS_SCHEMA({"turn_on": "1, 3", "turn_off": 2}) == {
+            "turn_on": [1, 3],
+            "turn_off": [2],
+        }
+        with pytest.raises(vol.Invalid):
+            SET_OUTPUTS_SCHEMA({})
+        with pytest.raises(vol.Invalid):
+            SET_OUTPUTS_SCHEMA({"turn_on": [33]})
+
+
+def _answer_toggles(hub, loop, answer):
+    """Make the panel answer each toggle with answer(number, was_open); return the toggles."""
+    client = hub.controller._client
+    hub.commands._interval = 0.01
+    toggled = []
+
+    def send_data(data):
+        number = int(data.removeprefix("OO"))
+        toggled.append(number)
+        is_open = answer(number, hub.controller.output_state[number]["status"]["open"])
+        loop.call_soon(client.process_line, f"{'OO' if is_open else 'OC'}{number}")
+
+    client.send_data = send_data
+    return toggled
+
+
+class TestOutputTargets:
+    """Tests for switching outputs to a target state rather than toggling."""
+
+    def test_already_on_not_toggled(self, hub, loop, run):
+        toggled = _answer_toggles(hub, loop, lambda number, was_open: not was_open)
+        hub.controller.output_state[1]["status"]["open"] = True
+        report = run(hub.async_set_outputs({1: True}))
+        assert toggled == []
+        assert report["unchanged"] == [1]
+
+    def test_rapid_on_off_ends_off(self, hub, loop, run):
+        toggled = _answer_toggles(hub, loop, lambda number, was_open: not was_open)
+
+        async def scenario():
+            turn_on = loop.create_task(hub.async_set_outputs({1: True}))
+            await asyncio.sleep(0)
+            await hub.async_set_outputs({1: False})
+            await turn_on
+
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send"):
+            run(scenario())
+        assert toggled == [1, 1]
+        assert hub.controller.output_state[1]["status"]["open"] is False
+        assert hub._output_targets == {}
+
+    def test_unexpected_state_corrected(self, hub, loop, run):
+        answers = iter([False, True])
+        toggled = _answer_toggles(hub, loop, lambda number, was_open: next(answers))
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send"):
+            run(hub.async_set_outputs({1: True}))
+        assert toggled == [1, 1]
+        assert hub.output_corrections == 1
+
+    def test_gives_up_on_stuck_output(self, hub, loop, run):
+        toggled = _answer_toggles(hub, loop, lambda number, was_open: False)
+        hub.command_timeout = 0.2
+        with (
+            patch("custom_components.aapalarm.hub.async_dispatcher_send"),
+            pytest.raises(HomeAssistantError, match="did not confirm outputs 1"),
+        ):
+            run(hub.async_set_outputs({1: True}))
+        assert len(toggled) == OUTPUT_MAX_ATTEMPTS
+        assert hub._output_targets == {}
+
+    def test_timed_out_output_sent_again(self, hub, loop, run):
+        client = hub.controller._client
+        hub.command_timeout = 0.05
+        with pytest.raises(HomeAssistantError, match="did not confirm outputs 1"):
+            run(hub.async_set_outputs({1: True}))
+        assert hub._outputs_in_flight == set()
+
+        # The panel answers this time
+        sent = []
+
+        def send_data(data):
+            sent.append(data)
+            loop.call_soon(client.process_line, "OO1")
+
+        client.send_data = send_data
+        hub.command_timeout = 1
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send"):
+            report = run(hub.async_set_outputs({1: True}))
+        assert sent == ["OO1"]
+        assert report["changed"] == [1]
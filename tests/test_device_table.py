@@ -0,0 +1,130 @@
+"""Unit tests for importing and exporting devices as a table."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from custom_components.aapalarm.config_flow import AAPAlarmConfigFlow
+from custom_components.aapalarm.device_table import (
+    DeviceTableError,
+    format_device_table,
+    keep_area_codes,
+    parse_device_table,
+)
+
+TABLE = """\
+# a comment
+area,1,House,1234,true,false
+zone,1,Front Door,opening
+zone,2,"Hall, upstairs"
+
+output,3,Siren
+"""
+
+
+class TestParseDeviceTable:
+    """Tests for reading a pasted table."""
+
+    def test_csv(self):
+        devices = parse_device_table(TABLE)
+        assert devices["areas"] == {
+            1: {"name": "House", "code": "1234", "code_arm_required": True, "code_panic_required": False}
+        }
+        assert devices["zones"] == {
+            1: {"name": "Front Door", "type": "opening"},
+            2: {"name": "Hall, upstairs", "type": "motion"},
+        }
+        assert devices["outputs"] == {3: {"name": "Siren"}}
+
+    def test_yaml(self):
+        devices = parse_device_table(
+            "zones:\n  5: {name: Garage, type: shock}\noutputs:\n  1: Gate\n"
+        )
+        assert devices == {
+            "areas": {},
+            "zones": {5: {"name": "Garage", "type": "shock"}},
+            "outputs": {1: {"name": "Gate"}},
+        }
+
+    def test_export_reads_back(self):
+        devices = parse_device_table(TABLE)
+        exported = format_device_table(devices["areas"], devices["zones"], devices["outputs"])
+        read_back = parse_device_table(exported)
+        read_back["areas"] = keep_area_codes(read_back["areas"], devices["areas"])
+        assert read_back == devices
+
+    def test_export_masks_codes(self):
+        exported = format_device_table(
+            {"1": {"name": "House", "code": "1234"}, "2": {"name": "Shed", "code": ""}}, {}, {}
+        )
+        assert "1234" not in exported
+        assert exported.splitlines()[-2:] == ["area,1,House,****,true,true", "area,2,Shed,,true,true"]
+
+    def test_masked_or_blank_code_keeps_current(self):
+        areas = parse_device_table("area,1,House,****\narea,2,Shed")["areas"]
+        current = {"1": {"name": "House", "code": "1234"}, "2": {"name": "Shed", "code": "5678"}}
+        kept = keep_area_codes(areas, current)
+        assert [kept[1]["code"], kept[2]["code"]] == ["1234", "5678"]
+        # A new code, or an area that had none, is taken as given
+        areas = parse_device_table("area,1,House,9999\narea,2,Shed,****")["areas"]
+        kept = keep_area_codes(areas, {"1": {"name": "House", "code": "1234"}})
+        assert [kept[1]["code"], kept[2]["code"]] == ["9999", ""]
+
+    def test_export_of_stored_entry_data(self):
+        # Config entries store the numbers as strings
+        exported = format_device_table({}, {"10": {"name": "Deck", "type": "glass"}, "2": {"name": "Hall"}}, {})
+        assert exported.splitlines()[-2:] == ["zone,2,Hall,motion", "zone,10,Deck,glass"]
+
+    @pytest.mark.parametrize(
+        ("text", "message"),
+        [
+            ("zone,33,Attic", "line 1: zone number must be between 1 and 32, not 33"),
+            ("area,3,Shed", "area number must be between 1 and 2"),
+            ("zone,1,A\nzone,1,B", "line 2: zone 1 is listed twice"),
+            ("zone,x,A", "zone number must be a whole number"),
+            ("zone,1,A,kitchen", "zone type must be one of"),
+            ("zone,1,", "zone needs a name"),
+            ("sensor,1,A", "unknown device kind 'sensor'"),
+            ("area,1,House,,maybe", "code_arm_required must be true or false"),
+            ("lights:\n  1: Porch", "unknown section 'lights'"),
+        ],
+    )
+    def test_invalid(self, text, message):
+        with pytest.raises(DeviceTableError, match=message):
+            parse_device_table(text)
+
+
+class TestBulkImportStep:
+    """Tests for the config flow step."""
+
+    def test_form_prefilled_with_current_devices(self, run):
+        flow = AAPAlarmConfigFlow()
+        flow._areas_data = {1: {"name": "House", "code": "1234"}}
+        flow._zones_data = {4: {"name": "Lounge", "type": "motion"}}
+        result = run(flow.async_step_bulk_import())
+        schema = result["data_schema"].schema
+        default = next(iter(schema)).default()
+        assert "zone,4,Lounge,motion" in default
+        assert "1234" not in default
+
+    def test_unchanged_form_keeps_codes(self, run):
+        flow = AAPAlarmConfigFlow()
+        flow._areas_data = {1: {"name": "House", "code": "1234"}}
+        result = run(flow.async_step_bulk_import())
+        table = next(iter(result["data_schema"].schema)).default()
+        with patch.object(flow, "_create_entry", AsyncMock(return_value="created")):
+            run(flow.async_step_bulk_import({"devices": table}))
+        assert flow._areas_data[1]["code"] == "1234"
+
+    def test_invalid_table_shows_error(self, run):
+        result = run(AAPAlarmConfigFlow().async_step_bulk_import({"devices": "zone,40,Attic"}))
+        assert result["errors"] == {"devices": "invalid_devices"}
+        assert "between 1 and 32" in result["description_placeholders"]["error"]
+
+    def test_valid_table_creates_entry(self, run):
+        flow = AAPAlarmConfigFlow()
+        flow._zones_data = {9: {"name": "Old", "type": "motion"}}
+        with patch.object(flow, "_create_entry", AsyncMock(return_value="created")):
+            assert run(flow.async_step_bulk_import({"devices": TABLE})) == "created"
+        assert set(flow._zones_data) == {1, 2}
+        assert flow._outputs_data == {3: {"name": "Siren"}}
@@ -0,0 +1,76 @@
+"""Unit tests for the config entry diagnostics."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from homeassistant.components.diagnostics import REDACTED
+
+from custom_components.aapalarm.const import DOMAIN, SIGNAL_ZONE_UPDATE
+from custom_components.aapalarm.diagnostics import async_get_config_entry_diagnostics
+
+
+@pytest.fixture
+def registered_hub(make_hub):
+    """Return a function creating a hub registered under entry1."""
+
+    def factory(**conf):
+        hub = make_hub(**conf)
+        hub.hass.data[DOMAIN] = {"entry1": hub}
+        return hub
+
+    return factory
+
+
+def _diagnostics(run, hub, data=None, options=None):
+    entry = MagicMock()
+    entry.entry_id = "entry1"
+    entry.title = "Panel"
+    entry.data = data or {}
+    entry.options = options or {}
+    return run(async_get_config_entry_diagnostics(hub.hass, entry))
+
+
+class TestDiagnostics:
+    """Tests for the diagnostics dump."""
+
+    def test_code_redacted(self, registered_hub, run):
+        hub = registered_hub()
+        result = _diagnostics(
+            run, hub, data={"host": "10.0.0.5", "code": "1234"}, options={"code": "9999"}
+        )
+        assert result["entry"]["data"] == {"host": "10.0.0.5", "code": REDACTED}
+        assert result["entry"]["options"] == {"code": REDACTED}
+
+    def test_controller_state_is_a_snapshot(self, registered_hub, run):
+        hub = registered_hub()
+        hub.controller.zone_state[1]["status"]["open"] = True
+        result = _diagnostics(run, hub)
+        hub.controller.zone_state[1]["status"]["open"] = False
+        assert result["controller"]["zone_state"][1]["status"]["open"] is True
+        assert set(result["controller"]) == {
+            "zone_state", "area_state", "output_state", "system_state",
+        }
+
+    def test_counters_and_message_log(self, registered_hub, run):
+        hub = registered_hub(message_log_enabled=True)
+        hub._log_raw_message("ZO1")
+        hub.event_counts[SIGNAL_ZONE_UPDATE] += 2
+        result = _diagnostics(run, hub)
+        assert result["message_log"][0]["raw"] == "ZO1"
+        assert result["counters"]["events"] == {SIGNAL_ZONE_UPDATE: 2}
+        assert result["timings"]["flush"]["count"] == 0
+        assert result["capture"] is None
+        hub._message_log_refresh.async_cancel()
+
+    def test_connection_history(self, registered_hub, run):
+        hub = registered_hub()
+        client = MagicMock()
+        hub.controller._client = client
+        hub._connected_callback(True)
+        client.connection_lost(OSError("reset"))
+        hub._connection_fail_callback(None)
+        history = _diagnostics(run, hub)["connection"]["history"]
+        assert [item["event"] for item in history] == [
+            "connected", "connection_lost", "connect_failed",
+        ]
+        assert history[1]["detail"] == "reset"
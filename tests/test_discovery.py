@@ -0,0 +1,99 @@
+"""Unit tests for discovering devices from live panel traffic."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.aapalarm.config_flow import AAPAlarmOptionsFlowHandler
+from custom_components.aapalarm.hub import format_signal
+
+CONF = {
+    "connectiontype": "ip",
+    "host": "127.0.0.1",
+    "zones": {"1": {"name": "Front Door", "type": "opening"}},
+}
+
+
+@pytest.fixture
+def hub(make_hub, attach_client):
+    """Return a ready hub configured with CONF."""
+    hub = make_hub(**CONF)
+    attach_client(hub)
+    return hub
+
+
+class TestDiscover:
+    """Tests for listening for devices."""
+
+    def test_reports_heard_devices(self, hub, loop, run):
+        client = hub.controller._client
+
+        async def scenario():
+            loop.call_later(0.01, client.process_line, "ZO5")
+            loop.call_later(0.02, client.process_line, "OO2")
+            loop.call_later(0.03, client.process_line, "EAA")
+            return await hub.async_discover(0.05)
+
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send"):
+            found = run(scenario())
+        client.send_data.assert_called_once()
+        assert found == {"areas": [1], "zones": [5], "outputs": [2]}
+
+
+class TestAddDevices:
+    """Tests for adding devices without reloading."""
+
+    def test_added_devices_announced(self, hub):
+        zones = {**CONF["zones"], 5: {"name": "Zone 5", "type": "motion"}}
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send") as send:
+            assert hub.async_add_devices({**CONF, "zones": zones})
+        send.assert_called_once_with(
+            hub.hass,
+            format_signal("aapalarm.devices_added", "entry1"),
+            "zones",
+            {5: {"name": "Zone 5", "type": "motion"}},
+        )
+
+    def test_other_changes_need_a_reload(self, hub):
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send") as send:
+            assert not hub.async_add_devices({**CONF, "host": "10.0.0.2"})
+            assert not hub.async_add_devices({**CONF, "zones": {}})
+            assert not hub.async_add_devices(
+                {**CONF, "zones": {"1": {"name": "Back Door", "type": "opening"}}}
+            )
+        send.assert_not_called()
+
+
+class TestDiscoveredStep:
+    """Tests for offering discovered devices in the options flow."""
+
+    def _make_flow(self, hass):
+        entry = MagicMock()
+        entry.data = CONF
+        entry.options = {"command_timeout": 5}
+        flow = AAPAlarmOptionsFlowHandler()
+        flow.hass = hass
+        flow._discovered = {"areas": [], "zones": [1, 7], "outputs": [3]}
+        return flow, entry
+
+    def test_only_new_devices_offered(self, hass, run):
+        flow, entry = self._make_flow(hass)
+        with patch.object(AAPAlarmOptionsFlowHandler, "config_entry", entry):
+            result = run(flow.async_step_discovered())
+        table = next(iter(result["data_schema"].schema)).default()
+        assert "zone,7,Zone 7,motion" in table
+        assert "output,3,Output 3" in table
+        assert "zone,1," not in table
+        assert result["description_placeholders"]["zones"] == "7"
+
+    def test_submitted_devices_added_to_entry(self, hass, run):
+        flow, entry = self._make_flow(hass)
+        with patch.object(AAPAlarmOptionsFlowHandler, "config_entry", entry):
+            result = run(flow.async_step_discovered({"devices": "zone,7,Garage,opening"}))
+        assert result["data"] == {"command_timeout": 5}
+        new_data = flow.hass.config_entries.async_update_entry.call_args.kwargs["data"]
+        assert new_data["zones"] == {
+            1: {"name": "Front Door", "type": "opening"},
+            7: {"name": "Garage", "type": "opening"},
+        }
+        assert "outputs" not in new_data
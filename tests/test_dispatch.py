@@ -0,0 +1,103 @@
+"""Unit tests for dispatcher routing in the AAP Alarm integration."""
+
+from unittest.mock import MagicMock, patch
+
+from custom_components.aapalarm import (
+    SIGNAL_AREA_UPDATE,
+    SIGNAL_SYSTEM_UPDATE,
+    SIGNAL_ZONE_UPDATE,
+    async_dispatch_update,
+    format_signal,
+    normalize_key,
+)
+
+
+# ---------------------------------------------------------------------------
+# Key Normalization Tests
+# ---------------------------------------------------------------------------
+
+class TestNormalizeKey:
+    """Tests for mapping controller keys to entity keys."""
+
+    def test_numeric_string(self):
+        assert normalize_key("5") == 5
+
+    def test_zero_padded_string(self):
+        assert normalize_key("05") == 5
+
+    def test_int_passthrough(self):
+        assert normalize_key(12) == 12
+
+    def test_area_letters(self):
+        assert normalize_key("A") == 1
+        assert normalize_key("B") == 2
+
+    def test_system_flag_name(self):
+        assert normalize_key("mains") == "mains"
+
+    def test_none_is_refresh_all(self):
+        assert normalize_key(None) is None
+
+
+# ---------------------------------------------------------------------------
+# Routing Tests
+# ---------------------------------------------------------------------------
+
+class TestDispatchUpdate:
+    """Tests that updates reach only the entity owning the key."""
+
+    def test_format_signal(self):
+        assert format_signal(SIGNAL_ZONE_UPDATE, "entry1", 3) == f"{SIGNAL_ZONE_UPDATE}_entry1_3"
+
+    def test_zone_routed_to_keyed_signal(self):
+        hass = MagicMock()
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send") as send:
+            async_dispatch_update(hass, SIGNAL_ZONE_UPDATE, "entry1", "7")
+        send.assert_called_once_with(hass, f"{SIGNAL_ZONE_UPDATE}_entry1_7", 7)
+
+    def test_area_letter_routed_to_area_number(self):
+        hass = MagicMock()
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send") as send:
+            async_dispatch_update(hass, SIGNAL_AREA_UPDATE, "entry1", "B")
+        send.assert_called_once_with(hass, f"{SIGNAL_AREA_UPDATE}_entry1_2", 2)
+
+    def test_system_routed_to_flag(self):
+        hass = MagicMock()
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send") as send:
+            async_dispatch_update(hass, SIGNAL_SYSTEM_UPDATE, "entry1", "mains")
+        send.assert_called_once_with(hass, f"{SIGNAL_SYSTEM_UPDATE}_entry1_mains", "mains")
+
+    def test_none_broadcasts(self):
+        hass = MagicMock()
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send") as send:
+            async_dispatch_update(hass, SIGNAL_ZONE_UPDATE, "entry1", None)
+        send.assert_called_once_with(hass, f"{SIGNAL_ZONE_UPDATE}_entry1", None)
+
+    def test_entries_do_not_share_signals(self):
+        hass = MagicMock()
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send") as send:
+            async_dispatch_update(hass, SIGNAL_ZONE_UPDATE, "entry1", "1")
+            async_dispatch_update(hass, SIGNAL_ZONE_UPDATE, "entry2", "1")
+        first, second = (call.args[1] for call in send.call_args_list)
+        assert first != second
+
+
+# ---------------------------------------------------------------------------
+# Entity Callback Tests
+# ---------------------------------------------------------------------------
+
+class TestZoneCallback:
+    """Tests that a zone entity refreshes from its own zone state."""
+
+    def test_reads_own_zone(self):
+        from custom_components.aapalarm.binary_sensor import AAPModuleBinarySensor
+
+        sensor = MagicMock()
+        sensor._zone_number = 3
+        sensor._controller.zone_state = {
+            3: {"status": {"open": True}},
+            4: {"status": {"open": False}},
+        }
+        AAPModuleBinarySensor._update_callback(sensor, 3)
+        assert sensor._info == {"status": {"open": True}}
+        sensor._async_write_if_changed.assert_called_once()
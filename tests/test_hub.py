@@ -0,0 +1,149 @@
+"""Unit tests for the per-panel hub."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.aapalarm.const import (
+    SIGNAL_AREA_UPDATE,
+    SIGNAL_MESSAGE_LOG_UPDATE,
+    SIGNAL_ZONE_UPDATE,
+)
+
+
+@pytest.fixture
+def hub_factory(make_hub):
+    """Return a function creating a hub whose coalescer records marks."""
+
+    def factory(**conf):
+        hub = make_hub(**conf)
+        hub.coalescer = MagicMock()
+        return hub
+
+    return factory
+
+
+class TestHubCallbacks:
+    """Tests that controller callbacks are counted and routed through the coalescer."""
+
+    def test_zone_update_marked_with_normalized_key(self, hub_factory):
+        hub = hub_factory()
+        hub.controller.callback_zone_state_change("05")
+        hub.coalescer.async_mark.assert_called_once_with(SIGNAL_ZONE_UPDATE, 5, received=None)
+        assert hub.event_counts[SIGNAL_ZONE_UPDATE] == 1
+
+    def test_area_update_deferred_when_not_in_alarm(self, hub_factory):
+        hub = hub_factory()
+        hub.controller.callback_area_state_change("A")
+        hub.coalescer.async_mark.assert_called_once_with(
+            SIGNAL_AREA_UPDATE, 1, immediate=False, received=None
+        )
+
+    def test_area_update_immediate_when_in_alarm(self, hub_factory):
+        hub = hub_factory()
+        hub.controller.area_state[2]["status"]["alarm"] = True
+        hub.controller.callback_area_state_change("B")
+        hub.coalescer.async_mark.assert_called_once_with(
+            SIGNAL_AREA_UPDATE, 2, immediate=True, received=None
+        )
+
+
+class TestHubMessageLog:
+    """Tests for raw message capture."""
+
+    def test_message_log_disabled_by_default(self, hub_factory):
+        hub = hub_factory()
+        assert hub.message_log is None
+
+    def test_process_line_wrapped_once(self, hub_factory):
+        """Reconnects reuse the client, which must not be wrapped twice."""
+        hub = hub_factory(message_log_enabled=True)
+        client = MagicMock()
+        hub.controller._client = client
+        hub._connected_callback(True)
+        hub._connected_callback(True)
+        client.process_line("ZO1")
+        assert len(hub.message_log) == 1
+        assert hub.message_log.latest == "ZO1"
+
+    def test_message_log_size_configurable(self, hub_factory):
+        hub = hub_factory(message_log_enabled=True, message_log_size=500)
+        assert hub.message_log.size == 500
+
+    def test_sensor_refresh_rate_limited(self, hub_factory, run):
+        """A burst of lines results in a single refresh after the interval."""
+        hub = hub_factory(message_log_enabled=True, message_log_refresh=0.05)
+        with patch("custom_components.aapalarm.hub.async_dispatcher_send") as send:
+            for line in ("ZO1", "ZC1", "ZO2"):
+                hub._log_raw_message(line)
+            assert send.call_count == 0
+            run(asyncio.sleep(0.1))
+        send.assert_called_once_with(
+            hub.hass, f"{SIGNAL_MESSAGE_LOG_UPDATE}_entry1", None
+        )
+        assert hub.message_log.total == 3
+        hub.coalescer.async_mark.assert_not_called()
+
+
+class TestHubLatency:
+    """Tests for line-received to state-written latency."""
+
+    def test_line_timestamp_reaches_coalescer(self, hub_factory):
+        hub = hub_factory()
+        client = MagicMock()
+        client.process_line = lambda line: hub._zones_updated_callback("3")
+        hub.controller._client = client
+        hub._connected_callback(True)
+        client.process_line("ZO3")
+        received = hub.coalescer.async_mark.call_args.kwargs["received"]
+        assert received is not None
+        assert hub._line_received is None
+
+    def test_write_during_dispatch_recorded_per_signal(self, hub_factory):
+        hub = hub_factory()
+        with patch(
+            "custom_components.aapalarm.hub.async_dispatch_update",
+            side_effect=lambda *args: hub.async_record_write(),
+        ):
+            hub._dispatch(SIGNAL_ZONE_UPDATE, 3, time.perf_counter() - 0.01)
+        summary = hub.latency_summary()[SIGNAL_ZONE_UPDATE]
+        assert summary["count"] == 1
+        assert summary["p99_ms"] >= 10
+
+    def test_write_outside_dispatch_not_recorded(self, hub_factory):
+        hub = hub_factory()
+        hub.async_record_write()
+        assert hub.latency_summary() == {}
+
+
+class TestHubBackgroundStart:
+    """Tests for setting up without waiting for the panel."""
+
+    def test_start_returns_without_connection(self, hub_factory, run):
+        hub = hub_factory()
+        with (
+            patch("custom_components.aapalarm.hub.AAPModuleClient.start") as start,
+            patch("custom_components.aapalarm.hub.async_track_time_interval"),
+            patch("custom_components.aapalarm.supervisor.async_track_time_interval"),
+        ):
+            started = time.perf_counter()
+            assert run(hub.async_start(wait=False)) is True
+        assert time.perf_counter() - started < hub.timeout
+        start.assert_called_once()
+        assert hub.ready is False
+
+    def test_first_line_makes_entities_available(self, hub_factory):
+        hub = hub_factory()
+        client = MagicMock()
+        hub.controller._client = client
+        hub._connected_callback(True)
+        assert hub.ready is False
+        client.process_line("ZO1")
+        assert hub.ready is True
+        refreshed = [
+            call.args[0] for call in hub.coalescer.async_mark.call_args_list if call.args[1] is None
+        ]
+        assert SIGNAL_ZONE_UPDATE in refreshed
+        assert SIGNAL_AREA_UPDATE in refreshed
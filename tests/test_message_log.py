@@ -0,0 +1,37 @@
+"""Unit tests for the raw message log buffer."""
+
+from datetime import datetime
+
+from custom_components.aapalarm.message_log import MessageLog
+
+
+class TestMessageLog:
+    """Tests for the bounded, lazily formatted message log."""
+
+    def test_empty(self):
+        log = MessageLog(10)
+        assert not log
+        assert log.latest is None
+        assert log.entries() == []
+
+    def test_bounded(self):
+        log = MessageLog(3)
+        for number in range(1, 6):
+            log.append(f"ZO{number}")
+        assert len(log) == 3
+        assert log.total == 5
+        assert [entry["raw"] for entry in log.entries()] == ["ZO3", "ZO4", "ZO5"]
+
+    def test_entries_limit_returns_newest(self):
+        log = MessageLog(10)
+        for line in ("MF", "MR", "AA"):
+            log.append(line)
+        assert [entry["raw"] for entry in log.entries(2)] == ["MR", "AA"]
+        assert log.entries(0) == []
+
+    def test_timestamps_formatted_on_read(self):
+        log = MessageLog(10)
+        before = datetime.now()
+        log.append("ZO1")
+        stamp = datetime.fromisoformat(log.entries()[0]["timestamp"])
+        assert abs((stamp - before).total_seconds()) < 1
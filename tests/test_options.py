@@ -0,0 +1,22 @@
+"""Unit tests for the integration options."""
+
+from unittest.mock import MagicMock, patch
+
+from custom_components.aapalarm.config_flow import AAPAlarmOptionsFlowHandler
+
+
+class TestSettingsStep:
+    """Tests for the connection and logging settings."""
+
+    def test_unchanged_form_keeps_saved_options(self, run):
+        entry = MagicMock()
+        entry.data = {"connectiontype": "ip", "host": "127.0.0.1", "keepalive_interval": 60, "timeout": 10}
+        entry.options = {"keepalive_interval": 120, "timeout": 20, "command_timeout": 5}
+        flow = AAPAlarmOptionsFlowHandler()
+        with patch.object(AAPAlarmOptionsFlowHandler, "config_entry", entry):
+            form = run(flow.async_step_settings())
+            # Submitting the form as shown sends back its defaults
+            result = run(flow.async_step_settings(form["data_schema"]({})))
+        assert result["data"]["keepalive_interval"] == 120
+        assert result["data"]["timeout"] == 20
+        assert result["data"]["command_timeout"] == 5
@@ -0,0 +1,397 @@
+"""Unit tests for finding and probing modules."""
+
+import asyncio
+import socket
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import serial
+
+from custom_components.aapalarm.config_flow import AAPAlarmConfigFlow
+from custom_components.aapalarm.probe import (
+    CannotConnect,
+    NotAModule,
+    SerialCandidate,
+    async_handshake,
+    async_probe_ip,
+    async_scan_network,
+    is_module_line,
+    list_serial_ports,
+    probe_serial,
+    serial_ports_in_use,
+)
+from tools.simulator import AAPSimulator
+
+
+async def _start_other_server():
+    """Listen like a device that is not an AAP module."""
+
+    async def handle(reader, writer):
+        await reader.readline()
+        writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+class TestProbe:
+    """Tests for probing a single address."""
+
+    def test_module_lines(self):
+        assert is_module_line("ZO5")
+        assert is_module_line("DA")
+        assert not is_module_line("HTTP/1.1 400 Bad Request")
+
+    def test_simulator_answers(self, run):
+        async def scenario():
+            simulator = AAPSimulator(scenario="idle")
+            _, port = await simulator.start_tcp("127.0.0.1")
+            try:
+                return await async_probe_ip("127.0.0.1", port)
+            finally:
+                await simulator.stop()
+
+        result = run(scenario())
+        assert result is not None
+        assert is_module_line(result.first_line)
+        assert 0 <= result.round_trip < 1
+
+    def test_other_device_rejected(self, run):
+        async def scenario():
+            server, port = await _start_other_server()
+            try:
+                return await async_probe_ip("127.0.0.1", port)
+            finally:
+                server.close()
+
+        assert run(scenario()) is None
+
+    def test_silent_device_times_out(self, run):
+        async def scenario():
+            server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            started = time.perf_counter()
+            try:
+                return await async_probe_ip("127.0.0.1", port, timeout=0.2), time.perf_counter() - started
+            finally:
+                server.close()
+
+        result, elapsed = run(scenario())
+        assert result is None
+        assert elapsed < 1
+
+
+class TestScan:
+    """Tests for scanning a network."""
+
+    def test_finds_module_among_other_hosts(self, run):
+        async def scenario():
+            simulator = AAPSimulator(scenario="idle")
+            _, port = await simulator.start_tcp("127.0.0.1")
+            started = time.perf_counter()
+            try:
+                found = await async_scan_network("127.0.0.0/24", port, timeout=0.5)
+            finally:
+                await simulator.stop()
+            return found, time.perf_counter() - started
+
+        found, elapsed = run(scenario())
+        assert [result.host for result in found] == ["127.0.0.1"]
+        assert elapsed < 5
+
+    def test_network_too_large(self, run):
+        with pytest.raises(ValueError):
+            run(async_scan_network("10.0.0.0/16", 5002))
+
+
+class TestScanSteps:
+    """Tests for the config flow steps."""
+
+    def test_no_modules_found(self, hass, run):
+        flow = AAPAlarmConfigFlow()
+        flow.hass = hass
+        with patch("custom_components.aapalarm.config_flow.async_scan_network", return_value=[]):
+            result = run(flow.async_step_ip_scan({"network": "192.168.5.0/24"}))
+        assert result["errors"] == {"base": "no_modules_found"}
+
+    def test_invalid_network(self, hass, run):
+        flow = AAPAlarmConfigFlow()
+        flow.hass = hass
+        result = run(flow.async_step_ip_scan({"network": "not a network"}))
+        assert result["errors"] == {"network": "invalid_network"}
+
+    def test_picked_module_fills_in_host(self, hass, run):
+        async def scenario():
+            simulator = AAPSimulator(scenario="idle")
+            _, port = await simulator.start_tcp("127.0.0.1")
+            flow = AAPAlarmConfigFlow()
+            flow.hass = hass
+            flow._connection_data = {"connectiontype": "ip", "port": str(port)}
+            try:
+                results = await flow.async_step_ip_scan({"network": "127.0.0.1/32"})
+                picked = await flow.async_step_ip_scan_results({"host": "127.0.0.1"})
+            finally:
+                await simulator.stop()
+            return results, picked
+
+        results, picked = run(scenario())
+        assert results["step_id"] == "ip_scan_results"
+        assert picked["step_id"] == "ip_connection"
+        schema = {str(key): key.default() for key in picked["data_schema"].schema}
+        assert schema["host"] == "127.0.0.1"
+
+
+def _closed_port():
+    """Return a local port that nothing listens on."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def _ip_input(port):
+    return {"host": "127.0.0.1", "port": str(port), "keepalive_interval": 30, "timeout": 10}
+
+
+class TestHandshake:
+    """Tests for checking the module when it is set up by hand."""
+
+    def test_refused_and_wrong_device_told_apart(self, run):
+        async def scenario():
+            server, port = await _start_other_server()
+            try:
+                with pytest.raises(NotAModule):
+                    await async_handshake("127.0.0.1", port)
+            finally:
+                server.close()
+            with pytest.raises(CannotConnect):
+                await async_handshake("127.0.0.1", _closed_port())
+
+        run(scenario())
+
+    def test_module_accepted_and_round_trip_reported(self, hass, run):
+        async def scenario():
+            simulator = AAPSimulator(scenario="idle")
+            _, port = await simulator.start_tcp("127.0.0.1")
+            flow = AAPAlarmConfigFlow()
+            flow.hass = hass
+            flow._connection_data = {"connectiontype": "ip"}
+            try:
+                return await flow.async_step_ip_connection(_ip_input(port)), flow
+            finally:
+                await simulator.stop()
+
+        result, flow = run(scenario())
+        assert result["step_id"] == "areas"
+        assert result["description_placeholders"]["connection"].startswith("The module answered in")
+        assert len(flow._validated) == 1
+
+    def test_wrong_device_fails_fast(self, hass, run):
+        async def scenario():
+            server, port = await _start_other_server()
+            flow = AAPAlarmConfigFlow()
+            flow.hass = hass
+            flow._connection_data = {"connectiontype": "ip"}
+            try:
+                started = time.perf_counter()
+                result = await flow.async_step_ip_connection(_ip_input(port))
+                return result, time.perf_counter() - started
+            finally:
+                server.close()
+
+        result, elapsed = run(scenario())
+        assert result["errors"] == {"base": "not_aap_module"}
+        assert elapsed < 1
+
+    def test_nothing_listening(self, hass, run):
+        flow = AAPAlarmConfigFlow()
+        flow.hass = hass
+        flow._connection_data = {"connectiontype": "ip"}
+        result = run(flow.async_step_ip_connection(_ip_input(_closed_port())))
+        assert result["errors"] == {"base": "cannot_connect"}
+
+    def test_validated_module_not_asked_again(self, hass, run):
+        async def scenario():
+            simulator = AAPSimulator(scenario="idle")
+            _, port = await simulator.start_tcp("127.0.0.1")
+            flow = AAPAlarmConfigFlow()
+            flow.hass = hass
+            flow._connection_data = {"connectiontype": "ip", "port": str(port)}
+            try:
+                await flow.async_step_ip_scan({"network": "127.0.0.1/32"})
+            finally:
+                await simulator.stop()
+            # The module answered the scan; the same settings need no second probe
+            with patch("custom_components.aapalarm.config_flow.async_handshake") as handshake:
+                result = await flow.async_step_ip_connection(_ip_input(port))
+            handshake.assert_not_called()
+            return result
+
+        assert run(scenario())["step_id"] == "areas"
+
+    def test_reconfigure_to_running_module_not_asked(self, hass, run):
+        entry = MagicMock(data={"connectiontype": "ip", "host": "127.0.0.1", "port": 4001})
+        flow = AAPAlarmConfigFlow()
+        flow.hass = hass
+        flow._reconfigure = True
+        flow._connection_data = {"connectiontype": "ip"}
+        with (
+            patch.object(flow, "_get_reconfigure_entry", return_value=entry),
+            patch("custom_components.aapalarm.config_flow.async_handshake") as handshake,
+        ):
+            result = run(flow.async_step_ip_connection(_ip_input(4001)))
+            handshake.assert_not_called()
+            # A different module is still checked
+            handshake.side_effect = CannotConnect("refused")
+            other = run(flow.async_step_ip_connection(_ip_input(4002)))
+        assert result["step_id"] == "areas"
+        assert other["errors"] == {"base": "cannot_connect"}
+
+
+class TestSerial:
+    """Tests for finding the serial device a module is on."""
+
+    def test_by_id_names_preferred(self, tmp_path):
+        device = tmp_path / "ttyUSB0"
+        device.touch()
+        by_id = tmp_path / "by-id"
+        by_id.mkdir()
+        (by_id / "usb-FTDI_FT232R-if00-port0").symlink_to(device)
+        ports = [
+            MagicMock(device=str(device), description="FT232R USB UART"),
+            MagicMock(device="/dev/ttyS0", description="n/a"),
+        ]
+        with (
+            patch("custom_components.aapalarm.probe.comports", return_value=ports),
+            patch("custom_components.aapalarm.probe.SERIAL_BY_ID", by_id),
+        ):
+            candidates = list_serial_ports()
+        assert [(c.device, c.description) for c in candidates] == [
+            (str(by_id / "usb-FTDI_FT232R-if00-port0"), "FT232R USB UART"),
+            ("/dev/ttyS0", "/dev/ttyS0"),
+        ]
+
+    def test_excluded_ports_not_listed(self):
+        ports = [
+            MagicMock(device="/dev/ttyUSB0", description="FT232R USB UART"),
+            MagicMock(device="/dev/ttyUSB1", description="Sonoff Zigbee 3.0 USB Dongle"),
+        ]
+        with patch("custom_components.aapalarm.probe.comports", return_value=ports):
+            candidates = list_serial_ports({"/dev/ttyUSB1"})
+        assert [c.device for c in candidates] == ["/dev/ttyUSB0"]
+
+    def test_ports_in_use_found_in_any_entry(self, hass):
+        hass.config_entries.async_entries.return_value = [
+            MagicMock(entry_id="zha", title="Zigbee", data={"device": {"path": "/dev/ttyUSB1"}}),
+            MagicMock(entry_id="zwave", title="Z-Wave", data={"usb_path": "/dev/ttyACM0"}),
+            MagicMock(entry_id="aap", title="Alarm", data={"port": "/dev/ttyUSB0", "host": "x"}),
+        ]
+        assert serial_ports_in_use(hass, ignore_entry_id="aap") == {
+            "/dev/ttyUSB1": "Zigbee",
+            "/dev/ttyACM0": "Z-Wave",
+        }
+
+    def test_module_found_on_pty(self, run):
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            simulator = AAPSimulator(scenario="idle")
+            path = simulator.start_pty()
+            try:
+                return await loop.run_in_executor(None, probe_serial, path, 0.5)
+            finally:
+                await simulator.stop()
+
+        round_trip, line = run(scenario())
+        assert 0 <= round_trip < 0.5
+        assert is_module_line(line)
+
+    def test_busy_port_left_alone(self, run):
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            simulator = AAPSimulator(scenario="idle")
+            path = simulator.start_pty()
+            try:
+                with serial.Serial(path, exclusive=True):
+                    return await loop.run_in_executor(None, probe_serial, path, 0.5)
+            finally:
+                await simulator.stop()
+
+        assert run(scenario()) is None
+
+    def test_missing_device_is_not_a_module(self):
+        assert probe_serial("/dev/ttyNOTHERE", timeout=0.1) is None
+
+    def _flow(self, hass, entries=()):
+        flow = AAPAlarmConfigFlow()
+        flow.hass = hass
+        flow.hass.config_entries.async_entries.return_value = list(entries)
+        return flow
+
+    def test_listing_opens_nothing(self, hass, run):
+        flow = self._flow(hass)
+        ports = [SerialCandidate("/dev/serial/by-id/usb-aap", "FT232R USB UART")]
+        with (
+            patch("custom_components.aapalarm.config_flow.list_serial_ports", return_value=ports),
+            patch("custom_components.aapalarm.probe.serial.Serial") as opened,
+        ):
+            result = run(flow.async_step_serial_connection())
+        opened.assert_not_called()
+        port = next(iter(result["data_schema"].schema))
+        assert port.default() == "/dev/serial/by-id/usb-aap"
+        selector = result["data_schema"].schema[port]
+        assert selector.config["options"][0]["label"] == "/dev/serial/by-id/usb-aap - FT232R USB UART"
+
+    def test_port_of_other_integration_never_opened(self, hass, run):
+        zha = MagicMock(entry_id="zha", title="Zigbee", data={"device": {"path": "/dev/ttyUSB1"}})
+        flow = self._flow(hass, [zha])
+        comports = [
+            MagicMock(device="/dev/ttyUSB0", description="FT232R USB UART"),
+            MagicMock(device="/dev/ttyUSB1", description="Sonoff Zigbee 3.0 USB Dongle"),
+        ]
+        with (
+            patch("custom_components.aapalarm.probe.comports", return_value=comports),
+            patch("custom_components.aapalarm.probe.serial.Serial") as opened,
+        ):
+            form = run(flow.async_step_serial_connection())
+            result = run(
+                flow.async_step_serial_connection({"port": "/dev/ttyUSB1"})
+            )
+        opened.assert_not_called()
+        options = form["data_schema"].schema[next(iter(form["data_schema"].schema))].config["options"]
+        assert [option["value"] for option in options] == ["/dev/ttyUSB0"]
+        assert result["errors"] == {"base": "serial_port_in_use"}
+        assert result["description_placeholders"]["entry"] == "Zigbee"
+
+    def test_picked_port_probed_once(self, hass, run):
+        async def scenario():
+            simulator = AAPSimulator(scenario="idle")
+            path = simulator.start_pty()
+            flow = self._flow(hass)
+            flow._serial_ports = [SerialCandidate(path, "Simulator")]
+            flow._connection_data = {"connectiontype": "serial"}
+            user_input = {"port": path, "keepalive_interval": 30, "timeout": 10}
+            try:
+                first = await flow.async_step_serial_connection(dict(user_input))
+                with patch("custom_components.aapalarm.config_flow.probe_serial") as probe:
+                    await flow.async_step_serial_connection(dict(user_input))
+                probe.assert_not_called()
+            finally:
+                await simulator.stop()
+            return first
+
+        result = run(scenario())
+        assert result["step_id"] == "areas"
+        assert result["description_placeholders"]["connection"].startswith("The module answered in")
+
+    def test_silent_port_rejected(self, hass, run):
+        flow = self._flow(hass)
+        flow._serial_ports = []
+        with patch("custom_components.aapalarm.config_flow.probe_serial", return_value=None):
+            result = run(
+                flow.async_step_serial_connection({"port": "/dev/ttyUSB0"})
+            )
+        assert result["errors"] == {"base": "serial_no_answer"}
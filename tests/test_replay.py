@@ -0,0 +1,110 @@
+"""Unit tests for replaying captured raw streams."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.exceptions import HomeAssistantError, Unauthorized
+
+from custom_components.aapalarm.capture import format_capture_line
+from custom_components.aapalarm.const import SIGNAL_AREA_UPDATE
+from custom_components.aapalarm.replay import StreamReplay, iter_capture
+from custom_components.aapalarm.services import _async_replay_capture
+
+
+def _write_capture(path, lines):
+    path.write_text("".join(format_capture_line(stamp, raw) for stamp, raw in lines))
+    return path
+
+
+class TestIterCapture:
+    """Tests for reading capture files."""
+
+    @pytest.mark.parametrize("use_mmap", [True, False])
+    def test_timestamped_lines(self, tmp_path, use_mmap):
+        path = _write_capture(tmp_path / "c.log", [(10.0, "ZO1"), (10.5, "ZC1")])
+        assert list(iter_capture(path, use_mmap)) == [(10.0, "ZO1"), (10.5, "ZC1")]
+
+    def test_plain_raw_lines(self, tmp_path):
+        path = tmp_path / "raw.txt"
+        path.write_bytes(b"ZO1\n\rZC1\n\r\n")
+        assert list(iter_capture(path)) == [(None, "ZO1"), (None, "ZC1")]
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.log"
+        path.write_bytes(b"")
+        assert list(iter_capture(path)) == []
+
+
+class TestStreamReplay:
+    """Tests for injecting a capture into process_line."""
+
+    def test_fast_replay_injects_every_line_in_order(self, tmp_path, hass, run):
+        path = _write_capture(tmp_path / "c.log", [(i, f"ZO{i % 16 + 1}") for i in range(250)])
+        seen = []
+        replay = StreamReplay(hass, seen.append, path)
+        report = run(replay.async_run())
+        assert seen == [f"ZO{i % 16 + 1}" for i in range(250)]
+        assert report["lines"] == 250
+        assert report["process_line_us"]["p50"] <= report["process_line_us"]["max"]
+
+    def test_timed_replay_scaled_by_speed(self, tmp_path, hass, run):
+        path = _write_capture(tmp_path / "c.log", [(100.0, "ZO1"), (102.0, "ZC1")])
+        replay = StreamReplay(hass, lambda line: None, path, speed=20)
+        report = run(replay.async_run())
+        assert 0.1 <= report["elapsed_seconds"] < 1
+
+    def test_timings_bounded(self, tmp_path, hass, run, monkeypatch):
+        monkeypatch.setattr("custom_components.aapalarm.replay.REPLAY_LATENCY_WINDOW", 10)
+        path = _write_capture(tmp_path / "c.log", [(i, "ZO1") for i in range(50)])
+        replay = StreamReplay(hass, lambda line: None, path)
+        report = run(replay.async_run())
+        assert report["lines"] == 50
+        assert replay.process_time.summary()["window"] == 10
+        assert report["process_line_us"]["max"] >= report["process_line_us"]["p99"]
+
+
+class TestHubReplay:
+    """Tests for replaying through a hub."""
+
+    def test_requires_connection(self, tmp_path, make_hub, run):
+        hub = make_hub()
+        with pytest.raises(HomeAssistantError):
+            run(hub.async_replay(tmp_path / "c.log"))
+
+    def test_replay_not_recorded_by_capture(self, tmp_path, make_hub, run):
+        path = _write_capture(tmp_path / "c.log", [(1.0, "ZO1")])
+        hub = make_hub(message_log_enabled=True)
+        hub.capture = MagicMock()
+        hub.controller._client = MagicMock()
+        hub._connected_callback(True)
+        report = run(hub.async_replay(path))
+        assert report["lines"] == 1
+        assert hub.message_log.latest == "ZO1"
+        hub.capture.append.assert_not_called()
+        assert hub.replay is None
+
+    def test_replay_is_not_a_panel_report(self, tmp_path, make_hub, attach_client, run):
+        path = _write_capture(tmp_path / "c.log", [(1.0, "EAA"), (2.0, "OO1")])
+        hub = make_hub()
+        client = attach_client(hub)
+        hub._instrument_client()
+        hub.ready = False
+        hub._output_targets[1] = False
+        run(hub.async_replay(path))
+        assert hub.controller.output_state[1]["status"]["open"] is True
+        assert hub.ready is False
+        assert hub.traffic.lines == 0
+        assert not hub.is_confirmed(SIGNAL_AREA_UPDATE, 1)
+        client.send_data.assert_not_called()
+
+
+class TestReplayService:
+    """Tests for the replay_capture service."""
+
+    def test_admin_only(self, run):
+        call = MagicMock()
+        call.context.user_id = "user1"
+        call.hass.auth.async_get_user = AsyncMock(return_value=MagicMock(is_admin=False))
+        with pytest.raises(Unauthorized):
+            run(_async_replay_capture(call))
+        call.hass.config.path.assert_not_called()
@@ -0,0 +1,150 @@
+"""Unit tests for restoring entity state from before a restart."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.components.alarm_control_panel import AlarmControlPanelState
+from homeassistant.core import State
+from homeassistant.helpers.entity import Entity
+
+from custom_components.aapalarm import AAPModuleDevice
+from custom_components.aapalarm.alarm_control_panel import AAPModuleAlarm
+from custom_components.aapalarm.binary_sensor import AAPModuleBinarySensor
+from custom_components.aapalarm.const import ATTR_RESTORED
+from custom_components.aapalarm.switch import AAPModuleOutput
+
+
+def _fake_hub(confirmed=()):
+    """Create a stand-in hub that has seen the given keys from the panel."""
+    hub = MagicMock()
+    hub.entry_id = "entry1"
+    hub.write_stats = {"emitted": 0, "suppressed": 0}
+    hub.confirmed = set(confirmed)
+    hub.is_confirmed = lambda signal, key: key in hub.confirmed
+    hub.controller.zone_state = {1: {"status": {"open": False, "alarm": False}}}
+    hub.controller.output_state = {1: {"status": {"open": False}}}
+    hub.controller.area_state = {
+        1: {
+            "status": {
+                "alarm": False,
+                "armed": False,
+                "stay_armed": False,
+                "exit_delay": False,
+                "disarmed": False,
+            }
+        }
+    }
+    return hub
+
+
+def _make_entry():
+    entry = MagicMock()
+    entry.entry_id = "entry1"
+    entry.data = {"connectiontype": "ip"}
+    return entry
+
+
+@pytest.fixture
+def add(hass, run):
+    """Return a function that runs async_added_to_hass with last_state as the saved state."""
+
+    def add(entity, last_state):
+        entity.hass = hass
+        entity.entity_id = "test.entity"
+        with (
+            patch.object(AAPModuleDevice, "_async_subscribe"),
+            patch.object(AAPModuleDevice, "async_get_last_state", return_value=last_state),
+        ):
+            run(entity.async_added_to_hass())
+
+    return add
+
+
+def _zone(hub):
+    return AAPModuleBinarySensor(
+        None, _make_entry(), "1", "Front Door", "door", hub.controller.zone_state[1], hub
+    )
+
+
+class TestZoneRestore:
+    """Tests for zones showing their last known state."""
+
+    def test_restored_until_reported(self, add):
+        hub = _fake_hub()
+        zone = _zone(hub)
+        add(zone, State("binary_sensor.front_door", "on", {"alarm": True, "device_class": "door"}))
+        assert zone.is_on is True
+        assert zone.extra_state_attributes == {"open": True, "alarm": True, ATTR_RESTORED: True}
+        # The controller's defaults are left alone
+        assert hub.controller.zone_state[1]["status"] == {"open": False, "alarm": False}
+
+    def test_refresh_all_keeps_restored_state(self, add):
+        hub = _fake_hub()
+        zone = _zone(hub)
+        add(zone, State("binary_sensor.front_door", "on"))
+        with patch.object(Entity, "async_write_ha_state") as write:
+            zone._update_callback(None)
+        write.assert_not_called()
+        assert zone.is_on is True
+
+    def test_panel_report_replaces_restored_state(self, add):
+        hub = _fake_hub()
+        zone = _zone(hub)
+        add(zone, State("binary_sensor.front_door", "on"))
+        hub.confirmed.add(1)
+        with patch.object(Entity, "async_write_ha_state") as write:
+            zone._update_callback(1)
+        write.assert_called_once()
+        assert zone.is_on is False
+        assert ATTR_RESTORED not in zone.extra_state_attributes
+
+    def test_not_restored_once_confirmed(self, add):
+        hub = _fake_hub(confirmed={1})
+        zone = _zone(hub)
+        add(zone, State("binary_sensor.front_door", "on"))
+        assert zone.is_on is False
+
+    def test_unavailable_state_not_restored(self, add):
+        hub = _fake_hub()
+        zone = _zone(hub)
+        add(zone, State("binary_sensor.front_door", "unavailable"))
+        assert zone._restored is False
+
+
+class TestOutputAndAreaRestore:
+    """Tests for outputs and areas showing their last known state."""
+
+    def test_output_restored(self, add):
+        hub = _fake_hub()
+        output = AAPModuleOutput(
+            None, _make_entry(), "1", "Gate", hub.controller.output_state[1], hub
+        )
+        add(output, State("switch.gate", "on"))
+        assert output.is_on is True
+        assert output.extra_state_attributes == {ATTR_RESTORED: True}
+
+    def test_area_restored_from_attributes(self, add):
+        hub = _fake_hub()
+        area = AAPModuleAlarm(
+            None, _make_entry(), 1, "House", "", False, False, hub.controller.area_state[1], hub
+        )
+        add(area, State("alarm_control_panel.house", "armed_away", {"armed": True}))
+        assert area.alarm_state == AlarmControlPanelState.ARMED_AWAY
+        assert area.extra_state_attributes[ATTR_RESTORED] is True
+
+    def test_restored_exit_delay_still_needs_code(self, add, run):
+        hub = _fake_hub()
+        hub.async_send_confirmed = AsyncMock()
+        area = AAPModuleAlarm(
+            None, _make_entry(), 1, "House", "1234", False, False, hub.controller.area_state[1], hub
+        )
+        add(area, State("alarm_control_panel.house", "pending", {"exit_delay": True}))
+        assert area.alarm_state == AlarmControlPanelState.PENDING
+        run(area.async_alarm_disarm())
+        hub.async_send_confirmed.assert_not_called()
+        # Once the panel itself reports the exit delay, no code is needed
+        hub.confirmed.add(1)
+        hub.controller.area_state[1]["status"]["exit_delay"] = True
+        run(area.async_alarm_disarm())
+        hub.async_send_confirmed.assert_called_once()
+
@@ -24,6 +24,10 @@ def _make_alarm(code="1234", code_arm_required=True, code_panic_required=True,
     obj._code_panic_required = code_panic_required
     obj._area_number = area_number
     obj._controller = controller
+    # Commands are sent straight away; confirmation by the panel is not simulated
+    obj._hub.async_send_confirmed = AsyncMock(
+        side_effect=lambda name, signal, key, confirmed, action, *args: action(*args)
+    )
 
     # Import the actual constants
     from custom_components.aapalarm.alarm_control_panel import (
@@ -47,11 +51,22 @@ def _make_alarm(code="1234", code_arm_required=True, code_panic_required=True,
         AAPModuleAlarm.async_alarm_trigger(obj, code)
     )
     obj.async_alarm_keypress = lambda keypress=None: AAPModuleAlarm.async_alarm_keypress(obj, keypress)
+    obj._async_area_command = lambda *args: AAPModuleAlarm._async_area_command(obj, *args)
 
     # Mock alarm_state property
     if alarm_state_value is not None:
         type(obj).alarm_state = PropertyMock(return_value=alarm_state_value)
 
+    # The panel has reported the area; its live status matches alarm_state_value
+    obj._hub.is_confirmed = lambda signal, key: True
+    obj.AREA_NUMBER_TO_LETTER = AAPModuleAlarm.AREA_NUMBER_TO_LETTER
+    obj._controller_area_info = lambda: AAPModuleAlarm._controller_area_info(obj)
+    obj._area_flag = lambda *flags: AAPModuleAlarm._area_flag(obj, *flags)
+    pending = alarm_state_value == "pending"
+    controller.area_state = {
+        area_number: {"status": {"exit_delay": pending, "armed": not pending and alarm_state_value is not None}}
+    }
+
     return obj
 
 
@@ -0,0 +1,109 @@
+"""Offline tests of the pyaapalarmmodule client against the bundled simulator."""
+
+import asyncio
+
+from pyaapalarmmodule import AAPAlarmPanel
+
+from tools.simulator import AAPSimulator, SimulatedPanel
+
+
+async def _wait_for(predicate, timeout=3.0):
+    """Poll predicate until it is true or timeout expires."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+async def _connect(connection_type, port):
+    """Start a controller against the simulator and wait for it to connect."""
+    connected = asyncio.Event()
+    controller = AAPAlarmPanel(
+        connection_type, "127.0.0.1", port, "", 30, asyncio.get_running_loop(), 5
+    )
+    controller.callback_connected = lambda data: connected.set()
+    controller.start()
+    await asyncio.wait_for(connected.wait(), 5)
+    return controller
+
+
+def _disconnect(controller):
+    controller.stop()
+    controller._client.disconnect()
+
+
+class TestSimulatedPanel:
+    """Tests for the simulated panel state machine."""
+
+    def test_status_dump_covers_everything(self):
+        panel = SimulatedPanel(zones=4, outputs=2)
+        lines = panel.status_lines()
+        assert "ZC4" in lines
+        assert "DA" in lines and "DB" in lines
+        assert "OC2" in lines
+        assert "MR" in lines
+
+    def test_correct_code_disarms(self):
+        panel = SimulatedPanel(code="4321")
+        panel.areas["A"] = "A"
+        assert panel.handle_command("KEYS 4321E", lambda delay, lines: None) == ["DA", "DB"]
+
+    def test_wrong_code_ignored(self):
+        panel = SimulatedPanel(code="4321")
+        assert panel.handle_command("KEYS 1111E", lambda delay, lines: None) == []
+
+    def test_serial_output_toggle(self):
+        panel = SimulatedPanel(serial=True)
+        assert panel.handle_command("KEYS_C03E", lambda delay, lines: None) == ["OO3"]
+        assert panel.handle_command("KEYS_C03E", lambda delay, lines: None) == ["OR3"]
+
+
+class TestTCPTransport:
+    """Tests driving the IP client over a local TCP port."""
+
+    def test_zone_chatter_reaches_controller(self, run):
+        async def scenario():
+            simulator = AAPSimulator(scenario="zone_chatter", rate=500, seed=1)
+            _, port = await simulator.start_tcp()
+            controller = await _connect("ip", port)
+            zone_updates = []
+            controller.callback_zone_state_change = zone_updates.append
+            await _wait_for(lambda: len(zone_updates) > 50)
+            _disconnect(controller)
+            await simulator.stop()
+            assert "STATUS" in simulator.commands
+
+        run(scenario())
+
+    def test_arm_away_round_trip(self, run):
+        async def scenario():
+            panel = SimulatedPanel(exit_delay=0.05)
+            simulator = AAPSimulator(panel, scenario="idle")
+            _, port = await simulator.start_tcp()
+            controller = await _connect("ip", port)
+            controller.arm_away()
+            await _wait_for(lambda: controller.area_state[1]["status"]["armed"])
+            _disconnect(controller)
+            await simulator.stop()
+            assert "ARM" in simulator.commands
+
+        run(scenario())
+
+
+class TestPTYTransport:
+    """Tests driving the serial client over a pseudo terminal."""
+
+    def test_output_toggle_round_trip(self, run):
+        async def scenario():
+            simulator = AAPSimulator(SimulatedPanel(serial=True), scenario="idle")
+            path = simulator.start_pty()
+            controller = await _connect("serial", path)
+            await _wait_for(lambda: "?E" in simulator.commands)
+            controller.command_output("3")
+            await _wait_for(lambda: controller.output_state[3]["status"]["open"])
+            _disconnect(controller)
+            await simulator.stop()
+            assert "KEYS_C03E" in simulator.commands
+
+        run(scenario())
@@ -0,0 +1,73 @@
+"""Unit tests for change detection on entity state writes."""
+
+from unittest.mock import MagicMock, patch
+
+from homeassistant.helpers.entity import Entity
+
+from custom_components.aapalarm.binary_sensor import AAPModuleBinarySensor
+
+
+def _make_zone(status=None):
+    """Create a zone entity backed by a fake controller."""
+    entry = MagicMock()
+    entry.entry_id = "entry1"
+    entry.data = {"connectiontype": "ip"}
+    hub = MagicMock()
+    hub.entry_id = "entry1"
+    hub.write_stats = {"emitted": 0, "suppressed": 0}
+    controller = hub.controller
+    controller.zone_state = {1: {"status": status or {"open": False, "alarm": False}}}
+    sensor = AAPModuleBinarySensor(
+        None, entry, "1", "Front Door", "door", controller.zone_state[1], hub
+    )
+    sensor.hass = MagicMock()
+    return sensor, controller
+
+
+class TestChangeDetection:
+    """Tests that identical panel status does not produce state writes."""
+
+    def test_first_update_writes(self):
+        sensor, _ = _make_zone()
+        with patch.object(Entity, "async_write_ha_state") as write:
+            sensor._update_callback(1)
+        write.assert_called_once()
+        assert sensor._writes_emitted == 1
+
+    def test_repeated_status_suppressed(self):
+        sensor, _ = _make_zone()
+        with patch.object(Entity, "async_write_ha_state") as write:
+            sensor._update_callback(1)
+            sensor._update_callback(1)
+            sensor._update_callback(1)
+        write.assert_called_once()
+        assert sensor._writes_suppressed == 2
+        assert sensor._hub.write_stats == {"emitted": 1, "suppressed": 2}
+
+    def test_state_change_writes(self):
+        sensor, controller = _make_zone()
+        with patch.object(Entity, "async_write_ha_state") as write:
+            sensor._update_callback(1)
+            controller.zone_state[1]["status"]["open"] = True
+            sensor._update_callback(1)
+        assert write.call_count == 2
+
+    def test_attribute_change_writes(self):
+        """Attributes are compared too, even though the controller mutates them in place."""
+        sensor, controller = _make_zone()
+        with patch.object(Entity, "async_write_ha_state") as write:
+            sensor._update_callback(1)
+            controller.zone_state[1]["status"]["alarm"] = True
+            sensor._update_callback(1)
+        assert write.call_count == 2
+
+
+class TestAvailability:
+    """Tests for availability before the panel has reported in."""
+
+    def test_unavailable_until_ready(self):
+        sensor, _ = _make_zone()
+        sensor._hub.ready = False
+        assert sensor.available is False
+        sensor._hub.ready = True
+        assert sensor.available is True
@@ -0,0 +1,82 @@
+"""Unit tests for latency and traffic statistics."""
+
+import asyncio
+from unittest.mock import patch
+
+from custom_components.aapalarm.stats import RollingLatency, TrafficStats
+from tools.simulator import AAPSimulator
+
+
+class TestRollingLatency:
+    """Tests for the rolling latency window."""
+
+    def test_empty_summary(self):
+        assert RollingLatency().summary()["p99_ms"] == 0.0
+
+    def test_window_drops_old_samples(self):
+        latency = RollingLatency(window=10)
+        latency.add(1.0)
+        for _ in range(10):
+            latency.add(0.001)
+        summary = latency.summary()
+        assert summary["count"] == 11
+        assert summary["window"] == 10
+        assert summary["max_ms"] == 1.0
+
+
+class TestTrafficStats:
+    """Tests for the connection traffic counters."""
+
+    def test_rates_between_samples(self):
+        traffic = TrafficStats()
+        assert traffic.sample(100.0)["lines_per_second"] is None
+        for _ in range(20):
+            traffic.line_received(105.0)
+        traffic.bytes += 100
+        summary = traffic.sample(110.0)
+        assert summary["lines_per_second"] == 2.0
+        assert summary["bytes_per_second"] == 10.0
+        assert summary["last_line_age"] == 5.0
+
+    def test_keepalive_round_trip(self):
+        traffic = TrafficStats()
+        traffic.status_sent(10.0)
+        traffic.status_sent(10.5)  # still waiting for the first reply
+        traffic.line_received(10.25)
+        traffic.line_received(12.0)
+        assert traffic.keepalive_rtt == 0.25
+
+    def test_reconnects(self):
+        traffic = TrafficStats()
+        assert traffic.reconnects == 0
+        traffic.connects = 3
+        assert traffic.reconnects == 2
+
+
+class TestClientInstrumentation:
+    """Tests the hub's counters against the simulator."""
+
+    def test_counts_real_traffic(self, make_hub, loop, run):
+        async def scenario():
+            simulator = AAPSimulator(scenario="idle")
+            _, port = await simulator.start_tcp("127.0.0.1")
+            with patch("custom_components.aapalarm.hub.async_dispatcher_send"):
+                hub = make_hub(port=port)
+                hub.controller.start()
+                deadline = loop.time() + 5
+                while hub.traffic.keepalive_rtt is None and loop.time() < deadline:
+                    await asyncio.sleep(0.01)
+                hub.controller._client.data_received(b"XYZ\n\r")
+                hub.controller.stop()
+                hub.controller._client.disconnect()
+            await simulator.stop()
+            return hub.traffic
+
+        # The client's keepalive loop only ends on its next wakeup; the loop
+        # fixture cancels it
+        traffic = run(scenario())
+        assert traffic.connects == 1
+        assert traffic.lines > 0
+        assert traffic.bytes > traffic.lines
+        assert traffic.keepalive_rtt is not None
+        assert traffic.parse_errors == 1
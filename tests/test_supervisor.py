@@ -0,0 +1,183 @@
+"""Unit tests for the connection supervisor."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.aapalarm import supervisor as supervisor_module
+from custom_components.aapalarm.supervisor import (
+    DEAD_LINK_KEEPALIVES,
+    RECONNECT_MAX_DELAY,
+    ConnectionSupervisor,
+    reconnect_delay,
+)
+from tools.simulator import AAPSimulator
+
+
+@pytest.fixture
+def make_supervisor(hass):
+    """Return a function creating a supervisor with a fake client.
+
+    Unless reporting is False the panel has already reported once, so a
+    lost connection is an outage.
+    """
+
+    def make_supervisor(last_line=None, reporting=True):
+        on_down = MagicMock()
+        supervisor = ConnectionSupervisor(hass, 30, lambda: last_line, on_down)
+        client = MagicMock()
+        supervisor.attach(client)
+        if reporting:
+            supervisor.async_reporting()
+        return supervisor, client, on_down
+
+    return make_supervisor
+
+
+class TestReconnectDelay:
+    """Tests for the backoff."""
+
+    def test_first_attempt_is_quick(self):
+        assert 0.5 < reconnect_delay(0) < 1.5
+
+    def test_doubles_with_failures(self):
+        assert 3 < reconnect_delay(2) < 5
+
+    def test_bounded(self):
+        for _ in range(100):
+            assert reconnect_delay(50) <= RECONNECT_MAX_DELAY * 1.2
+
+
+class TestConnectionSupervisor:
+    """Tests for outage handling."""
+
+    def test_outage_reported_once(self, make_supervisor):
+        supervisor, _, on_down = make_supervisor()
+        supervisor.async_connection_down()
+        supervisor.async_connection_down()
+        on_down.assert_called_once()
+        assert supervisor.down
+        assert supervisor.outages == 1
+        assert supervisor._unsub_retry is not None
+        supervisor.async_stop()
+
+    def test_failed_attempts_back_off(self, make_supervisor):
+        supervisor, client, _ = make_supervisor()
+        hass = supervisor._hass
+        hass.async_create_background_task = MagicMock()
+        supervisor.async_connection_down()
+        supervisor._unsub_retry()
+        supervisor._async_reconnect()
+        client.disconnect.assert_called_once()
+        hass.async_create_background_task.assert_called_once()
+        # The attempt failed; the client asks for a reconnect again
+        supervisor.async_connection_down()
+        assert supervisor.failures == 1
+        supervisor.async_connected()
+        assert supervisor.failures == 0
+        assert supervisor.reconnect_time.count == 1
+        supervisor.async_reporting()
+        assert not supervisor.down
+        assert supervisor.last_outage is not None
+        supervisor.async_stop()
+        hass.async_create_background_task.call_args.args[0].close()
+
+    def test_failed_initial_connect_is_not_an_outage(self, make_supervisor, caplog):
+        supervisor, _, on_down = make_supervisor(reporting=False)
+        supervisor.async_connection_down()
+        assert "initial connection" in caplog.text
+        assert supervisor._unsub_retry is not None
+        supervisor._unsub_retry()
+        supervisor._unsub_retry = None
+        # The retry fails too and backs off
+        supervisor.async_connection_down()
+        assert supervisor.failures == 1
+        supervisor.async_connected()
+        supervisor.async_reporting()
+        on_down.assert_not_called()
+        assert supervisor.outages == 0
+        assert supervisor.last_outage is None
+        assert supervisor.summary()["reconnect_time"]["count"] == 0
+        supervisor.async_stop()
+
+    def test_client_reconnect_routed_to_supervisor(self, make_supervisor, run):
+        supervisor, client, on_down = make_supervisor()
+        run(client.reconnect(10))
+        on_down.assert_called_once()
+        supervisor.async_stop()
+
+    def test_refused_connection_is_a_failure(self, hass, run):
+        supervisor = ConnectionSupervisor(hass, 30, lambda: None, MagicMock())
+        client = MagicMock()
+
+        async def refused():
+            raise ConnectionRefusedError
+
+        client.connect = refused
+        supervisor.attach(client)
+        run(client.connect())
+        client.handle_connect_failure.assert_called_once()
+
+    def test_dead_link_torn_down(self, make_supervisor):
+        supervisor, client, _ = make_supervisor()
+        client._connected = True
+        supervisor.async_connected()
+        supervisor._connected_at -= 30 * DEAD_LINK_KEEPALIVES + 1
+        supervisor._async_check_link()
+        client.disconnect.assert_called_once()
+        assert supervisor.dead_links == 1
+
+    def test_quiet_but_alive_link_kept(self, make_supervisor):
+        supervisor, client, _ = make_supervisor(last_line=time.perf_counter())
+        client._connected = True
+        supervisor.async_connected()
+        supervisor._connected_at -= 30 * DEAD_LINK_KEEPALIVES + 1
+        supervisor._async_check_link()
+        client.disconnect.assert_not_called()
+
+
+class TestHubReconnect:
+    """Tests a hub losing and regaining the simulator."""
+
+    def test_outage_and_recovery(self, make_hub, run):
+        async def wait_for(predicate):
+            deadline = asyncio.get_running_loop().time() + 5
+            while not predicate():
+                assert asyncio.get_running_loop().time() < deadline
+                await asyncio.sleep(0.01)
+
+        async def scenario():
+            simulator = AAPSimulator(scenario="idle")
+            _, port = await simulator.start_tcp("127.0.0.1")
+            with (
+                patch("custom_components.aapalarm.hub.async_dispatcher_send"),
+                patch("custom_components.aapalarm.hub.async_track_time_interval"),
+                patch.object(supervisor_module, "async_track_time_interval"),
+                patch.object(supervisor_module, "RECONNECT_MIN_DELAY", 0.05),
+            ):
+                hub = make_hub(port=port)
+                assert await hub.async_start(wait=False)
+                await wait_for(lambda: hub.ready)
+
+                await simulator.stop()
+                await wait_for(lambda: not hub.ready)
+                assert hub.supervisor.down
+
+                simulator = AAPSimulator(scenario="idle")
+                await simulator.start_tcp("127.0.0.1", port)
+                await wait_for(lambda: hub.ready)
+                hub.async_stop()
+                hub.controller._client.disconnect()
+            await simulator.stop()
+            return hub
+
+        hub = run(scenario())
+        summary = hub.supervisor.summary()
+        assert summary["outages"] == 1
+        assert summary["reconnect_time"]["count"] == 1
+        assert summary["last_outage"] is not None
+        assert [event["event"] for event in hub.connection_history][:3] == [
+            "connected", "connection_lost", "down",
+        ]
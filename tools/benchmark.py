@@ -0,0 +1,352 @@
+"""End-to-end benchmark of the AAP Alarm event pipeline.
+
+Drives synthetic panel lines through the pyaapalarmmodule client of one or
+more hubs, through the controller callbacks, coalescer and dispatcher, into
+the binary_sensor, switch, sensor and alarm_control_panel entities of an
+in-process Home Assistant core, and measures:
+
+* lines per second sustained,
+* latency from line receipt (``data_received``) to the state write of the
+  entity that line affects (p50/p95/p99/max),
+* CPU time per line.
+
+Every round feeds each entry one chunk in which every configured zone,
+output, system flag and area changes exactly once, so every line results in
+exactly one state write. Results are printed (or written) as JSON:
+
+    python -m tools.benchmark --zones 1 8 32 --entries 1 5 10 --output bench.json
+
+The panel protocol supports 16 zones; larger counts widen the controller's
+zone table so dispatch scaling can still be measured.
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+import json
+import logging
+from pathlib import Path
+import platform as py_platform
+import statistics
+import tempfile
+import time
+from types import MappingProxyType
+
+from pyaapalarmmodule import AAPModuleClient, StatusState
+
+from homeassistant import loader
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_HOST, EVENT_STATE_CHANGED, __version__ as HA_VERSION
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+from custom_components.aapalarm import (
+    AAPAlarmHub,
+    alarm_control_panel,
+    binary_sensor,
+    sensor,
+    switch,
+)
+from custom_components.aapalarm.const import (
+    CONF_AREANAME,
+    CONF_AREAS,
+    CONF_COALESCE_WINDOW,
+    CONF_CONNECTIONTYPE,
+    CONF_MESSAGE_LOG_ENABLED,
+    CONF_OUTPUTNAME,
+    CONF_OUTPUTS,
+    CONF_ZONENAME,
+    CONF_ZONES,
+    DOMAIN,
+)
+from custom_components.aapalarm.stats import percentile
+
+_LOGGER = logging.getLogger(__name__)
+
+LINE_ENDING = "\n\r"
+PROTOCOL_MAX_ZONES = 16
+OUTPUTS = 8
+SYSTEM_FLAG = ("mains", "MF", "MR")  # flag, line when set, line when cleared
+PLATFORMS = (
+    ("binary_sensor", binary_sensor),
+    ("switch", switch),
+    ("sensor", sensor),
+    ("alarm_control_panel", alarm_control_panel),
+)
+
+_MANIFEST = Path(__file__).parent.parent / "custom_components" / DOMAIN / "manifest.json"
+
+
+def entry_data(zones: int, outputs: int = OUTPUTS) -> dict:
+    """Return config entry data for a panel with the given zones and outputs."""
+    return {
+        CONF_CONNECTIONTYPE: "IP",
+        CONF_HOST: "127.0.0.1",
+        CONF_ZONES: {
+            str(zone): {CONF_ZONENAME: f"Zone {zone}"} for zone in range(1, zones + 1)
+        },
+        CONF_OUTPUTS: {
+            str(output): {CONF_OUTPUTNAME: f"Output {output}"}
+            for output in range(1, outputs + 1)
+        },
+        CONF_AREAS: {"1": {CONF_AREANAME: "House"}},
+    }
+
+
+class _Bench:
+    """Home Assistant core with a number of AAP hubs fed directly with lines."""
+
+    def __init__(self, zones: int, entries: int, coalesce_window: float, message_log: bool):
+        """Initialize the benchmark case."""
+        self.zones = zones
+        self.entries = entries
+        self.options = {
+            CONF_COALESCE_WINDOW: coalesce_window,
+            CONF_MESSAGE_LOG_ENABLED: message_log,
+        }
+        self.hass: HomeAssistant | None = None
+        self.hubs: list[AAPAlarmHub] = []
+        self.clients: list[AAPModuleClient] = []
+        # (entry index, line) -> entity_id the line changes
+        self.targets: dict[tuple[int, str], str] = {}
+        self.pending: dict[str, list[float]] = defaultdict(list)
+        self.latencies: list[float] = []
+        self.writes = 0
+        self._tmp = tempfile.TemporaryDirectory()
+
+    async def async_setup(self) -> None:
+        """Start the core and set up every entry's platforms."""
+        hass = self.hass = HomeAssistant(self._tmp.name)
+        loader.async_setup(hass)
+        await hass.async_start()
+        await asyncio.gather(er.async_load(hass), dr.async_load(hass))
+        hass.bus.async_listen(EVENT_STATE_CHANGED, self._async_state_changed)
+
+        for index in range(self.entries):
+            entry = ConfigEntry(
+                data=entry_data(self.zones),
+                discovery_keys=MappingProxyType({}),
+                domain=DOMAIN,
+                minor_version=1,
+                options=self.options,
+                source="user",
+                subentries_data=None,
+                title=f"Panel {index}",
+                unique_id=None,
+                version=1,
+            )
+            hub = AAPAlarmHub(hass, entry.entry_id, {**entry.data, **entry.options})
+            controller = hub.controller
+            if self.zones > PROTOCOL_MAX_ZONES:
+                controller.zone_state.update(StatusState.get_initial_zone_state(self.zones))
+            # Attach a client without connecting; lines are fed to data_received
+            controller._client = AAPModuleClient(controller, hass.loop)
+            hub._connected_callback(True)
+            hass.data.setdefault(DOMAIN, {})[entry.entry_id] = hub
+            self.hubs.append(hub)
+            self.clients.append(controller._client)
+
+            for domain, module in PLATFORMS:
+                entity_platform = EntityPlatform(
+                    hass=hass,
+                    logger=_LOGGER,
+                    domain=domain,
+                    platform_name=DOMAIN,
+                    platform=module,
+                    scan_interval=timedelta(seconds=30),
+                    entity_namespace=None,
+                )
+                entities = []
+
+                def add_entities(new_entities, update_before_add=False, entities=entities):
+                    entities.extend(new_entities)
+
+                await module.async_setup_entry(hass, entry, add_entities)
+                await entity_platform.async_add_entities(entities)
+                self._map_targets(index, entities)
+
+        await hass.async_block_till_done()
+
+    def _map_targets(self, index: int, entities) -> None:
+        """Remember which entity each generated line changes."""
+        flag, set_line, clear_line = SYSTEM_FLAG
+        for entity in entities:
+            if isinstance(entity, binary_sensor.AAPModuleBinarySensor):
+                number = entity._zone_number
+                keys = (f"ZO{number}", f"ZC{number}")
+            elif isinstance(entity, switch.AAPModuleOutput):
+                number = entity._output_number
+                keys = (f"OO{number}", f"OR{number}")
+            elif isinstance(entity, alarm_control_panel.AAPModuleAlarm):
+                keys = ("AA", "DA")
+            elif getattr(entity, "_sensor_key", None) == flag:
+                keys = (set_line, clear_line)
+            else:
+                continue
+            for key in keys:
+                self.targets[(index, key)] = entity.entity_id
+
+    def round_lines(self, round_number: int) -> list[str]:
+        """Return the lines of one round; every target changes exactly once."""
+        on = round_number % 2 == 0
+        _, set_line, clear_line = SYSTEM_FLAG
+        lines = [f"ZO{zone}" if on else f"ZC{zone}" for zone in range(1, self.zones + 1)]
+        lines += [f"OO{output}" if on else f"OR{output}" for output in range(1, OUTPUTS + 1)]
+        lines.append(set_line if on else clear_line)
+        lines.append("AA" if on else "DA")
+        return lines
+
+    @callback
+    def _async_state_changed(self, event) -> None:
+        """Resolve the latency of every line waiting on this entity."""
+        self.writes += 1
+        received = self.pending.pop(event.data["entity_id"], None)
+        if received:
+            now = time.perf_counter()
+            self.latencies.extend(now - stamp for stamp in received)
+
+    async def async_run(self, lines: int, warmup: int) -> dict:
+        """Feed rounds until at least lines lines were processed."""
+        round_number = 0
+        for _ in range(warmup):
+            await self._async_round(round_number)
+            round_number += 1
+        self.latencies.clear()
+        self.writes = 0
+
+        processed = 0
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        while processed < lines:
+            processed += await self._async_round(round_number)
+            round_number += 1
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        return {
+            "zones": self.zones,
+            "entries": self.entries,
+            "lines": processed,
+            "state_writes": self.writes,
+            "seconds": round(wall, 4),
+            "lines_per_second": round(processed / wall, 1),
+            "cpu_us_per_line": round(cpu / processed * 1e6, 2),
+            "latency_ms": {
+                name: round(value * 1000, 4)
+                for name, value in (
+                    ("p50", percentile(self.latencies, 50)),
+                    ("p95", percentile(self.latencies, 95)),
+                    ("p99", percentile(self.latencies, 99)),
+                    ("max", max(self.latencies, default=0.0)),
+                    ("mean", statistics.fmean(self.latencies) if self.latencies else 0.0),
+                )
+            },
+            "unresolved": sum(len(stamps) for stamps in self.pending.values()),
+            # The integration's own line-to-write latency, from the first hub
+            "integration_latency": self.hubs[0].latency_summary(),
+        }
+
+    async def _async_round(self, round_number: int) -> int:
+        """Feed one chunk per entry and wait until every write happened."""
+        lines = self.round_lines(round_number)
+        data = LINE_ENDING.join(lines).encode("ascii")
+        count = 0
+        for index, client in enumerate(self.clients):
+            received = time.perf_counter()
+            for line in lines:
+                self.pending[self.targets[(index, line)]].append(received)
+            client.data_received(data)
+            count += len(lines)
+        # Coalesced updates are flushed on the next loop iteration(s)
+        for _ in range(100):
+            if not self.pending:
+                break
+            await asyncio.sleep(0)
+        return count
+
+    async def async_close(self) -> None:
+        """Stop the hubs and the core."""
+        for hub in self.hubs:
+            hub.coalescer.async_cancel()
+        await self.hass.async_stop()
+        self._tmp.cleanup()
+
+
+async def async_run_case(
+    zones: int,
+    entries: int,
+    lines: int = 10000,
+    warmup: int = 20,
+    coalesce_window: float = 0,
+    message_log: bool = True,
+) -> dict:
+    """Run a single benchmark case and return its result."""
+    bench = _Bench(zones, entries, coalesce_window, message_log)
+    try:
+        await bench.async_setup()
+        return await bench.async_run(lines, warmup)
+    finally:
+        await bench.async_close()
+
+
+async def async_run_matrix(
+    zones: list[int], entries: list[int], lines: int, warmup: int, message_log: bool
+) -> dict:
+    """Run every zones x entries combination and return the JSON report."""
+    results = []
+    for zone_count in zones:
+        for entry_count in entries:
+            result = await async_run_case(
+                zone_count, entry_count, lines, warmup, message_log=message_log
+            )
+            _LOGGER.info(
+                "%s zones x %s entries: %s lines/s, p99 %s ms",
+                zone_count,
+                entry_count,
+                result["lines_per_second"],
+                result["latency_ms"]["p99"],
+            )
+            results.append(result)
+    return {
+        "integration_version": json.loads(_MANIFEST.read_text())["version"],
+        "homeassistant_version": HA_VERSION,
+        "python_version": py_platform.python_version(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "parameters": {"lines": lines, "warmup_rounds": warmup, "message_log": message_log},
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--zones", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--entries", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--lines", type=int, default=10000, help="lines per case")
+    parser.add_argument("--warmup", type=int, default=20, help="rounds before measuring")
+    parser.add_argument(
+        "--no-message-log", action="store_true", help="run without the message log sensor"
+    )
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    # Configure logging before pyaapalarmmodule calls basicConfig(level=DEBUG)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    report = asyncio.run(
+        async_run_matrix(
+            args.zones, args.entries, args.lines, args.warmup, not args.no_message_log
+        )
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,477 @@
+"""Simulator for an AAP IP / Serial Module.
+
+Speaks the module's line protocol on a local TCP port and/or a pseudo
+terminal so the integration (and the underlying pyaapalarmmodule client)
+can be exercised without a physical ArrowHead panel.
+
+Run it standalone, then point the integration at it:
+
+    python -m tools.simulator --tcp 5002 --scenario zone_chatter --rate 500
+    python -m tools.simulator --pty --scenario arm_disarm
+
+Scenarios are plain generators that yield raw panel lines; yielding
+DISCONNECT drops the client connection. Lines are paced to --rate lines per
+second and written in batches, so rates of several thousand lines per
+second are sustainable on the TCP transport. Real serial modules run at
+9600 baud (roughly 200 lines per second), and the pyaapalarmmodule serial
+client only keeps the first line of each read, so keep pty rates low.
+"""
+
+import argparse
+import asyncio
+from collections.abc import Callable, Iterator
+import logging
+import os
+import random
+import re
+import time
+import tty
+
+_LOGGER = logging.getLogger(__name__)
+
+LINE_ENDING = "\n\r"
+DISCONNECT = None
+TICK = 0.01  # seconds between paced writes
+
+# Commands as sent by pyaapalarmmodule (IP and serial variants)
+_IP_KEYS = re.compile(r"^KEYS (?P<keys>[0-9A-Z]+)$")
+_IP_OUTPUT = re.compile(r"^OO(?P<output>\d+)$")
+_SERIAL_OUTPUT = re.compile(r"^KEYS_C(?P<output>\d+)E$")
+_SERIAL_KEYS = re.compile(r"^KEYS_?(?P<keys>[0-9A-Z]+)E$")
+
+SYSTEM_LINES = {
+    # flag: (line when True, line when False)
+    "mains": ("MR", "MF"),
+    "battery": ("BR", "BF"),
+    "tamper": ("TF", "TR"),
+    "line": ("LR", "LF"),
+    "dialler": ("DR", "DF"),
+    "ready": ("RO", "NR"),
+    "fuse": ("FR", "FF"),
+    "zonebattery": ("ZBR", "ZBF"),
+    "pendantbattery": ("PBR", "PBF"),
+    "codetamper": ("CTF", "CTR"),
+}
+
+
+class SimulatedPanel:
+    """State of a simulated panel and the lines it emits as that state changes."""
+
+    def __init__(
+        self,
+        zones: int = 16,
+        outputs: int = 8,
+        code: str = "1234",
+        exit_delay: float = 1.0,
+        serial: bool = False,
+    ) -> None:
+        """Initialize the panel with everything closed, disarmed and healthy."""
+        self.zones = {zone: False for zone in range(1, zones + 1)}
+        self.outputs = {output: False for output in range(1, outputs + 1)}
+        self.areas = {"A": "D", "B": "D"}  # D(isarmed), A(rmed), S(tay)
+        self.system = {
+            "mains": True,
+            "battery": True,
+            "tamper": False,
+            "line": True,
+            "dialler": True,
+            "ready": True,
+            "fuse": True,
+            "zonebattery": True,
+            "pendantbattery": True,
+            "codetamper": False,
+        }
+        self.code = code
+        self.exit_delay = exit_delay
+        self.serial = serial
+
+    def status_lines(self) -> list[str]:
+        """Return the full status dump sent in reply to a status request."""
+        lines = [f"{'ZO' if is_open else 'ZC'}{zone}" for zone, is_open in self.zones.items()]
+        lines += [f"{mode}{area}" for area, mode in self.areas.items()]
+        lines += [self.output_line(output) for output in self.outputs]
+        lines += [SYSTEM_LINES[flag][0 if value else 1] for flag, value in self.system.items()]
+        return lines
+
+    def zone_line(self, zone: int, is_open: bool) -> str:
+        """Set a zone open or closed and return the matching line."""
+        self.zones[zone] = is_open
+        return f"{'ZO' if is_open else 'ZC'}{zone}"
+
+    def output_line(self, output: int) -> str:
+        """Return the line reporting the current state of output."""
+        if self.outputs[output]:
+            return f"OO{output}"
+        return f"{'OR' if self.serial else 'OC'}{output}"
+
+    def system_line(self, flag: str, value: bool) -> str:
+        """Set a system flag and return the matching line."""
+        self.system[flag] = value
+        return SYSTEM_LINES[flag][0 if value else 1]
+
+    def area_line(self, area: str, mode: str) -> str:
+        """Set an area to D(isarmed), A(rmed) or S(tay) and return the matching line."""
+        self.areas[area] = mode
+        return f"{mode}{area}"
+
+    def handle_command(self, command: str, schedule: Callable[[float, list[str]], None]) -> list[str]:
+        """Apply a command sent by the client and return the immediate reply.
+
+        Delayed replies (the end of an exit delay) are passed to schedule.
+        """
+        command = command.strip()
+        if command in ("STATUS", "?E", "?"):
+            return self.status_lines()
+        if command in ("ARM", "KEYS_RE"):
+            schedule(self.exit_delay, [self.area_line("A", "A")])
+            return ["EAA"]
+        if command in ("STAY", "KEYS_SE"):
+            schedule(self.exit_delay, [self.area_line("A", "S")])
+            return ["ESA"]
+        if command in ("PANIC", "KEYS_NE"):
+            return []
+        match = _IP_OUTPUT.match(command) or _SERIAL_OUTPUT.match(command)
+        if match:
+            output = int(match.group("output"))
+            if output not in self.outputs:
+                return []
+            self.outputs[output] = not self.outputs[output]
+            return [self.output_line(output)]
+        match = _IP_KEYS.match(command) or _SERIAL_KEYS.match(command)
+        if match:
+            keys = match.group("keys").rstrip("E")
+            if keys == self.code:
+                return [self.area_line(area, "D") for area in self.areas]
+            return []
+        _LOGGER.debug("Ignoring unknown command %r", command)
+        return []
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+def scenario_idle(panel: SimulatedPanel, rng: random.Random) -> Iterator[str | None]:
+    """Only reply to commands."""
+    return iter(())
+
+
+def scenario_zone_chatter(panel: SimulatedPanel, rng: random.Random) -> Iterator[str | None]:
+    """Open and close random zones forever."""
+    zones = list(panel.zones)
+    while True:
+        zone = rng.choice(zones)
+        yield panel.zone_line(zone, not panel.zones[zone])
+
+
+def scenario_arm_disarm(panel: SimulatedPanel, rng: random.Random) -> Iterator[str | None]:
+    """Cycle area A through away and stay arming, with zone activity in between."""
+    zones = list(panel.zones)
+    while True:
+        for mode, exit_line in (("A", "EAA"), ("S", "ESA")):
+            yield exit_line
+            yield panel.area_line("A", mode)
+            for _ in range(8):
+                zone = rng.choice(zones)
+                yield panel.zone_line(zone, not panel.zones[zone])
+            yield panel.area_line("A", "D")
+
+
+def scenario_mains_failure(panel: SimulatedPanel, rng: random.Random) -> Iterator[str | None]:
+    """Fail and restore mains power, with the battery and ready flags following."""
+    while True:
+        yield panel.system_line("mains", False)
+        yield panel.system_line("ready", False)
+        yield panel.system_line("battery", False)
+        yield panel.system_line("mains", True)
+        yield panel.system_line("battery", True)
+        yield panel.system_line("ready", True)
+
+
+def scenario_alarm(panel: SimulatedPanel, rng: random.Random) -> Iterator[str | None]:
+    """Arm, trip a zone into alarm, restore and disarm."""
+    zones = list(panel.zones)
+    while True:
+        zone = rng.choice(zones)
+        yield "EAA"
+        yield panel.area_line("A", "A")
+        yield panel.zone_line(zone, True)
+        yield f"ZA{zone}"
+        yield panel.zone_line(zone, False)
+        yield f"ZR{zone}"
+        yield panel.area_line("A", "D")
+
+
+def scenario_disconnects(panel: SimulatedPanel, rng: random.Random) -> Iterator[str | None]:
+    """Zone chatter with the connection dropped every 200 lines."""
+    chatter = scenario_zone_chatter(panel, rng)
+    while True:
+        for _ in range(200):
+            yield next(chatter)
+        yield DISCONNECT
+
+
+SCENARIOS: dict[str, Callable[[SimulatedPanel, random.Random], Iterator[str | None]]] = {
+    "idle": scenario_idle,
+    "zone_chatter": scenario_zone_chatter,
+    "arm_disarm": scenario_arm_disarm,
+    "mains_failure": scenario_mains_failure,
+    "alarm": scenario_alarm,
+    "disconnects": scenario_disconnects,
+}
+
+
+# ---------------------------------------------------------------------------
+# Transports
+# ---------------------------------------------------------------------------
+
+class _Session:
+    """One client connection: replies to commands and streams the scenario."""
+
+    def __init__(self, simulator: "AAPSimulator", write: Callable[[bytes], None], close: Callable[[], None]) -> None:
+        self._simulator = simulator
+        self._write = write
+        self._close = close
+        self._buffer = b""
+        self._task: asyncio.Task | None = None
+        self.closed = False
+
+    def start(self) -> None:
+        """Start streaming the scenario."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop streaming and close the connection."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._task is not None:
+            self._task.cancel()
+        self._close()
+
+    def send(self, lines: list[str]) -> None:
+        """Write lines to the client."""
+        if self.closed or not lines:
+            return
+        data = "".join(line + LINE_ENDING for line in lines).encode("ascii")
+        self._simulator.lines_sent += len(lines)
+        self._simulator.bytes_sent += len(data)
+        self._write(data)
+
+    def feed(self, data: bytes) -> None:
+        """Handle bytes received from the client."""
+        self._buffer += data
+        while b"\n" in self._buffer:
+            raw, self._buffer = self._buffer.split(b"\n", 1)
+            command = raw.decode("ascii", "replace").strip()
+            if not command:
+                continue
+            self._simulator.commands.append(command)
+            self.send(self._simulator.panel.handle_command(command, self._schedule))
+
+    def _schedule(self, delay: float, lines: list[str]) -> None:
+        asyncio.get_running_loop().call_later(delay, self.send, lines)
+
+    async def _run(self) -> None:
+        """Pace scenario lines to the configured rate."""
+        simulator = self._simulator
+        if simulator.rate <= 0:
+            return
+        scenario = simulator.new_scenario()
+        budget = 0.0
+        last = time.monotonic()
+        while not self.closed:
+            await asyncio.sleep(TICK)
+            now = time.monotonic()
+            budget = min(budget + (now - last) * simulator.rate, simulator.rate)
+            last = now
+            batch = []
+            while budget >= 1:
+                budget -= 1
+                line = next(scenario, "")
+                if line is DISCONNECT:
+                    self.send(batch)
+                    _LOGGER.info("Scenario dropped the connection")
+                    self.stop()
+                    return
+                if line == "":
+                    # Scenario finished; keep answering commands
+                    self.send(batch)
+                    return
+                batch.append(line)
+            self.send(batch)
+
+
+class AAPSimulator:
+    """Serve a SimulatedPanel over TCP and/or a pseudo terminal."""
+
+    def __init__(
+        self,
+        panel: SimulatedPanel | None = None,
+        scenario: str = "idle",
+        rate: float = 10.0,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the simulator; rate is scenario lines per second."""
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {scenario!r}, expected one of {sorted(SCENARIOS)}")
+        self.panel = panel or SimulatedPanel()
+        self.scenario = scenario
+        self.rate = rate
+        self._rng = random.Random(seed)
+        self._server: asyncio.AbstractServer | None = None
+        self._sessions: list[_Session] = []
+        self._pty_fds: tuple[int, int] | None = None
+        self.lines_sent = 0
+        self.bytes_sent = 0
+        self.commands: list[str] = []
+
+    def new_scenario(self) -> Iterator[str | None]:
+        """Return a fresh iterator over the configured scenario."""
+        return SCENARIOS[self.scenario](self.panel, self._rng)
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> tuple[str, int]:
+        """Listen on host:port (0 picks a free port) and return the bound address."""
+
+        def _factory():
+            return _TCPProtocol(self)
+
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(_factory, host, port)
+        address = self._server.sockets[0].getsockname()
+        _LOGGER.info("Simulated AAP IP module listening on %s:%s", address[0], address[1])
+        return address[0], address[1]
+
+    def start_pty(self) -> str:
+        """Open a pseudo terminal and return the device path for the serial client."""
+        loop = asyncio.get_running_loop()
+        master, slave = os.openpty()
+        # Raw mode so the line discipline neither echoes commands nor rewrites line endings
+        tty.setraw(slave)
+        os.set_blocking(master, False)
+        self._pty_fds = (master, slave)
+        pending = bytearray()
+
+        def _flush():
+            try:
+                written = os.write(master, pending)
+            except BlockingIOError:
+                return
+            del pending[:written]
+            if not pending:
+                loop.remove_writer(master)
+
+        def _write(data: bytes) -> None:
+            # Keep ordering: queue behind anything the client has not read yet
+            was_pending = bool(pending)
+            pending.extend(data)
+            if not was_pending:
+                _flush()
+                if pending:
+                    loop.add_writer(master, _flush)
+
+        session = _Session(self, _write, lambda: None)
+
+        def _read():
+            try:
+                data = os.read(master, 4096)
+            except (BlockingIOError, OSError):
+                return
+            session.feed(data)
+
+        loop.add_reader(master, _read)
+        self._sessions.append(session)
+        session.start()
+        path = os.ttyname(slave)
+        _LOGGER.info("Simulated AAP serial module on %s", path)
+        return path
+
+    def _add_session(self, session: _Session) -> None:
+        self._sessions = [s for s in self._sessions if not s.closed]
+        self._sessions.append(session)
+
+    async def stop(self) -> None:
+        """Close every connection and stop listening."""
+        for session in self._sessions:
+            session.stop()
+        self._sessions.clear()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._pty_fds is not None:
+            loop = asyncio.get_running_loop()
+            master, slave = self._pty_fds
+            loop.remove_reader(master)
+            loop.remove_writer(master)
+            os.close(master)
+            os.close(slave)
+            self._pty_fds = None
+
+
+class _TCPProtocol(asyncio.Protocol):
+    """asyncio protocol wiring one TCP client to a _Session."""
+
+    def __init__(self, simulator: AAPSimulator) -> None:
+        self._simulator = simulator
+        self._session: _Session | None = None
+
+    def connection_made(self, transport) -> None:
+        self._session = _Session(self._simulator, transport.write, transport.close)
+        self._simulator._add_session(self._session)
+        self._session.start()
+
+    def data_received(self, data: bytes) -> None:
+        self._session.feed(data)
+
+    def connection_lost(self, exc) -> None:
+        self._session.stop()
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    panel = SimulatedPanel(
+        zones=args.zones,
+        outputs=args.outputs,
+        code=args.code,
+        exit_delay=args.exit_delay,
+        serial=args.pty,
+    )
+    simulator = AAPSimulator(panel, args.scenario, args.rate, args.seed)
+    if args.tcp is not None:
+        host, port = await simulator.start_tcp(args.host, args.tcp)
+        print(f"TCP: {host}:{port}")
+    if args.pty:
+        print(f"PTY: {simulator.start_pty()}")
+    try:
+        while True:
+            await asyncio.sleep(5)
+            _LOGGER.info("%s lines / %s bytes sent", simulator.lines_sent, simulator.bytes_sent)
+    finally:
+        await simulator.stop()
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tcp", type=int, metavar="PORT", help="listen on this TCP port")
+    parser.add_argument("--pty", action="store_true", help="expose a pseudo terminal")
+    parser.add_argument("--scenario", default="zone_chatter", choices=sorted(SCENARIOS))
+    parser.add_argument("--rate", type=float, default=10.0, help="scenario lines per second")
+    parser.add_argument("--zones", type=int, default=16)
+    parser.add_argument("--outputs", type=int, default=8)
+    parser.add_argument("--code", default="1234")
+    parser.add_argument("--exit-delay", type=float, default=1.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    if args.tcp is None and not args.pty:
+        parser.error("choose at least one of --tcp or --pty")
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_async_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()